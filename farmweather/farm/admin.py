@@ -1,11 +1,142 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Max
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
+from django.views.decorators.http import require_POST
 from .models import Crop, Location, UserProfile, WeatherData
 from .services import OpenMeteoService
+from .weather_refresh import refresh_weather
 import datetime
+import time
 
 weather_service = OpenMeteoService()
 
+
+def estimate_row_count(queryset):
+    """
+    Cheap approximate row count of a table: the planner statistics on
+    PostgreSQL, otherwise the highest integer primary key (an overestimate
+    only by the number of deleted rows). None when neither is available.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    if model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+        return model._default_manager.using(queryset.db).aggregate(highest=Max('pk'))['highest'] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables. Unfiltered listings use an estimated
+    row count instead of COUNT(*); filtered ones count at most `count_limit`
+    rows, so the last reachable page is bounded but the count stays cheap.
+    """
+    count_limit = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset[:self.count_limit].count()
+
+
+class IndexProbedDatesQuerySet(models.QuerySet):
+    """
+    QuerySet whose datetimes() finds the populated years, months or days by
+    probing each candidate period with an indexed EXISTS, instead of
+    truncating and de-duplicating every row as the date hierarchy would.
+    """
+    max_probes = 400
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tzinfo = tzinfo or timezone.get_current_timezone()
+        first = self.order_by(field_name).values_list(field_name, flat=True).first()
+        last = self.order_by(f'-{field_name}').values_list(field_name, flat=True).first()
+        if first is None:
+            return []
+        first, last = first.astimezone(tzinfo), last.astimezone(tzinfo)
+
+        def truncate(value):
+            return datetime.datetime(
+                value.year,
+                value.month if kind != 'year' else 1,
+                value.day if kind == 'day' else 1,
+                tzinfo=tzinfo,
+            )
+
+        def following(period):
+            if kind == 'year':
+                return period.replace(year=period.year + 1)
+            if kind == 'month':
+                return period.replace(year=period.year + period.month // 12, month=period.month % 12 + 1)
+            day = period.date() + datetime.timedelta(days=1)
+            return datetime.datetime(day.year, day.month, day.day, tzinfo=tzinfo)
+
+        periods = []
+        period = truncate(first)
+        while period <= last:
+            if len(periods) > self.max_probes:
+                return super().datetimes(field_name, kind, order, tzinfo)
+            periods.append(period)
+            period = following(period)
+        def probe(period):
+            bounds = {f'{field_name}__gte': period, f'{field_name}__lt': following(period)}
+            if self.query.distinct:
+                return self.filter(**bounds)
+            # With the probe's range first in the WHERE clause SQLite seeks the
+            # index on it rather than on a wider range from the changelist filters
+            return self.model._default_manager.db_manager(self.db).filter(**bounds) & self
+
+        populated = [period for period in periods if probe(period).exists()]
+        return populated if order == 'ASC' else populated[::-1]
+
+
+class IndexProbedDatesChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return IndexProbedDatesQuerySet(model=queryset.model, query=queryset.query.chain(), using=queryset.db)
+
+
+def refresh_weather_response(modeladmin, request, locations):
+    """Refresh `locations` and render a per-location results page"""
+    start = time.perf_counter()
+    results = refresh_weather(locations)
+    elapsed = time.perf_counter() - start
+    updated = sum(result.ok for result in results)
+    modeladmin.message_user(
+        request,
+        f"Refreshed weather for {updated} of {len(results)} locations in {elapsed:.1f}s.",
+        messages.SUCCESS if updated == len(results) else messages.WARNING,
+    )
+    return TemplateResponse(request, "admin/farm/weather_refresh.html", {
+        **modeladmin.admin_site.each_context(request),
+        "title": "Fetch latest weather",
+        "opts": modeladmin.model._meta,
+        "results": results,
+        "updated": updated,
+        "failed": len(results) - updated,
+        "elapsed": elapsed,
+    })
+
 # Crop admin
 class CropAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'planting_season')
@@ -17,6 +148,11 @@ class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'latitude', 'longitude', 'user', 'is_primary')
     search_fields = ('name',)
     list_filter = ('is_primary',)
+    actions = ['fetch_latest_weather']
+
+    @admin.action(description="Fetch latest weather for selected locations")
+    def fetch_latest_weather(self, request, queryset):
+        return refresh_weather_response(self, request, queryset)
 
 # UserProfile admin
 class UserProfileAdmin(admin.ModelAdmin):
@@ -26,20 +162,68 @@ class UserProfileAdmin(admin.ModelAdmin):
 # WeatherData admin
 class WeatherDataAdmin(admin.ModelAdmin):
     list_display = ('location', 'recorded_at', 'temperature_current', 'precipitation', 'weather_code', 'fetch_latest')
-    search_fields = ('location__name',)
+    list_select_related = ('location',)
+    search_fields = ('^location__name',)
+    search_help_text = "Search by the start of a location name"
     list_filter = ('weather_code', 'recorded_at')
+    date_hierarchy = 'recorded_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['fetch_latest_weather']
+
+    def get_changelist(self, request, **kwargs):
+        return IndexProbedDatesChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """Location-name prefix search through the LOWER(name) index"""
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        locations = Location.objects.name_prefix(search_term).values('pk')
+        return queryset.filter(location__in=locations), False
     
     def fetch_latest(self, obj):
         """
-        Display a button/link to fetch latest weather for this location
+        Button that fetches latest weather for this location. It posts the
+        surrounding changelist form, which carries the CSRF token.
         """
         return format_html(
-            '<a class="button" href="{}">Fetch Now</a>',
-            f"/admin/farm/weatherdata/fetch/{obj.id}/"
+            '<button type="submit" class="button" formmethod="post" formaction="{}">Fetch Now</button>',
+            reverse('admin:farm_weatherdata_fetch', args=[obj.id])
         )
     fetch_latest.short_description = "Fetch Latest Weather"
     fetch_latest.allow_tags = True
 
+    @admin.action(description="Fetch latest weather for the locations of selected rows")
+    def fetch_latest_weather(self, request, queryset):
+        locations = Location.objects.filter(pk__in=queryset.values('location_id'))
+        return refresh_weather_response(self, request, locations)
+
+    def get_urls(self):
+        return [
+            path(
+                'fetch/<int:pk>/',
+                self.admin_site.admin_view(require_POST(self.fetch_view)),
+                name='farm_weatherdata_fetch',
+            ),
+        ] + super().get_urls()
+
+    def fetch_view(self, request, pk):
+        """Refresh the location of one WeatherData row (POST only) and return to the list"""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        weather_data = get_object_or_404(WeatherData.objects.select_related('location'), pk=pk)
+        result = refresh_weather([weather_data.location])[0]
+        if result.ok:
+            self.message_user(
+                request, f"Fetched latest weather for {result.location.name} in {result.seconds:.2f}s."
+            )
+        else:
+            self.message_user(
+                request, f"Could not refresh {result.location.name}: {result.error}", messages.ERROR
+            )
+        return redirect('admin:farm_weatherdata_changelist')
+
 # Register models
 admin.site.register(Crop, CropAdmin)
 admin.site.register(Location, LocationAdmin)
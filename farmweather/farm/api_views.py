@@ -1,22 +1,80 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework import status
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from django.utils.timezone import now
-from .models import Crop, Location, WeatherData, UserProfile
+import time
+from collections.abc import Mapping
+from datetime import date, datetime
+from .models import Crop, ForecastChange, Location, WeatherData, UserProfile
 from .serializers import (
     CropSerializer,
+    IrrigationScheduleSerializer,
     LocationSerializer,
     WeatherDataSerializer,
     UserProfileSerializer,
 )
-from .services import OpenMeteoService
 from .crops import suggest_crops
+from .gdd import accumulators_by_base, base_key, crop_progress
+from .hourly import HOURLY_SERIES
+from .geocoding import MAX_QUERY_LENGTH, autocomplete, geocode
+from .ip_location import create_detected_location, detect_location, get_client_ip
+from .layout import LayoutError, plan_layout
+from .location_import import import_locations, parse_rows
+
+
+# ----------------------
+# Sparse fieldsets
+# ----------------------
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` and `?exclude=c` on GET requests narrow the response to
+    the named fields. List and detail queries then load only the columns
+    those fields need, and join or prefetch related rows only when a
+    requested field uses them.
+    """
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        request = self.request
+        if request is None or request.method not in ("GET", "HEAD"):
+            return None
+        fields = {name.strip() for name in request.query_params.get("fields", "").split(",") if name.strip()}
+        exclude = {name.strip() for name in request.query_params.get("exclude", "").split(",") if name.strip()}
+        if not fields and not exclude:
+            return None
+
+        available = list(self.get_serializer_class()(context=super().get_serializer_context()).fields)
+        unknown = (fields | exclude) - set(available)
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return {name for name in available if (not fields or name in fields) and name not in exclude}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["sparse_fields"] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "retrieve"):
+            queryset = self.get_serializer().project_queryset(
+                queryset, narrow=self.get_sparse_fields() is not None
+            )
+        return queryset
 
 
 # ----------------------
 # Crop API Endpoints
 # ----------------------
-class CropViewSet(viewsets.ModelViewSet):
+class CropViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Manage crops (CRUD).
     Includes an extra endpoint for weather-based crop recommendations.
@@ -49,13 +107,16 @@ class CropViewSet(viewsets.ModelViewSet):
 
         # Get recommendations
         crops = suggest_crops(avg_temp, total_rain)
-        return Response({"suggested_crops": crops})
+        result = {"suggested_crops": crops}
+        if forecast.get("stale"):
+            result["stale_since"] = forecast["stale_since"]
+        return Response(result)
 
 
 # ----------------------
 # Location API Endpoints
 # ----------------------
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Manage user’s locations (CRUD).
     Includes actions to fetch current weather and forecast for each location.
@@ -76,7 +137,9 @@ class LocationViewSet(viewsets.ModelViewSet):
         Get live weather conditions for this location.
         """
         location = self.get_object()
-        return Response(location.get_current_weather())
+        return self._conditional_weather_response(
+            request, location, 'current', location.get_current_weather
+        )
 
     @action(detail=True, methods=["get"])
     def forecast(self, request, pk=None):
@@ -84,13 +147,323 @@ class LocationViewSet(viewsets.ModelViewSet):
         Get forecast data for this location.
         """
         location = self.get_object()
-        return Response(location.get_weather_forecast())
+        return self._conditional_weather_response(
+            request, location, 'forecast_7', location.get_weather_forecast
+        )
+
+    @action(detail=False, methods=["get"])
+    def forecast_changes(self, request):
+        """
+        Feed of material forecast changes, oldest first. Pass the returned
+        `cursor` back as `?since=` to get only newer changes; `?limit=`
+        caps the page (default 100, max 1000).
+        """
+        try:
+            since = int(request.query_params.get("since", 0))
+            limit = min(max(int(request.query_params.get("limit", 100)), 1), 1000)
+        except ValueError:
+            return Response({"error": "since and limit must be integers"}, status=400)
+
+        changes = list(
+            ForecastChange.objects.filter(pk__gt=since, location__in=self.get_queryset())
+            .order_by("pk")
+            .values("id", "location_id", "version", "changes", "created_at")[:limit]
+        )
+        return Response({
+            "changes": [
+                {
+                    "location": change["location_id"],
+                    "version": change["version"],
+                    "changed_at": change["created_at"],
+                    "days": change["changes"],
+                }
+                for change in changes
+            ],
+            "cursor": changes[-1]["id"] if changes else since,
+        })
+
+    @action(detail=True, methods=["get"])
+    def et0(self, request, pk=None):
+        """
+        Daily FAO-56 reference evapotranspiration (mm). Forecast days by
+        default (`?days=`, default 7); `?start_date=&end_date=` for history,
+        at most HISTORICAL_WEATHER_MAX_DAYS days.
+        """
+        location = self.get_object()
+        params = request.query_params
+        try:
+            if "start_date" in params or "end_date" in params:
+                start = date.fromisoformat(params["start_date"])
+                end = date.fromisoformat(params["end_date"])
+                if end < start:
+                    raise ValueError
+                span = (end - start).days + 1
+                if span > settings.HISTORICAL_WEATHER_MAX_DAYS:
+                    return Response(
+                        {"error": f"History is limited to {settings.HISTORICAL_WEATHER_MAX_DAYS} days; {span} requested"},
+                        status=400,
+                    )
+                weather = location.get_historical_weather(start, end)
+            else:
+                weather = location.get_weather_forecast(days=min(max(int(params.get("days", 7)), 1), 16))
+        except (KeyError, ValueError):
+            return Response({"error": "Pass both start_date and end_date (YYYY-MM-DD, in order), or an integer days"}, status=400)
+        if not weather:
+            return Response({"error": "No weather data"}, status=503)
+
+        days = weather["days"]
+        result = {
+            "elevation": weather.get("elevation"),
+            "dates": [day["date"] for day in days],
+            "et0_mm": [day.get("et0_mm") for day in days],
+            "total_mm": round(sum(day.get("et0_mm") or 0 for day in days), 2),
+        }
+        if weather.get("stale"):
+            result["stale_since"] = weather["stale_since"]
+        return Response(result)
+
+    @action(detail=True, methods=["get"])
+    def hourly(self, request, pk=None):
+        """
+        Hourly forecast window. `?start=` and `?end=` take unix seconds or
+        ISO datetimes (naive ones in the location's timezone); without `end`
+        the window is `?hours=` long (1-384, default 24) from `start` (default now).
+        `?variables=temperature,wind_gusts` limits the series and `?days=`
+        (1-16, default 7) picks the forecast length.
+        """
+        location = self.get_object()
+        params = request.query_params
+        variables = [name.strip() for name in params.get("variables", "").split(",") if name.strip()]
+        unknown = set(variables) - set(HOURLY_SERIES)
+        if unknown:
+            return Response({"error": f"Unknown variables: {', '.join(sorted(unknown))}"}, status=400)
+        try:
+            days = min(max(int(params.get("days", 7)), 1), 16)
+            hours = min(max(int(params.get("hours", 24)), 1), 384)
+            start = self._parse_instant(params.get("start"), location)
+            end = self._parse_instant(params.get("end"), location)
+        except ValueError:
+            return Response({"error": "start and end must be unix seconds or ISO datetimes; days and hours integers"}, status=400)
+        if start is None:
+            start = int(time.time()) // 3600 * 3600
+        if end is None:
+            end = start + hours * 3600
+
+        forecast = location.get_hourly_forecast(days=days)
+        if forecast is None:
+            return Response({"error": "No forecast data"}, status=503)
+        return Response(forecast.window(start, end, variables or None))
+
+    @staticmethod
+    def _parse_instant(value, location):
+        """Unix seconds from an integer or ISO datetime string, or None"""
+        if value in (None, ""):
+            return None
+        if value.lstrip("-").isdigit():
+            return int(value)
+        instant = datetime.fromisoformat(value)
+        if instant.tzinfo is None:
+            instant = instant.replace(tzinfo=location.tzinfo)
+        return int(instant.timestamp())
+
+    @action(detail=True, methods=["get"])
+    def gdd(self, request, pk=None):
+        """
+        Growing degree days accumulated here and projected maturity for
+        `?crops=1,2` (default: the owner's preferred crops).
+        """
+        location = self.get_object()
+        try:
+            crop_ids = [int(crop_id) for crop_id in request.query_params.get("crops", "").split(",") if crop_id.strip()]
+        except ValueError:
+            return Response({"error": "crops must be a comma-separated list of ids"}, status=400)
+        if crop_ids:
+            crops = Crop.objects.filter(pk__in=crop_ids)
+        else:
+            crops = Crop.objects.filter(userprofile__user=location.user)
+
+        accumulators = accumulators_by_base(location.gdd_accumulators.all())
+        results = []
+        for crop in crops.only("id", "name", "gdd_base_temp", "gdd_to_maturity", "days_to_maturity"):
+            accumulator = accumulators.get(base_key(crop.gdd_base_temp))
+            if accumulator is None:
+                results.append({"crop": crop.pk, "crop_name": crop.name, "base_temp": crop.gdd_base_temp, "gdd": None})
+            else:
+                results.append(crop_progress(accumulator, crop))
+        return Response({"location": location.pk, "crops": results})
+
+    @action(detail=False, methods=["get", "post"])
+    def bulk_weather(self, request):
+        """
+        Current weather and forecast for many locations in one request.
+        Pass ids as `?ids=1,2,3` or as a JSON body `{"ids": [1, 2, 3]}`.
+        """
+        if request.method == "POST":
+            if not isinstance(request.data, Mapping):
+                return Response({"error": 'Body must be a JSON object like {"ids": [1, 2, 3]}'}, status=400)
+            raw_ids = request.data.get("ids", [])
+            if not isinstance(raw_ids, list):
+                return Response({"error": "ids must be a list of integers"}, status=400)
+        else:
+            raw_ids = request.query_params.get("ids", "").split(",")
+
+        try:
+            ids = list(dict.fromkeys(int(i) for i in raw_ids if str(i).strip()))
+        except (TypeError, ValueError):
+            return Response({"error": "ids must be a list of integers"}, status=400)
+        if not ids:
+            return Response({"error": "No location ids given"}, status=400)
+        if len(ids) > settings.BULK_WEATHER_MAX_LOCATIONS:
+            return Response(
+                {"error": f"At most {settings.BULK_WEATHER_MAX_LOCATIONS} locations per request"},
+                status=400,
+            )
+
+        locations = {
+            location.id: location
+            for location in self.get_queryset().filter(pk__in=ids)
+        }
+        weather = Location.get_bulk_weather(list(locations.values()))
+        return Response({
+            "locations": [
+                {"id": i, "name": locations[i].name, **weather[i]}
+                for i in ids if i in locations
+            ],
+            "not_found": [i for i in ids if i not in locations],
+        })
+
+    @action(detail=False, methods=["get", "post"])
+    def detect(self, request):
+        """
+        Locate the client from its IP address.
+        GET previews the detected place; POST saves it as the user's
+        detected location (primary if they have none yet).
+        """
+        ip = get_client_ip(request)
+        if request.method == "GET":
+            detected = detect_location(ip) if ip else None
+            if not detected:
+                return Response({"error": "Could not detect location"}, status=404)
+            return Response(detected)
+
+        location = create_detected_location(request.user, ip) if ip else None
+        if location is None:
+            return Response({"error": "Could not detect location"}, status=404)
+        return Response(self.get_serializer(location).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def bulk_import(self, request):
+        """
+        Create many locations at once from a JSON list (or `{"locations": [...]}`),
+        a `text/csv` body, or an uploaded `file`. Rows without coordinates are
+        geocoded from their city. Any invalid row rejects the whole import
+        unless `?partial=1` is given.
+        """
+        try:
+            if request.content_type.startswith("text/csv"):
+                rows = parse_rows(request.body.decode("utf-8-sig"), "csv")
+            elif "file" in request.FILES:
+                upload = request.FILES["file"]
+                fmt = "json" if upload.name.lower().endswith(".json") else "csv"
+                rows = parse_rows(upload.read().decode("utf-8-sig"), fmt)
+            else:
+                rows = parse_rows(request.data, "json")
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": f"Could not read import: {e}"}, status=400)
+        if not rows:
+            return Response({"error": "No locations given"}, status=400)
+        if len(rows) > settings.LOCATION_IMPORT_MAX_ROWS:
+            return Response(
+                {"error": f"At most {settings.LOCATION_IMPORT_MAX_ROWS} locations per import"},
+                status=400,
+            )
+
+        partial = request.query_params.get("partial") in ("1", "true")
+        result = import_locations(rows, user=request.user, partial=partial)
+        if result["errors"] and not result["created"]:
+            return Response(result, status=400)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Locations around a point: `?lat=&lon=&radius_km=` for everything
+        within a radius, or `?lat=&lon=&k=` for the k nearest.
+        """
+        try:
+            latitude = float(request.query_params["lat"])
+            longitude = float(request.query_params["lon"])
+            radius_km = request.query_params.get("radius_km")
+            k = int(request.query_params.get("k", 10))
+            if radius_km is not None:
+                radius_km = float(radius_km)
+        except (KeyError, ValueError):
+            return Response({"error": "lat and lon are required; radius_km and k must be numbers"}, status=400)
+        if k <= 0 or (radius_km is not None and radius_km <= 0):
+            return Response({"error": "radius_km and k must be positive"}, status=400)
+
+        queryset = self.get_queryset()
+        if radius_km is not None:
+            locations = queryset.within_radius(latitude, longitude, radius_km)
+        else:
+            locations = queryset.nearest(latitude, longitude, k=min(k, 100))
+
+        data = self.get_serializer(locations, many=True).data
+        for item, location in zip(data, locations):
+            item["distance_km"] = round(location.distance_km, 3)
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Find places by name, e.g. to pick coordinates for a new location.
+        `?q=<name>` runs a cached geocoding lookup; add `&autocomplete=1`
+        for prefix matches from previously seen places. Only the first
+        MAX_QUERY_LENGTH characters of `q` are used.
+        """
+        query = request.query_params.get("q", "").strip()[:MAX_QUERY_LENGTH]
+        if not query:
+            return Response({"error": "Query parameter q is required"}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 100))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+
+        if request.query_params.get("autocomplete") in ("1", "true"):
+            return Response({"results": autocomplete(query, limit=limit)})
+
+        places = geocode(query, count=limit)
+        if places is None:
+            return Response({"error": "Geocoding service unavailable"}, status=503)
+        return Response({"results": places})
+
+    def _conditional_weather_response(self, request, location, data_type, loader):
+        """
+        Serve cached weather with an ETag, answering 304 when the client's
+        If-None-Match still matches the cached content version.
+        """
+        meta = location.get_cache_meta(data_type)
+        client_etags = [
+            etag.removeprefix('W/')
+            for etag in parse_etags(request.headers.get('If-None-Match', ''))
+        ]
+        if meta and ('*' in client_etags or quote_etag(meta['etag']) in client_etags):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(loader())
+            meta = location.get_cache_meta(data_type)
+
+        if meta:
+            response['ETag'] = quote_etag(meta['etag'])
+            max_age = max(0, int(meta['expires_at'] - time.time()))
+            patch_cache_control(response, private=True, max_age=max_age)
+        return response
 
 
 # ----------------------
 # WeatherData API Endpoints
 # ----------------------
-class WeatherDataViewSet(viewsets.ReadOnlyModelViewSet):
+class WeatherDataViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only viewset for historical weather data.
     (Admins or background jobs should populate this table.)
@@ -103,7 +476,7 @@ class WeatherDataViewSet(viewsets.ReadOnlyModelViewSet):
 # ----------------------
 # User Profile API Endpoints
 # ----------------------
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     Manage user profiles (CRUD).
     Stores farm details, preferences, and notification settings.
@@ -111,3 +484,54 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=True, methods=["get"])
+    def layout(self, request, pk=None):
+        """
+        Plan a bed or field for the profile's preferred crops (or `?crops=1,2`).
+        `?width_m=&length_m=` default to a square of the farm size; `cell_cm`,
+        `budget` (seconds) and `seed` tune the search.
+        """
+        profile = self.get_object()
+        params = request.query_params
+        try:
+            crop_ids = [int(crop_id) for crop_id in params.get("crops", "").split(",") if crop_id.strip()]
+            width_m = float(params["width_m"]) if "width_m" in params else None
+            length_m = float(params["length_m"]) if "length_m" in params else None
+            cell_cm = int(params["cell_cm"]) if "cell_cm" in params else None
+            budget = float(params["budget"]) if "budget" in params else None
+            seed = int(params["seed"]) if "seed" in params else None
+        except ValueError:
+            return Response({"error": "crops, width_m, length_m, cell_cm, budget and seed must be numbers"}, status=400)
+
+        if width_m is None or length_m is None:
+            if not profile.farm_size_hectares:
+                return Response({"error": "width_m and length_m are required when the farm size is not set"}, status=400)
+            side = (profile.farm_size_hectares * 10000) ** 0.5
+            width_m = width_m or side
+            length_m = length_m or side
+
+        crops = Crop.objects.filter(pk__in=crop_ids) if crop_ids else profile.preferred_crops.all()
+        crops = list(crops.only("id", "name", "spacing_cm").order_by("name"))
+        try:
+            plan = plan_layout(crops, width_m, length_m, cell_cm=cell_cm, time_budget=budget, seed=seed)
+        except LayoutError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(plan)
+
+    @action(detail=True, methods=["get"])
+    def irrigation(self, request, pk=None):
+        """
+        Next watering dates for the profile's preferred crops, as computed by
+        the last `schedule_irrigation` run. `?before=YYYY-MM-DD` keeps only
+        waterings due by that date.
+        """
+        profile = self.get_object()
+        schedules = profile.irrigation_schedules.select_related("crop")
+        before = request.query_params.get("before")
+        if before:
+            try:
+                schedules = schedules.filter(next_watering__lte=date.fromisoformat(before))
+            except ValueError:
+                return Response({"error": "before must be a date (YYYY-MM-DD)"}, status=400)
+        return Response(IrrigationScheduleSerializer(schedules, many=True).data)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FarmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'farmweather.farm'
+
+    def ready(self):
+        from . import signals  # noqa: F401
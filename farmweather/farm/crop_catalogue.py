@@ -0,0 +1,174 @@
+"""
+Bulk crop catalogue loader.
+
+A catalogue (CSV or JSON) is validated in memory against the Crop field
+definitions, upserted by name with one bulk_create per set of supplied
+columns, and its companion-plant graph is synced with a single bulk insert
+into the M2M through table. A re-import only overwrites the columns it
+supplies: a crop keeps its stored value for any column the file leaves out,
+and new crops take the model default. Re-running a load with the same
+catalogue only refreshes `updated_at`.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Crop
+
+CROP_FIELDS = [
+    field.name for field in Crop._meta.concrete_fields
+    if field.editable and not field.primary_key and field.name not in ('created_at', 'updated_at')
+]
+COMPANION_SEPARATOR = ';'
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def parse_rows(content, fmt):
+    """Rows as dicts from CSV text or a JSON list (or {"crops": [...]})"""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    data = json.loads(content) if isinstance(content, (str, bytes)) else content
+    if isinstance(data, dict):
+        data = data.get('crops', [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of crops")
+    return data
+
+
+def _choice_value(field, raw):
+    """Accept a choice by its stored value or its label, case-insensitively"""
+    wanted = str(raw).strip().casefold()
+    for value, label in field.flatchoices:
+        if wanted in (str(value).casefold(), str(label).casefold()):
+            return value
+    return raw
+
+
+def _companion_names(raw):
+    if raw in (None, ''):
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(COMPANION_SEPARATOR)
+    return [str(name).strip() for name in raw if str(name).strip()]
+
+
+def _clean_row(row):
+    """
+    Validate one row in memory. Returns (values, companion names or None,
+    errors); `values` holds only the columns the row supplies.
+    """
+    values, errors = {}, {}
+    for name in CROP_FIELDS:
+        field = Crop._meta.get_field(name)
+        if name not in row:
+            if not (field.has_default() or field.null or field.blank):
+                errors[name] = 'This field is required.'
+            continue
+        raw = row[name]
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ''):
+            if field.has_default():
+                continue
+            if field.null:
+                values[name] = None
+                continue
+            if not field.blank:
+                errors[name] = 'This field is required.'
+                continue
+            raw = ''
+        if field.get_internal_type() == 'BooleanField' and isinstance(raw, str):
+            raw = raw.lower() in TRUE_VALUES
+        if field.choices:
+            raw = _choice_value(field, raw)
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = ' '.join(e.messages)
+
+    for low, high in (('optimal_temp_min', 'optimal_temp_max'),
+                      ('optimal_rainfall_min', 'optimal_rainfall_max'),
+                      ('soil_ph_min', 'soil_ph_max')):
+        if low in values and high in values and values[low] > values[high]:
+            errors[low] = f'Must not be greater than {high}.'
+
+    # None means "not given", so existing links are left alone
+    companions = _companion_names(row['companion_plants']) if 'companion_plants' in row else None
+    return values, companions, errors
+
+
+def load_crops(rows, partial=False):
+    """
+    Upsert crops by name and sync the companion links of every row that
+    lists companions. Without `partial`, any invalid row aborts the load.
+    Returns {'crops': int, 'companions': int, 'errors': [{'row': n, 'errors': {...}}]}.
+    """
+    errors = []
+    cleaned = {}
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': index, 'errors': {'non_field_errors': 'Expected an object of crop fields.'}})
+            continue
+        values, companions, row_errors = _clean_row(row)
+        if 'name' in values and values['name'] in cleaned:
+            row_errors['name'] = f"Duplicate of row {cleaned[values['name']][0]}."
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+        else:
+            cleaned[values['name']] = (index, values, companions)
+
+    # Companions may be other crops in the file or crops already stored
+    mentioned = {name for _, _, companions in cleaned.values() for name in companions or ()}
+    known = set(cleaned) | set(Crop.objects.filter(name__in=mentioned - set(cleaned)).values_list('name', flat=True))
+    for name, (index, values, companions) in list(cleaned.items()):
+        unknown = [companion for companion in companions or () if companion not in known]
+        if unknown:
+            errors.append({'row': index, 'errors': {'companion_plants': f"Unknown crops: {', '.join(unknown)}"}})
+            del cleaned[name]
+
+    errors.sort(key=lambda error: error['row'])
+    if errors and not partial:
+        return {'crops': 0, 'companions': 0, 'errors': errors}
+
+    # Rows supplying the same columns share one upsert that updates only those columns
+    groups = {}
+    for _, values, _ in cleaned.values():
+        groups.setdefault(frozenset(values), []).append(Crop(**values))
+
+    Through = Crop.companion_plants.through
+    with transaction.atomic():
+        for supplied, crops in groups.items():
+            Crop.objects.bulk_create(
+                crops,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=sorted(supplied - {'name'}) + ['updated_at'],
+            )
+        # Not every backend returns ids from an upsert, so read them back in one query
+        ids = dict(Crop.objects.values_list('name', 'id'))
+
+        synced = [ids[name] for name, (_, _, companions) in cleaned.items() if companions is not None]
+        edges = {
+            (ids[name], ids[companion])
+            for name, (_, _, companions) in cleaned.items()
+            for companion in companions or () if companion != name
+        }
+        existing = {
+            (from_id, to_id): pk
+            for pk, from_id, to_id in Through.objects.filter(from_crop_id__in=synced)
+            .values_list('pk', 'from_crop_id', 'to_crop_id')
+        }
+        stale = [pk for edge, pk in existing.items() if edge not in edges]
+        if stale:
+            Through.objects.filter(pk__in=stale).delete()
+        Through.objects.bulk_create(
+            [Through(from_crop_id=from_id, to_crop_id=to_id) for from_id, to_id in edges - existing.keys()],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    return {'crops': len(cleaned), 'companions': len(edges), 'errors': errors}
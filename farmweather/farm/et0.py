@@ -0,0 +1,121 @@
+"""
+FAO-56 Penman-Monteith reference evapotranspiration (ET0).
+
+Daily ET0 in mm from the temperature range, mean relative humidity, mean
+10 m wind speed and shortwave radiation, with the site's latitude and
+elevation (FAO Irrigation and Drainage Paper 56, chapter 3, eq. 6). Where
+radiation is missing it is estimated from the temperature range (eq. 50),
+and missing wind falls back to the 2 m/s the paper recommends.
+
+`et0_batch` takes whole columns (a forecast, a decade of history, or many
+sites flattened together) and runs as numpy array arithmetic.
+"""
+import math
+from datetime import date
+
+import numpy as np
+
+SOLAR_CONSTANT = 0.0820  # MJ m-2 min-1
+STEFAN_BOLTZMANN = 4.903e-9  # MJ K-4 m-2 day-1
+ALBEDO = 0.23  # grass reference crop
+HARGREAVES_KRS = 0.16  # interior locations (eq. 50)
+DEFAULT_WIND_2M = 2.0  # m/s
+# Converts 10 m wind to 2 m (eq. 47): 4.87 / ln(67.8 * 10 - 5.42)
+WIND_10M_TO_2M = 4.87 / math.log(67.8 * 10 - 5.42)
+
+
+def _et0_numpy(tmax, tmin, rh_mean, wind_10m, radiation, day_of_year, latitude, elevation):
+    tmax, tmin, rh_mean, wind_10m, radiation, day_of_year, latitude, elevation = (
+        # np.array maps None to NaN, so missing values survive the conversion
+        np.array(column, dtype=float)
+        for column in (tmax, tmin, rh_mean, wind_10m, radiation, day_of_year, latitude, elevation)
+    )
+    elevation = np.nan_to_num(elevation)
+    t_mean = (tmax + tmin) / 2
+    pressure = 101.3 * ((293 - 0.0065 * elevation) / 293) ** 5.26
+    gamma = 0.000665 * pressure
+    e_max = 0.6108 * np.exp(17.27 * tmax / (tmax + 237.3))
+    e_min = 0.6108 * np.exp(17.27 * tmin / (tmin + 237.3))
+    delta = 4098 * 0.6108 * np.exp(17.27 * t_mean / (t_mean + 237.3)) / (t_mean + 237.3) ** 2
+    es = (e_max + e_min) / 2
+    ea = es * rh_mean / 100
+
+    phi = np.radians(latitude)
+    angle = 2 * np.pi * day_of_year / 365
+    dr = 1 + 0.033 * np.cos(angle)
+    declination = 0.409 * np.sin(angle - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1.0, 1.0))
+    ra = 24 * 60 / np.pi * SOLAR_CONSTANT * dr * (
+        ws * np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.sin(ws)
+    )
+    estimated = HARGREAVES_KRS * np.sqrt(np.maximum(tmax - tmin, 0.0)) * ra
+    radiation = np.where(np.isnan(radiation), estimated, radiation)
+    rso = (0.75 + 2e-5 * elevation) * ra
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_radiation = np.where(rso > 0, np.minimum(radiation / rso, 1.0), 1.0)
+    rnl = STEFAN_BOLTZMANN * ((tmax + 273.16) ** 4 + (tmin + 273.16) ** 4) / 2 \
+        * (0.34 - 0.14 * np.sqrt(np.maximum(ea, 0.0))) * (1.35 * relative_radiation - 0.35)
+    rn = (1 - ALBEDO) * radiation - rnl
+
+    u2 = np.where(np.isnan(wind_10m), DEFAULT_WIND_2M, wind_10m / 3.6 * WIND_10M_TO_2M)
+    et0 = (0.408 * delta * rn + gamma * 900 / (t_mean + 273) * u2 * (es - ea)) / (delta + gamma * (1 + 0.34 * u2))
+    # NaN temperatures or humidity stay NaN
+    return np.maximum(et0, 0.0)
+
+
+def _column(values, size):
+    """A scalar repeated to `size`, or the sequence itself"""
+    if values is None or isinstance(values, (int, float)):
+        return [values] * size
+    return values
+
+
+def et0_batch(tmax, tmin, rh_mean, wind_10m, radiation, day_of_year, latitude, elevation):
+    """
+    Daily ET0 (mm) for equal-length columns.
+
+    Args:
+        tmax, tmin: Daily max/min temperature (C).
+        rh_mean: Daily mean relative humidity (%).
+        wind_10m: Daily mean 10 m wind speed (km/h); None/NaN for unknown.
+        radiation: Shortwave radiation sum (MJ/m2); None/NaN to estimate.
+        day_of_year: Day number 1-366.
+        latitude, elevation: Per-day columns, or one value for every day.
+
+    Returns:
+        A numpy float array, NaN where temperatures or humidity are missing.
+    """
+    size = len(tmax)
+    columns = [
+        _column(column, size)
+        for column in (tmax, tmin, rh_mean, wind_10m, radiation, day_of_year, latitude, elevation)
+    ]
+    if len({len(column) for column in columns}) > 1:
+        raise ValueError("All ET0 input columns must have the same length")
+    return _et0_numpy(*columns)
+
+
+def add_et0(days, latitude, elevation):
+    """
+    Set `et0_mm` on forecast/history day dicts (as parsed by
+    OpenMeteoService) in one batch call.
+    """
+    if not days:
+        return days
+    if latitude is None:
+        for day in days:
+            day['et0_mm'] = None
+        return days
+    values = et0_batch(
+        [day.get('temperature_max') for day in days],
+        [day.get('temperature_min') for day in days],
+        [day.get('humidity_mean') for day in days],
+        [day.get('wind_speed_mean') for day in days],
+        [day.get('shortwave_radiation_sum') for day in days],
+        [date.fromisoformat(day['date']).timetuple().tm_yday for day in days],
+        latitude,
+        elevation,
+    )
+    for day, value in zip(days, values):
+        day['et0_mm'] = None if math.isnan(value) else round(float(value), 2)
+    return days
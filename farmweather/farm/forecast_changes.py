@@ -0,0 +1,111 @@
+"""
+Forecast change detection.
+
+Every fresh daily forecast is cut to its first FORECAST_CHANGE_DAYS days,
+normalized to the fields named in FORECAST_CHANGE_THRESHOLDS (rounded to one
+decimal) and hashed. The 5-, 7- and 16-day fetches of one location therefore
+hash the same window; fetches shorter than it are not tracked. A repeat of
+the last hash costs nothing further. A new hash is compared day by day with
+the location's baseline, the forecast its current version was issued for:
+only a move of at least the threshold in some field bumps the version and
+adds a ForecastChange to the feed, so recommendations, alerts and schedules
+keyed on the version are recomputed only when the forecast really moved.
+Smaller moves are measured against the same baseline, so slow drift still
+triggers once it adds up.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ForecastChange, ForecastVersion
+from .notifications import enqueue, weather_alert_messages
+
+
+def normalize(forecast):
+    """{date: {field: value rounded to 0.1}} over the watched fields and tracked days"""
+    fields = settings.FORECAST_CHANGE_THRESHOLDS
+    return {
+        day['date']: {
+            field: None if day.get(field) is None else round(float(day[field]), 1)
+            for field in fields
+        }
+        for day in forecast.get('days', [])[:settings.FORECAST_CHANGE_DAYS]
+    }
+
+
+def content_hash(normalized):
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def material_changes(baseline, normalized):
+    """{date: {field: [old, new]}} for moves reaching the thresholds on days both forecasts cover"""
+    changes = {}
+    for day, values in normalized.items():
+        previous = baseline.get(day)
+        if previous is None:
+            continue
+        for field, threshold in settings.FORECAST_CHANGE_THRESHOLDS.items():
+            old, new = previous.get(field), values.get(field)
+            if old == new:
+                continue
+            if old is None or new is None or abs(new - old) >= threshold:
+                changes.setdefault(day, {})[field] = [old, new]
+    return changes
+
+
+def record_forecasts(pairs):
+    """
+    Track freshly fetched forecasts, given as (location, forecast) pairs.
+    One locked query reads the versions; writes happen only for new content.
+    Returns the ids of locations whose version moved.
+    """
+    latest = {
+        location.pk: forecast for location, forecast in pairs
+        if location.pk and forecast and not forecast.get('stale')
+        and len(forecast.get('days') or []) >= settings.FORECAST_CHANGE_DAYS
+    }
+    if not latest:
+        return []
+    now = timezone.now()
+    # Read the versions under the write lock so concurrent refreshes cannot both move N to N+1
+    with transaction.atomic():
+        existing = {
+            version.location_id: version
+            for version in ForecastVersion.objects.select_for_update().filter(location_id__in=latest)
+        }
+
+        created, updated, events = [], [], []
+        for location_id, forecast in latest.items():
+            normalized = normalize(forecast)
+            digest = content_hash(normalized)
+            current = existing.get(location_id)
+            if current is None:
+                created.append(ForecastVersion(
+                    location_id=location_id, content_hash=digest, baseline=normalized, changed_at=now,
+                ))
+                continue
+            if current.content_hash == digest:
+                continue
+
+            current.content_hash = digest
+            changes = material_changes(current.baseline, normalized)
+            if changes:
+                current.version += 1
+                current.baseline = normalized
+                current.changed_at = now
+                events.append(ForecastChange(location_id=location_id, version=current.version, changes=changes))
+            else:
+                # Keep the baseline for days it covers; the window rolls forward, so take up new days
+                current.baseline = {day: current.baseline.get(day, values) for day, values in normalized.items()}
+            updated.append(current)
+
+        ForecastVersion.objects.bulk_create(created, ignore_conflicts=True)
+        ForecastVersion.objects.bulk_update(updated, ['version', 'content_hash', 'baseline', 'changed_at'], batch_size=500)
+        ForecastChange.objects.bulk_create(events, batch_size=500)
+        # Alerts commit or roll back with the change that caused them
+        if events:
+            enqueue(weather_alert_messages(events))
+    return [event.location_id for event in events]
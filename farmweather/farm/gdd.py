@@ -0,0 +1,185 @@
+"""
+Incremental growing degree days (GDD).
+
+A day's GDD is max(0, (low + high) / 2 - base). Each location keeps one
+GDDAccumulator per distinct Crop.gdd_base_temp, rounded to 0.1 C (see
+base_key); crops sharing a base share its total. A reading only ever
+touches the open day's low/high, and the first reading of a later day folds
+the open day into the total, so every new reading costs the same two
+queries however long the season has run.
+
+Live readings older than the open day arrive too late to count and are
+skipped. History from before an accumulator's first day comes in through
+`backfill` instead, which adds the whole range in one guarded UPDATE.
+"""
+import math
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import Crop, GDDAccumulator
+
+BASE_TEMPS_CACHE_KEY = 'gdd:base_temps'
+BASE_TEMPS_CACHE_TTL = 600
+
+
+def daily_gdd(low, high, base):
+    return max(0.0, (low + high) / 2 - base)
+
+
+def base_key(temperature):
+    """A base temperature as stored on and matched against GDDAccumulator"""
+    return round(float(temperature), 1)
+
+
+def base_temperatures():
+    """Distinct crop base temperatures, cached so readings do not query Crop"""
+    return cache.get_or_set(
+        BASE_TEMPS_CACHE_KEY,
+        lambda: sorted({base_key(base) for base in Crop.objects.values_list('gdd_base_temp', flat=True)}),
+        BASE_TEMPS_CACHE_TTL,
+    )
+
+
+def accumulators_by_base(accumulators):
+    """{base_key: accumulator}, for finding a crop's accumulator with `base_key(crop.gdd_base_temp)`"""
+    return {base_key(accumulator.base_temp): accumulator for accumulator in accumulators}
+
+
+def _reading_values(reading):
+    """(location id, local date, low, high) for a WeatherData row"""
+    low = reading.temperature_min if reading.temperature_min is not None else reading.temperature_current
+    high = reading.temperature_max if reading.temperature_max is not None else reading.temperature_current
+    return reading.location_id, reading.recorded_at.astimezone(reading.location.tzinfo).date(), low, high
+
+
+def accumulate(location_id, day, low, high):
+    """Fold one reading (or one whole historical day) into the location's accumulators"""
+    low, high = float(low), float(high)
+    bases = base_temperatures()
+    GDDAccumulator.objects.bulk_create(
+        [
+            GDDAccumulator(location_id=location_id, base_temp=base, started_on=day, day=day, day_min=low, day_max=high)
+            for base in bases
+        ],
+        ignore_conflicts=True,
+    )
+    closes_day = Q(day__lt=day)
+    # Every right-hand side sees the row as it was before the update
+    GDDAccumulator.objects.filter(location_id=location_id, day__lte=day).update(
+        gdd=Case(
+            When(closes_day, then=F('gdd') + Greatest(Value(0.0), (F('day_min') + F('day_max')) / 2 - F('base_temp'))),
+            default=F('gdd'),
+        ),
+        days=Case(When(closes_day, then=F('days') + 1), default=F('days')),
+        day_min=Case(When(closes_day, then=Value(low)), default=Least(F('day_min'), Value(low))),
+        day_max=Case(When(closes_day, then=Value(high)), default=Greatest(F('day_max'), Value(high))),
+        day=Value(day),
+    )
+
+
+def accumulate_readings(readings):
+    """
+    Fold WeatherData rows in, merged first to one low/high per location and
+    local day so a batch costs two queries per location-day.
+    """
+    merged = {}
+    for reading in readings:
+        location_id, day, low, high = _reading_values(reading)
+        key = (location_id, day)
+        if key in merged:
+            low, high = min(low, merged[key][0]), max(high, merged[key][1])
+        merged[key] = (low, high)
+    for (location_id, day), (low, high) in sorted(merged.items(), key=lambda item: item[0][1]):
+        accumulate(location_id, day, low, high)
+
+
+def backfill(location, start, service=None):
+    """
+    Fold daily history from `start` into `location`'s accumulators, up to
+    the day before each one's first day. A base with no accumulator yet
+    gets one covering `start` to yesterday, yesterday left open for the
+    next live reading. Each existing accumulator takes one UPDATE guarded
+    on its `started_on`, so re-running (or racing) a backfill never counts
+    a day twice. Returns the number of accumulators extended or created.
+    """
+    bases = base_temperatures()
+    if not bases:
+        return 0
+    accumulators = accumulators_by_base(location.gdd_accumulators.all())
+    yesterday = timezone.localdate(timezone=location.tzinfo) - timedelta(days=1)
+    ends = [
+        accumulators[base].started_on - timedelta(days=1) if base in accumulators else yesterday
+        for base in bases
+    ]
+    end = max(ends)
+    if end < start:
+        return 0
+
+    from .services import OpenMeteoService
+    history = (service or OpenMeteoService()).get_historical_weather(location.latitude, location.longitude, start, end)
+    if not history:
+        return 0
+    days = [
+        (date.fromisoformat(day['date']), day['temperature_min'], day['temperature_max'])
+        for day in history['days']
+        if day.get('temperature_min') is not None and day.get('temperature_max') is not None
+    ]
+
+    changed = 0
+    created = []
+    for base in bases:
+        accumulator = accumulators.get(base)
+        if accumulator is None:
+            window = [day for day in days if day[0] <= yesterday]
+            if not window:
+                continue
+            *closed, (last, low, high) = window
+            created.append(GDDAccumulator(
+                location_id=location.pk, base_temp=base, started_on=start,
+                gdd=sum(daily_gdd(low, high, base) for _, low, high in closed), days=len(closed),
+                day=last, day_min=low, day_max=high,
+            ))
+            continue
+        window = [day for day in days if day[0] < accumulator.started_on]
+        if not window:
+            continue
+        changed += GDDAccumulator.objects.filter(pk=accumulator.pk, started_on=accumulator.started_on).update(
+            gdd=F('gdd') + sum(daily_gdd(low, high, base) for _, low, high in window),
+            days=F('days') + len(window),
+            started_on=start,
+        )
+    # A live reading may have created one of these meanwhile; that base is picked up on the next run
+    GDDAccumulator.objects.bulk_create(created, ignore_conflicts=True)
+    return changed + len(created)
+
+
+def crop_progress(accumulator, crop):
+    """
+    GDD so far for `crop` (closed days plus the open day) and its projected
+    maturity date: the remaining GDD at the season's average daily rate, or
+    `days_to_maturity` after the start when the crop has no GDD target.
+    """
+    current = accumulator.gdd + daily_gdd(accumulator.day_min, accumulator.day_max, accumulator.base_temp)
+    target = crop.gdd_to_maturity
+    if not target:
+        projected = accumulator.started_on + timedelta(days=crop.days_to_maturity)
+    elif current >= target:
+        projected = accumulator.day
+    else:
+        rate = current / (accumulator.days + 1)
+        projected = accumulator.day + timedelta(days=math.ceil((target - current) / rate)) if rate else None
+    return {
+        'crop': crop.pk,
+        'crop_name': crop.name,
+        'base_temp': accumulator.base_temp,
+        'gdd': round(current, 1),
+        'days': accumulator.days + 1,
+        'started_on': accumulator.started_on,
+        'gdd_to_maturity': target,
+        'progress': round(min(current / target, 1.0), 3) if target else None,
+        'projected_maturity': projected,
+    }
@@ -0,0 +1,100 @@
+"""
+Geohash grid helpers for spatial lookups.
+
+A geohash names a lat/lon grid cell; every extra character subdivides the
+cell, so locations in the same cell share a string prefix and can be found
+with an indexed range query (prefix <= geohash < prefix + '~') instead of a
+full table scan.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=12):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a cell in degrees of latitude and longitude"""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** lon_bits
+
+
+def decode(geohash):
+    """Centre point of the cell named by `geohash`"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def neighbourhood(geohash):
+    """The cell itself and its (up to) eight neighbours"""
+    latitude, longitude = decode(geohash)
+    height, width = cell_size(len(geohash))
+    cells = set()
+    for dlat in (-height, 0, height):
+        lat = latitude + dlat
+        if not -90 <= lat <= 90:
+            continue
+        for dlon in (-width, 0, width):
+            lon = (longitude + dlon + 180) % 360 - 180
+            cells.add(encode(lat, lon, len(geohash)))
+    return cells
+
+
+def min_cell_km(precision, latitude):
+    """Shortest side of a cell at `latitude`, in km"""
+    height, width = cell_size(precision)
+    return min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * math.cos(math.radians(min(abs(latitude), 89.9))))
+
+
+def covering_precision(latitude, radius_km):
+    """
+    Finest precision whose cells are at least `radius_km` across, so the
+    3x3 neighbourhood of the centre cell contains the whole circle.
+    Returns 0 when no grid level is coarse enough.
+    """
+    # Cells are narrowest on the poleward edge of the circle
+    edge = abs(latitude) + radius_km / KM_PER_DEGREE
+    for precision in range(12, 0, -1):
+        if min_cell_km(precision, edge) >= radius_km:
+            return precision
+    return 0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
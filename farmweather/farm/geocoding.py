@@ -0,0 +1,166 @@
+"""
+Cached place-name geocoding.
+
+Lookups are answered from three layers: the Django cache, the persistent
+GeocodingQuery table, and only then the Open-Meteo geocoding API. Every
+place seen in a response is also indexed in GeocodedPlace, which serves
+prefix autocomplete without any upstream call.
+"""
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .instrumentation import submit
+from .models import GeocodedPlace, GeocodingQuery
+from .services import OpenMeteoService
+
+PLACE_FIELDS = [
+    'name', 'latitude', 'longitude', 'elevation', 'timezone',
+    'country', 'country_code', 'admin1', 'population',
+]
+# Keys are stored as "<count>:<key>" in GeocodingQuery.query (200 characters)
+MAX_QUERY_LENGTH = 100
+
+
+def normalize_query(text):
+    """Case-, accent- and whitespace-insensitive key for a place name, at most MAX_QUERY_LENGTH long"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s'-]", ' ', text.casefold())
+    # Decomposition can lengthen the text, so cut the key itself
+    return ' '.join(text.split())[:MAX_QUERY_LENGTH].rstrip()
+
+
+def _cache_key(key, count):
+    return f"geocode:{count}:{key}"
+
+
+def _fresh_since():
+    return timezone.now() - timedelta(days=settings.GEOCODING_CACHE_DAYS)
+
+
+def _store(answers, count):
+    """Persist upstream answers ({key: results}) and index their places"""
+    now = timezone.now()
+    GeocodingQuery.objects.bulk_create(
+        [GeocodingQuery(query=f"{count}:{key}", results=results, created_at=now)
+         for key, results in answers.items()],
+        update_conflicts=True,
+        unique_fields=['query'],
+        update_fields=['results', 'created_at'],
+    )
+
+    # One row per place even when several answers mention it
+    places = {
+        place['id']: GeocodedPlace(
+            external_id=place['id'],
+            search_name=normalize_query(place['name']),
+            **{field: place[field] for field in PLACE_FIELDS},
+        )
+        for results in answers.values() for place in results if place.get('id') is not None
+    }
+    if places:
+        GeocodedPlace.objects.bulk_create(
+            list(places.values()),
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=['search_name', 'updated_at', *PLACE_FIELDS],
+        )
+
+    cache.set_many(
+        {_cache_key(key, count): results for key, results in answers.items()},
+        settings.GEOCODING_MEMORY_TTL,
+    )
+
+
+def geocode(query, count=10):
+    """
+    Places matching `query`, best match first. Returns [] when nothing
+    matches and None only when the upstream lookup failed.
+    """
+    key = normalize_query(query)
+    if not key:
+        return []
+
+    results = cache.get(_cache_key(key, count))
+    if results is not None:
+        return results
+
+    stored = GeocodingQuery.objects.filter(
+        query=f"{count}:{key}", created_at__gte=_fresh_since()
+    ).values_list('results', flat=True).first()
+    if stored is not None:
+        cache.set(_cache_key(key, count), stored, settings.GEOCODING_MEMORY_TTL)
+        return stored
+
+    results = OpenMeteoService().geocode(key, count=count)
+    if results is None:
+        return None
+    _store({key: results}, count)
+    return results
+
+
+def autocomplete(prefix, limit=10):
+    """
+    Places from the local index whose name starts with `prefix`, most
+    populous first. Falls back to a full lookup when the index has nothing.
+    """
+    key = normalize_query(prefix)
+    if not key:
+        return []
+
+    places = list(
+        GeocodedPlace.objects
+        # A range, not LIKE 'key%', so the search_name index is used
+        .filter(search_name__gte=key, search_name__lt=key + '\U0010ffff')
+        .order_by(F('population').desc(nulls_last=True), 'name')
+        .values('external_id', *PLACE_FIELDS)[:limit]
+    )
+    if places:
+        return [{'id': place.pop('external_id'), **place} for place in places]
+    return (geocode(key, count=limit) or [])[:limit]
+
+
+def geocode_many(queries, count=1):
+    """
+    Resolve many place names at once, e.g. for bulk location imports.
+    Cached answers come from one cache multi-get and one table query; the
+    remaining names are looked up upstream concurrently.
+    Returns {query: results or None} for every input query.
+    """
+    keys = {query: normalize_query(query) for query in queries}
+    wanted = {key for key in keys.values() if key}
+    found = {}
+
+    cached = cache.get_many([_cache_key(key, count) for key in wanted])
+    for key in wanted:
+        if _cache_key(key, count) in cached:
+            found[key] = cached[_cache_key(key, count)]
+
+    missing = wanted - found.keys()
+    if missing:
+        rows = GeocodingQuery.objects.filter(
+            query__in=[f"{count}:{key}" for key in missing], created_at__gte=_fresh_since()
+        ).values_list('query', 'results')
+        for query, results in rows:
+            found[query.split(':', 1)[1]] = results
+        missing -= found.keys()
+
+    if missing:
+        service = OpenMeteoService()
+        missing = sorted(missing)
+        with ThreadPoolExecutor(max_workers=settings.GEOCODING_MAX_WORKERS) as pool:
+            futures = [submit(pool, service.geocode, key, count=count) for key in missing]
+            answers = [future.result() for future in futures]
+        fetched = {key: results for key, results in zip(missing, answers) if results is not None}
+        found.update(fetched)
+        if fetched:
+            _store(fetched, count)
+
+    return {query: ([] if not key else found.get(key)) for query, key in keys.items()}
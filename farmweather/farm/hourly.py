@@ -0,0 +1,95 @@
+"""
+Compact hourly forecasts.
+
+A 16-day hourly forecast is 384 steps per variable. Stored as a list of
+per-hour dicts that is thousands of Python objects; here each variable is
+one array('f') (4 bytes per value, NaN for missing) and the timestamps one
+array('q') of unix seconds, so a cached forecast pickles to a few flat
+buffers. Windows are cut by bisecting the timestamps.
+"""
+import math
+from array import array
+from bisect import bisect_left
+
+# API name -> Open-Meteo hourly variable
+HOURLY_SERIES = {
+    'temperature': 'temperature_2m',
+    'humidity': 'relative_humidity_2m',
+    'precipitation': 'precipitation',
+    'precipitation_probability': 'precipitation_probability',
+    'wind_speed': 'wind_speed_10m',
+    'wind_gusts': 'wind_gusts_10m',
+    'wind_direction': 'wind_direction_10m',
+    'soil_temperature_0cm': 'soil_temperature_0cm',
+    'soil_temperature_6cm': 'soil_temperature_6cm',
+}
+
+
+def _float_array(values):
+    return array('f', (math.nan if value is None else value for value in values))
+
+
+class HourlyForecast:
+    """Hourly series for one location, column-oriented"""
+    __slots__ = ('timezone', 'utc_offset_seconds', 'elevation', 'times', 'series', 'stale_since')
+
+    def __init__(self, timezone, utc_offset_seconds, elevation, times, series, stale_since=None):
+        self.timezone = timezone
+        self.utc_offset_seconds = utc_offset_seconds
+        self.elevation = elevation
+        self.times = times
+        self.series = series
+        self.stale_since = stale_since
+
+    @classmethod
+    def from_response(cls, data):
+        """Build from an Open-Meteo block requested with timeformat=unixtime"""
+        hourly = data.get('hourly', {})
+        times = array('q', hourly.get('time', []))
+        return cls(
+            timezone=data.get('timezone'),
+            utc_offset_seconds=data.get('utc_offset_seconds', 0),
+            elevation=data.get('elevation'),
+            times=times,
+            series={
+                name: _float_array(hourly.get(variable, [None] * len(times)))
+                for name, variable in HOURLY_SERIES.items()
+            },
+        )
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            setattr(self, name, state.get(name))
+
+    def __len__(self):
+        return len(self.times)
+
+    def as_stale(self, since):
+        """Copy flagged as served from the last known good payload"""
+        return HourlyForecast(self.timezone, self.utc_offset_seconds, self.elevation, self.times, self.series, since)
+
+    def window(self, start=None, end=None, names=None):
+        """
+        Steps with start <= time < end (unix seconds; None leaves that side
+        open) for the `names` series (default: all), as JSON-ready lists.
+        """
+        first = 0 if start is None else bisect_left(self.times, start)
+        last = len(self.times) if end is None else bisect_left(self.times, end)
+        result = {
+            'timezone': self.timezone,
+            'utc_offset_seconds': self.utc_offset_seconds,
+            'elevation': self.elevation,
+            'time': self.times[first:last].tolist(),
+        }
+        for name in names or self.series:
+            result[name] = [
+                None if math.isnan(value) else round(value, 2)
+                for value in self.series[name][first:last]
+            ]
+        if self.stale_since:
+            result['stale'] = True
+            result['stale_since'] = self.stale_since
+        return result
@@ -0,0 +1,197 @@
+"""
+Request-level performance instrumentation.
+
+Code paths time themselves with `timed('<phase>')`. While a request is
+being served, ServerTimingMiddleware collects those phases and reports them
+in a `Server-Timing` header and a structured log line. Every observation is
+also folded into in-process histograms that `metrics_view` serves in
+Prometheus text format. Work handed to a thread pool must go through
+`submit`, which carries the request's timings into the worker thread.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of histograms keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """Render all histograms in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                prefix = f"{label_text}," if label_text else ""
+                suffix = f"{{{label_text}}}" if label_text else ""
+                for bound, value in zip(BUCKETS, histogram.buckets):
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {value}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{suffix} {histogram.sum}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RequestTimings:
+    """Accumulated duration and call count per phase for one request"""
+
+    def __init__(self):
+        self.phases = {}
+        # Pool threads started with `submit` add to the same request
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            total, calls = self.phases.get(phase, (0.0, 0))
+            self.phases[phase] = (total + seconds, calls + 1)
+
+    def server_timing(self, total):
+        entries = [
+            f'{phase};dur={seconds * 1000:.1f};desc="{calls}x"'
+            for phase, (seconds, calls) in self.phases.items()
+        ]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class Phase:
+    """Handle yielded by `timed`; the phase may be renamed once its outcome is known"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+def record(phase, seconds):
+    """Attribute `seconds` to `phase` for the current request and the histograms"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+    REGISTRY.observe('farmweather_phase_duration_seconds', seconds, phase=phase)
+
+
+def submit(pool, fn, *args, **kwargs):
+    """
+    `pool.submit(fn, ...)` in a copy of the caller's context, so phases
+    timed in the worker thread still count towards the current request
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@contextmanager
+def timed(phase):
+    handle = Phase(phase)
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        record(handle.name, time.perf_counter() - start)
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+class ServerTimingMiddleware:
+    """Time every request and report its phases"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_time_query):
+                response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        total = time.perf_counter() - start
+
+        REGISTRY.observe(
+            'farmweather_request_duration_seconds', total,
+            method=request.method, status=response.status_code,
+        )
+        response['Server-Timing'] = timings.server_timing(total)
+        logger.info("request_timing %s", json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'phases': {
+                phase: {'ms': round(seconds * 1000, 1), 'calls': calls}
+                for phase, (seconds, calls) in timings.phases.items()
+            },
+        }))
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its work as the `serialize` phase"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, limited to METRICS_ALLOWED_IPS and staff users"""
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not allowed and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,165 @@
+"""
+IP-based location detection from a local range table.
+
+IP_LOCATION_TABLE points at a CSV with the columns
+    start_ip,end_ip,latitude,longitude,city,country,country_code,timezone
+where start_ip/end_ip are addresses or integers. Ranges are loaded once
+into sorted integer arrays and searched with bisect; answers are cached
+per subnet (/24 for IPv4, /48 for IPv6) so neighbouring clients share one
+lookup. No live service is ever called.
+"""
+import bisect
+import csv
+import ipaddress
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Location, UserProfile
+
+logger = logging.getLogger(__name__)
+
+SUBNET_PREFIX = {4: 24, 6: 48}
+DETECTED_NAME = 'Detected location'
+
+
+def _to_int(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else int(ipaddress.ip_address(value))
+
+
+class IPRangeTable:
+    """Non-overlapping IP ranges searchable by binary search"""
+
+    def __init__(self, rows):
+        # IPv4 and IPv6 live in separate integer spaces
+        self._tables = {}
+        for version in (4, 6):
+            ranges = sorted(
+                (start, end, record) for version_, start, end, record in rows if version_ == version
+            )
+            self._tables[version] = (
+                [start for start, _, _ in ranges],
+                [end for _, end, _ in ranges],
+                [record for _, _, record in ranges],
+            )
+
+    @classmethod
+    def from_csv(cls, path):
+        rows = []
+        with open(path, newline='', encoding='utf-8') as fh:
+            for row in csv.DictReader(fh):
+                start = row['start_ip'].strip()
+                version = 6 if ':' in start or _to_int(start) > 2 ** 32 - 1 else 4
+                rows.append((version, _to_int(start), _to_int(row['end_ip']), {
+                    'latitude': float(row['latitude']),
+                    'longitude': float(row['longitude']),
+                    'city': row.get('city', ''),
+                    'country': row.get('country', ''),
+                    'country_code': row.get('country_code', ''),
+                    'timezone': row.get('timezone') or 'UTC',
+                }))
+        return cls(rows)
+
+    def __len__(self):
+        return sum(len(starts) for starts, _, _ in self._tables.values())
+
+    def lookup(self, ip):
+        address = ipaddress.ip_address(ip)
+        starts, ends, records = self._tables[address.version]
+        value = int(address)
+        index = bisect.bisect_right(starts, value) - 1
+        if index >= 0 and value <= ends[index]:
+            return records[index]
+        return None
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """The process-wide table, loaded on first use (empty if the file is unusable)"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                try:
+                    _table = IPRangeTable.from_csv(settings.IP_LOCATION_TABLE)
+                    logger.info(f"Loaded {len(_table)} IP ranges from {settings.IP_LOCATION_TABLE}")
+                except (OSError, KeyError, ValueError) as e:
+                    logger.error(f"IP location table unavailable: {e}")
+                    _table = IPRangeTable([])
+    return _table
+
+
+def get_client_ip(request):
+    """Public client address, honouring X-Forwarded-For only when configured to"""
+    ip = request.META.get('REMOTE_ADDR')
+    if settings.IP_LOCATION_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            ip = forwarded.split(',')[0].strip()
+    try:
+        address = ipaddress.ip_address(ip)
+    except (TypeError, ValueError):
+        return None
+    return str(address) if address.is_global else None
+
+
+def detect_location(ip):
+    """Coordinates, place and timezone for `ip`, or None when unknown"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except (TypeError, ValueError):
+        return None
+
+    subnet = ipaddress.ip_network(f"{address}/{SUBNET_PREFIX[address.version]}", strict=False)
+    cache_key = f"iplocation:{subnet}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached or None
+
+    record = get_table().lookup(address)
+    # Unknown subnets are cached too, as an empty dict
+    cache.set(cache_key, record or {}, settings.IP_LOCATION_CACHE_TTL)
+    return record
+
+
+@transaction.atomic
+def _free_name(user, name):
+    """`name`, or `name (2)`, `name (3)`, ... when the user already has a location called that"""
+    taken = set(Location.objects.filter(user=user, name__startswith=name).values_list('name', flat=True))
+    candidate, number = name, 1
+    while candidate in taken:
+        number += 1
+        candidate = f"{name} ({number})"
+    return candidate
+
+
+def create_detected_location(user, ip):
+    """
+    Create or refresh the user's automatically detected Location.
+    It becomes the primary location when the user has none yet.
+    Returns None when the address cannot be located.
+    """
+    record = detect_location(ip)
+    if not record:
+        return None
+
+    has_primary = Location.objects.filter(user=user, is_primary=True, detected_automatically=False).exists()
+    # Keyed on the flag, so a manual location that happens to share the name is never touched
+    location, _ = Location.objects.update_or_create(
+        user=user,
+        detected_automatically=True,
+        defaults={**record, 'is_primary': not has_primary, 'ip_address': ip},
+        create_defaults={
+            **record, 'is_primary': not has_primary, 'ip_address': ip, 'name': _free_name(user, DETECTED_NAME),
+        },
+    )
+    if location.is_primary:
+        UserProfile.objects.filter(user=user, primary_location__isnull=True).update(primary_location=location)
+    return location
@@ -0,0 +1,184 @@
+"""
+Forecast-aware irrigation scheduling.
+
+Each preferred crop is watered every `water_frequency_days`, with one
+watering sized to carry it through that interval at a daily need set by its
+`drought_tolerance`. Expected rain from the cached forecast (the day's
+precipitation_sum weighted by its precipitation_probability) refills the
+root zone up to that size, pushing the next watering back.
+
+The app does not know when a crop was last watered, so every simulation
+starts from a full watering on the first forecast day (today): a schedule
+says when the crop next needs water if it is watered today.
+
+`schedule_all` runs one refresh cycle for every profile with a primary
+location: profiles are processed in chunks, forecasts come from one bulk
+cache read per chunk, each (forecast, crop) pair is simulated once however
+many users share it, and the results are upserted into IrrigationSchedule.
+The scheduler never calls upstream; a location whose forecast is not cached
+is scheduled as a dry week and counted in `without_forecast`. Schedules
+computed from the location's current ForecastVersion are kept as they are
+until their watering date comes round or the crop is edited.
+"""
+import json
+import logging
+import math
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Crop, ForecastVersion, IrrigationSchedule, Location, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Daily water need (mm) by Crop.drought_tolerance
+DAILY_WATER_NEED_MM = {
+    'low': 6.0,
+    'medium': 4.0,
+    'high': 2.5,
+}
+# Expected rain below this (mm/day) wets the leaves, not the roots
+MIN_EFFECTIVE_RAIN_MM = 1.0
+FORECAST_DAYS = 7
+
+
+def expected_rain(day):
+    """Forecast day's rain weighted by its probability (a missing probability counts as certain)"""
+    rain = day.get('precipitation_sum') or 0
+    probability = day.get('precipitation_probability')
+    if probability is not None:
+        rain *= probability / 100
+    return rain if rain >= MIN_EFFECTIVE_RAIN_MM else 0
+
+
+def next_watering(start, interval_days, daily_need, rain_by_day):
+    """
+    Simulate the root zone from a full watering on `start`, the date
+    `rain_by_day` begins.
+
+    Returns (next watering date, water per watering in mm, rain credited
+    in mm). Days past the end of `rain_by_day` are assumed dry.
+    """
+    interval_days = max(interval_days, 1)
+    capacity = interval_days * daily_need
+    stored = capacity
+    credited = 0.0
+    for offset, rain in enumerate(rain_by_day):
+        absorbed = min(rain, capacity - stored)
+        stored += absorbed
+        credited += absorbed
+        stored -= daily_need
+        if stored <= 1e-9:
+            return start + timedelta(days=offset + 1), capacity, credited
+    remaining = math.ceil(stored / daily_need - 1e-9)
+    return start + timedelta(days=len(rain_by_day) + remaining), capacity, credited
+
+
+def _forecast_rain(forecast):
+    """(first forecast date, [expected rain per day]) or None without usable data"""
+    if not forecast or not forecast.get('days'):
+        return None
+    days = forecast['days']
+    return date.fromisoformat(days[0]['date']), [expected_rain(day) for day in days]
+
+
+def schedule_all(chunk_size=None):
+    """
+    Recompute every profile's schedule. Returns counts for the cycle:
+    {'profiles', 'schedules', 'unchanged', 'simulations', 'without_forecast', 'removed'}.
+    """
+    chunk_size = chunk_size or settings.IRRIGATION_CHUNK_SIZE
+    cycle_start = timezone.now()
+    today = timezone.localdate()
+    crops = {
+        crop.pk: crop
+        for crop in Crop.objects.only('id', 'water_frequency_days', 'drought_tolerance', 'updated_at')
+    }
+    Preferred = UserProfile.preferred_crops.through
+    profiles = list(
+        UserProfile.objects.filter(primary_location__isnull=False)
+        .order_by('pk').values_list('pk', 'primary_location_id')
+    )
+    totals = {'profiles': len(profiles), 'schedules': 0, 'unchanged': 0, 'simulations': 0, 'without_forecast': 0}
+    simulated = {}
+
+    for start in range(0, len(profiles), chunk_size):
+        chunk = dict(profiles[start:start + chunk_size])
+        locations = Location.objects.filter(pk__in=set(chunk.values())).only('id', 'latitude', 'longitude')
+        # Locations at the same coordinates share one forecast, and so one simulation per crop
+        forecast_keys = {location.pk: location.get_cache_key(f'forecast_{FORECAST_DAYS}') for location in locations}
+        cached = cache.get_many(set(forecast_keys.values()))
+        rain = {
+            location_id: _forecast_rain(json.loads(cached[key])) if key in cached else None
+            for location_id, key in forecast_keys.items()
+        }
+
+        versions = dict(
+            ForecastVersion.objects.filter(location_id__in=rain).values_list('location_id', 'version')
+        )
+        previous = {
+            (profile_id, crop_id): (pk, location_id, version, watering, computed_at)
+            for pk, profile_id, crop_id, location_id, version, watering, computed_at
+            in IrrigationSchedule.objects.filter(profile_id__in=chunk).values_list(
+                'pk', 'profile_id', 'crop_id', 'location_id', 'forecast_version', 'next_watering', 'computed_at',
+            )
+        }
+
+        rows, unchanged = [], []
+        pairs = Preferred.objects.filter(userprofile_id__in=chunk).values_list('userprofile_id', 'crop_id')
+        for profile_id, crop_id in pairs:
+            location_id = chunk[profile_id]
+            crop = crops[crop_id]
+            forecast = rain.get(location_id)
+            version = versions.get(location_id) if forecast else None
+            last = previous.get((profile_id, crop_id))
+            if (last and version is not None and last[1:3] == (location_id, version)
+                    and last[3] > today and crop.updated_at < last[4]):
+                unchanged.append(last[0])
+                continue
+            key = (forecast_keys.get(location_id) if forecast else None, crop_id)
+            if key not in simulated:
+                first_day, rain_by_day = forecast or (today, [])
+                simulated[key] = next_watering(
+                    first_day,
+                    crop.water_frequency_days,
+                    DAILY_WATER_NEED_MM.get(crop.drought_tolerance, DAILY_WATER_NEED_MM['medium']),
+                    rain_by_day,
+                )
+            watering, need, credited = simulated[key]
+            if forecast is None:
+                totals['without_forecast'] += 1
+            rows.append(IrrigationSchedule(
+                profile_id=profile_id,
+                crop_id=crop_id,
+                location_id=location_id,
+                next_watering=watering,
+                water_need_mm=round(need, 1),
+                rain_credit_mm=round(credited, 1),
+                used_forecast=forecast is not None,
+                forecast_version=version,
+                computed_at=cycle_start,
+            ))
+
+        IrrigationSchedule.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['profile', 'crop'],
+            update_fields=[
+                'location', 'next_watering', 'water_need_mm', 'rain_credit_mm', 'used_forecast',
+                'forecast_version', 'computed_at',
+            ],
+        )
+        # Still current: only mark them as seen this cycle
+        IrrigationSchedule.objects.filter(pk__in=unchanged).update(computed_at=cycle_start)
+        totals['schedules'] += len(rows)
+        totals['unchanged'] += len(unchanged)
+        logger.info(f"Irrigation: scheduled {start + len(chunk)}/{len(profiles)} profiles")
+
+    # Crops no longer preferred and profiles without a location
+    totals['removed'], _ = IrrigationSchedule.objects.filter(computed_at__lt=cycle_start).delete()
+    totals['simulations'] = len(simulated)
+    return totals
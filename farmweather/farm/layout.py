@@ -0,0 +1,254 @@
+"""
+Bed and field layout planning.
+
+A bed (or a whole field) is divided into a grid of square cells, each
+planted with one crop. Cells are sized so that every crop fits at least one
+plant at its `spacing_cm`. The plan maximizes companion adjacency and
+avoids incompatible neighbours, scored with a crop-by-crop matrix built once
+per request:
+
+1. a greedy pass fills the grid row by row, picking for every cell the crop
+   that scores best against the neighbours already placed;
+2. a swap local search then exchanges pairs of cells while that improves
+   (or keeps) the score, until the time budget runs out or no improving
+   swap has been found for a while.
+
+The search only ever keeps moves that do not lower the score, so the grid
+in hand when the budget expires is the best one found.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+
+from .models import Crop
+
+COMPANION_SCORE = 1
+INCOMPATIBLE_PENALTY = -4
+
+# Well-known antagonistic neighbours, by normalized crop name (see _crop_key)
+INCOMPATIBLE_PAIRS = {
+    frozenset(pair) for pair in [
+        ('bean', 'onion'),
+        ('bean', 'garlic'),
+        ('pea', 'onion'),
+        ('pea', 'garlic'),
+        ('tomato', 'potato'),
+        ('tomato', 'fennel'),
+        ('tomato', 'maize'),
+        ('potato', 'sunflower'),
+        ('potato', 'cucumber'),
+        ('cabbage', 'strawberry'),
+        ('cabbage', 'tomato'),
+        ('carrot', 'dill'),
+        ('sorghum', 'soybean'),
+    ]
+}
+
+# Give up on the swap search after this many tries per cell without a gain
+STALL_TRIES_PER_CELL = 20
+
+
+class LayoutError(ValueError):
+    """The requested bed cannot be planned"""
+
+
+def _crop_key(name):
+    """Lower-case singular form used to match INCOMPATIBLE_PAIRS ("Tomatoes" -> "tomato")"""
+    key = name.strip().lower()
+    if key.endswith('oes'):
+        return key[:-2]
+    if key.endswith('s') and not key.endswith('ss'):
+        return key[:-1]
+    return key
+
+
+def build_score_matrix(crops, companion_ids):
+    """
+    Symmetric k x k neighbour scores for `crops`. `companion_ids` maps a crop
+    id to the ids it lists as companions; a link in either direction counts.
+    """
+    keys = [_crop_key(crop.name) for crop in crops]
+    matrix = [[0] * len(crops) for _ in crops]
+    for i, a in enumerate(crops):
+        for j, b in enumerate(crops):
+            if i == j:
+                continue
+            if frozenset((keys[i], keys[j])) in INCOMPATIBLE_PAIRS:
+                matrix[i][j] = INCOMPATIBLE_PENALTY
+            elif b.pk in companion_ids.get(a.pk, ()) or a.pk in companion_ids.get(b.pk, ()):
+                matrix[i][j] = COMPANION_SCORE
+    return matrix
+
+
+def companion_map(crops):
+    """{crop id: {companion ids}} restricted to `crops`, in one through-table query"""
+    ids = [crop.pk for crop in crops]
+    links = {}
+    rows = Crop.companion_plants.through.objects.filter(from_crop_id__in=ids, to_crop_id__in=ids)
+    for from_id, to_id in rows.values_list('from_crop_id', 'to_crop_id'):
+        links.setdefault(from_id, set()).add(to_id)
+    return links
+
+
+def _quotas(cells, k):
+    """Split `cells` as evenly as possible between k crops"""
+    base, extra = divmod(cells, k)
+    return [base + (1 if i < extra else 0) for i in range(k)]
+
+
+def greedy_fill(rows, cols, matrix, quotas):
+    """Row-major fill choosing the best-scoring crop against the left and upper neighbours"""
+    k = len(matrix)
+    remaining = list(quotas)
+    grid = [0] * (rows * cols)
+    for cell in range(rows * cols):
+        r, c = divmod(cell, cols)
+        left = grid[cell - 1] if c else None
+        up = grid[cell - cols] if r else None
+        best, best_key = None, None
+        for crop in range(k):
+            if not remaining[crop]:
+                continue
+            score = (matrix[crop][left] if left is not None else 0) + (matrix[crop][up] if up is not None else 0)
+            # Ties go to the crop with the most cells left so quotas drain evenly
+            key = (score, remaining[crop])
+            if best_key is None or key > best_key:
+                best, best_key = crop, key
+        grid[cell] = best
+        remaining[best] -= 1
+    return grid
+
+
+def grid_score(grid, rows, cols, matrix):
+    """(total score, companion adjacencies, incompatible adjacencies) over 4-neighbour pairs"""
+    total = companions = incompatible = 0
+    for cell, crop in enumerate(grid):
+        r, c = divmod(cell, cols)
+        for neighbour in ((cell + 1) if c + 1 < cols else None, (cell + cols) if r + 1 < rows else None):
+            if neighbour is None:
+                continue
+            score = matrix[crop][grid[neighbour]]
+            total += score
+            if score > 0:
+                companions += 1
+            elif score < 0:
+                incompatible += 1
+    return total, companions, incompatible
+
+
+def improve(grid, rows, cols, matrix, deadline, seed=None):
+    """
+    Swap local search in place until `deadline` (a perf_counter value) or
+    until it stalls. Returns (iterations, accepted swaps).
+    """
+    size = rows * cols
+    if size < 2:
+        return 0, 0
+    rng = random.Random(seed)
+    randrange = rng.randrange
+    clock = time.perf_counter
+    stall_limit = STALL_TRIES_PER_CELL * size
+
+    def neighbours(cell):
+        r, c = divmod(cell, cols)
+        if c:
+            yield cell - 1
+        if c + 1 < cols:
+            yield cell + 1
+        if r:
+            yield cell - cols
+        if r + 1 < rows:
+            yield cell + cols
+
+    iterations = accepted = stalled = 0
+    while stalled < stall_limit:
+        iterations += 1
+        if not iterations & 1023 and clock() >= deadline:
+            break
+        p, q = randrange(size), randrange(size)
+        a, b = grid[p], grid[q]
+        if a == b:
+            stalled += 1
+            continue
+        # A p-q edge scores matrix[a][b] before and after, so it is skipped
+        row_a, row_b = matrix[a], matrix[b]
+        delta = 0
+        for n in neighbours(p):
+            if n != q:
+                delta += row_b[grid[n]] - row_a[grid[n]]
+        for n in neighbours(q):
+            if n != p:
+                delta += row_a[grid[n]] - row_b[grid[n]]
+        if delta >= 0:
+            grid[p], grid[q] = b, a
+            accepted += 1
+        stalled = 0 if delta > 0 else stalled + 1
+    return iterations, accepted
+
+
+def plan_layout(crops, width_m, length_m, companion_ids=None, cell_cm=None, time_budget=None, seed=None):
+    """
+    Plan a width_m x length_m bed for `crops`.
+
+    `cell_cm` defaults to the widest crop spacing, grown as needed to keep
+    the grid within LAYOUT_MAX_CELLS. Returns a dict with the grid (rows of
+    indexes into `crops`), per-crop cell and plant counts and the score.
+    """
+    crops = list(crops)
+    if not crops:
+        raise LayoutError("No crops to plan")
+    if not all(math.isfinite(value) and value > 0 for value in (width_m, length_m)):
+        raise LayoutError("Bed dimensions must be positive numbers")
+    if cell_cm is not None and cell_cm <= 0:
+        raise LayoutError("cell_cm must be positive")
+    if time_budget is not None and not (math.isfinite(time_budget) and time_budget > 0):
+        raise LayoutError("The time budget must be a positive number of seconds")
+    max_cells = settings.LAYOUT_MAX_CELLS
+    widest = max(crop.spacing_cm for crop in crops)
+    if cell_cm is None:
+        cell_cm = max(widest, math.ceil(math.sqrt(width_m * length_m * 10000 / max_cells)))
+    elif cell_cm < widest:
+        raise LayoutError(f"cell_cm must be at least the widest crop spacing ({widest} cm)")
+
+    cols, rows = int(width_m * 100 // cell_cm), int(length_m * 100 // cell_cm)
+    if not rows or not cols:
+        raise LayoutError(f"Bed is smaller than one {cell_cm} cm cell")
+    if rows * cols > max_cells:
+        raise LayoutError(f"{rows * cols} cells exceeds the limit of {max_cells}; use a larger cell_cm")
+
+    start = time.perf_counter()
+    if companion_ids is None:
+        companion_ids = companion_map(crops)
+    budget = settings.LAYOUT_TIME_BUDGET if time_budget is None else min(time_budget, settings.LAYOUT_TIME_BUDGET)
+    matrix = build_score_matrix(crops, companion_ids)
+    quotas = _quotas(rows * cols, len(crops))
+    grid = greedy_fill(rows, cols, matrix, quotas)
+    greedy_score = grid_score(grid, rows, cols, matrix)[0]
+    iterations, swaps = improve(grid, rows, cols, matrix, start + budget, seed=seed)
+    score, companions, incompatible = grid_score(grid, rows, cols, matrix)
+
+    return {
+        'rows': rows,
+        'cols': cols,
+        'cell_cm': cell_cm,
+        'crops': [
+            {
+                'id': crop.pk,
+                'name': crop.name,
+                'spacing_cm': crop.spacing_cm,
+                'cells': quotas[i],
+                'plants': quotas[i] * (cell_cm // max(crop.spacing_cm, 1)) ** 2,
+            }
+            for i, crop in enumerate(crops)
+        ],
+        'grid': [grid[r * cols:(r + 1) * cols] for r in range(rows)],
+        'score': score,
+        'greedy_score': greedy_score,
+        'companion_adjacencies': companions,
+        'incompatible_adjacencies': incompatible,
+        'iterations': iterations,
+        'swaps': swaps,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
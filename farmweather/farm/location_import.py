@@ -0,0 +1,158 @@
+"""
+Bulk location import.
+
+Rows (from CSV or JSON) are validated in memory against the Location field
+definitions, checked for name clashes with one query, geocoded in a batch
+where coordinates are missing, and inserted with bulk_create. Primary
+flags are resolved up front: at most one new primary per user, and the old
+primaries of all affected users are cleared in a single UPDATE.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import geo
+from .geocoding import geocode_many
+from .models import Location
+
+IMPORT_FIELDS = [
+    'name', 'latitude', 'longitude', 'city', 'country',
+    'country_code', 'timezone', 'elevation', 'is_primary',
+]
+REQUIRED_FIELDS = ['name', 'city', 'country']
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def parse_rows(content, fmt):
+    """Rows as dicts from CSV text or a JSON list (or {"locations": [...]})"""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    data = json.loads(content) if isinstance(content, (str, bytes)) else content
+    if isinstance(data, dict):
+        data = data.get('locations', [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of locations")
+    return data
+
+
+def _clean_row(row):
+    """Validate one row in memory. Returns (values, errors)."""
+    values, errors = {}, {}
+    for field_name in IMPORT_FIELDS:
+        raw = row.get(field_name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ''):
+            if field_name in REQUIRED_FIELDS:
+                errors[field_name] = 'This field is required.'
+            continue
+        if field_name == 'is_primary' and isinstance(raw, str):
+            raw = raw.lower() in TRUE_VALUES
+        try:
+            values[field_name] = Location._meta.get_field(field_name).clean(raw, None)
+        except ValidationError as e:
+            errors[field_name] = ' '.join(e.messages)
+
+    if 'latitude' in values and not -90 <= values['latitude'] <= 90:
+        errors['latitude'] = 'Must be between -90 and 90.'
+    if 'longitude' in values and not -180 <= values['longitude'] <= 180:
+        errors['longitude'] = 'Must be between -180 and 180.'
+    if ('latitude' in values) != ('longitude' in values):
+        errors['latitude'] = 'Give both latitude and longitude, or neither to geocode the city.'
+    return values, errors
+
+
+def import_locations(rows, user=None, partial=False, geocode_missing=True):
+    """
+    Import `rows` for `user`, or for each row's `username` when no user is
+    given. Without `partial`, any invalid row aborts the whole import.
+    Returns {'created': int, 'errors': [{'row': n, 'errors': {...}}]}.
+    """
+    errors = []
+    cleaned = []
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': index, 'errors': {'non_field_errors': 'Expected an object of location fields.'}})
+            continue
+        values, row_errors = _clean_row(row)
+        if user is None and not str(row.get('username') or '').strip():
+            row_errors['username'] = 'This field is required.'
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+        else:
+            cleaned.append((index, user.username if user else str(row['username']).strip(), values))
+
+    # Users and existing names in one query each
+    usernames = {username for _, username, _ in cleaned}
+    users = {user.username: user} if user else User.objects.in_bulk(usernames, field_name='username')
+    existing = set(
+        Location.objects.filter(user__in=users.values(), name__in={v['name'] for _, _, v in cleaned})
+        .values_list('user__username', 'name')
+    )
+
+    seen = set()
+    accepted = []
+    for index, username, values in cleaned:
+        key = (username, values['name'])
+        if username not in users:
+            errors.append({'row': index, 'errors': {'username': f"Unknown user '{username}'."}})
+        elif key in existing or key in seen:
+            errors.append({'row': index, 'errors': {'name': 'A location with this name already exists.'}})
+        else:
+            seen.add(key)
+            accepted.append((index, username, values))
+
+    # Geocode every distinct city that is missing coordinates in one batch
+    to_geocode = [values for _, _, values in accepted if 'latitude' not in values]
+    if to_geocode and geocode_missing:
+        answers = geocode_many({v['city'] for v in to_geocode}, count=1)
+        for index, username, values in list(accepted):
+            if 'latitude' in values:
+                continue
+            places = answers.get(values['city'])
+            if not places:
+                message = 'Geocoding is unavailable.' if places is None else 'Could not geocode this city.'
+                errors.append({'row': index, 'errors': {'city': message}})
+                accepted.remove((index, username, values))
+                continue
+            place = places[0]
+            values['latitude'], values['longitude'] = place['latitude'], place['longitude']
+            for field_name in ('timezone', 'elevation', 'country_code'):
+                if not values.get(field_name) and place.get(field_name):
+                    values[field_name] = place[field_name]
+    elif to_geocode:
+        for index, username, values in list(accepted):
+            if 'latitude' not in values:
+                errors.append({'row': index, 'errors': {'latitude': 'Coordinates are required.'}})
+                accepted.remove((index, username, values))
+
+    if errors and not partial:
+        return {'created': 0, 'errors': sorted(errors, key=lambda e: e['row'])}
+
+    # The last row flagged primary wins for each user
+    primary_rows = {}
+    for index, username, values in accepted:
+        if values.get('is_primary'):
+            primary_rows[username] = index
+
+    locations = []
+    for index, username, values in accepted:
+        values['is_primary'] = primary_rows.get(username) == index
+        locations.append(Location(
+            user=users[username],
+            geohash=geo.encode(values['latitude'], values['longitude']),
+            **values,
+        ))
+
+    with transaction.atomic():
+        if primary_rows:
+            Location.objects.filter(
+                user__in=[users[username] for username in primary_rows], is_primary=True
+            ).update(is_primary=False)
+        Location.objects.bulk_create(locations, batch_size=500)
+
+    return {'created': len(locations), 'errors': sorted(errors, key=lambda e: e['row'])}
@@ -0,0 +1,41 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from farmweather.farm.gdd import backfill
+from farmweather.farm.models import Location
+from farmweather.farm.services import OpenMeteoService
+
+
+class Command(BaseCommand):
+    help = "Fold historical daily weather into the growing degree day accumulators"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to count, YYYY-MM-DD (default: --days ago)')
+        parser.add_argument('--days', type=int, default=90, help='Days of history when --since is not given')
+        parser.add_argument('--location', type=int, action='append', dest='locations',
+                            help='Only this location id (repeatable; default: every location)')
+
+    def handle(self, *args, **options):
+        if options['since']:
+            try:
+                start = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f"Invalid date '{options['since']}', expected YYYY-MM-DD")
+        else:
+            start = timezone.localdate() - timedelta(days=options['days'])
+
+        locations = Location.objects.order_by('pk')
+        if options['locations']:
+            locations = locations.filter(pk__in=options['locations'])
+
+        service = OpenMeteoService()
+        started = time.perf_counter()
+        changed = 0
+        for location in locations.iterator():
+            changed += backfill(location, start, service=service)
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {changed} accumulators from {start} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,237 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from farmweather.farm.api_views import CropViewSet, LocationViewSet, WeatherDataViewSet
+from farmweather.farm.crops import suggest_crops
+from farmweather.farm.models import Crop, Location, WeatherData
+from farmweather.farm.services import OpenMeteoService
+from farmweather.farm.synthetic import daily_block, synthetic_get
+from farmweather.farm.views import summarize_forecast
+from farmweather.utils import calculate_growing_season_score
+
+BENCHMARK_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'farmweather-benchmark',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = 'Time the hot paths against synthetic fixtures and compare with a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000',
+                            help='Comma-separated data sizes to run every benchmark at')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per benchmark; the median is reported')
+        parser.add_argument('--output', default='bench_results.json',
+                            help='Where to write the machine-readable results')
+        parser.add_argument('--baseline', help='Results file to compare against')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed slowdown over the baseline median (0.25 = 25%%)')
+        parser.add_argument('--only', help='Run only benchmarks whose name contains this')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        self.repeat = options['repeat']
+        self.results = {}
+
+        # Everything runs against a throwaway database and cache, with the
+        # upstream HTTP layer replaced by deterministic synthetic payloads.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHE), \
+                    mock.patch.object(OpenMeteoService, '_get', synthetic_get):
+                for name, bench in self.benchmarks():
+                    if options['only'] and options['only'] not in name:
+                        continue
+                    for size in sizes:
+                        self.run(name, size, bench)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': self.repeat,
+            'results': self.results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            self.compare(options['baseline'], options['threshold'])
+
+    def benchmarks(self):
+        return [
+            ('forecast_parse', self.bench_forecast_parse),
+            ('location_cache_hit', self.bench_cache_hit),
+            ('location_cache_miss', self.bench_cache_miss),
+            ('suggest_crops', self.bench_suggest_crops),
+            ('growing_season_score', self.bench_growing_season_score),
+            ('api_crop_list', self.bench_api_list(CropViewSet, self.seed_crops)),
+            ('api_location_list', self.bench_api_list(LocationViewSet, self.seed_locations)),
+            ('api_weather_list', self.bench_api_list(WeatherDataViewSet, self.seed_weather)),
+        ]
+
+    def run(self, name, size, bench):
+        """Time `bench(size)`, which returns the callable to measure"""
+        target = bench(size)
+        target()  # warm-up
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            target()
+            timings.append(time.perf_counter() - start)
+
+        key = f"{name}[{size}]"
+        self.results[key] = {
+            'name': name,
+            'size': size,
+            'median_s': statistics.median(timings),
+            'min_s': min(timings),
+            'max_s': max(timings),
+        }
+        self.stdout.write(f"{key:<36} median {statistics.median(timings) * 1000:10.3f} ms")
+
+    # ----------------------
+    # Benchmarks
+    # ----------------------
+    def bench_forecast_parse(self, size):
+        service = OpenMeteoService()
+        payloads = [daily_block(-30 + i % 60, 20 + i % 40, datetime(2025, 1, 1).date(), 16)
+                    for i in range(size)]
+        return lambda: [service._parse_forecast(payload) for payload in payloads]
+
+    def bench_cache_hit(self, size):
+        locations = self.unsaved_locations(size)
+        for location in locations:
+            location.get_current_weather()
+        return lambda: [location.get_current_weather() for location in locations]
+
+    def bench_cache_miss(self, size):
+        locations = self.unsaved_locations(size)
+
+        def target():
+            cache.clear()
+            for location in locations:
+                location.get_current_weather()
+        return target
+
+    def bench_suggest_crops(self, size):
+        service = OpenMeteoService()
+        forecasts = [service._parse_forecast(daily_block(-30 + i % 60, 25, datetime(2025, 1, 1).date(), 7))
+                     for i in range(size)]
+
+        def target():
+            for forecast in forecasts:
+                summary = summarize_forecast(forecast)
+                suggest_crops(summary['avg_temp'], summary['total_rain_mm'])
+        return target
+
+    def bench_growing_season_score(self, size):
+        seasons = [choice for choice, _ in Crop.SEASONS]
+        crops = [Crop(name=f"crop-{i}", planting_season=seasons[i % len(seasons)]) for i in range(size)]
+        now = datetime(2025, 4, 15, tzinfo=timezone.utc)
+        return lambda: [calculate_growing_season_score(crop, now, timezone.utc) for crop in crops]
+
+    def bench_api_list(self, viewset, seed):
+        def bench(size):
+            user = seed(size)
+            view = viewset.as_view({'get': 'list'})
+            factory = APIRequestFactory()
+
+            def target():
+                request = factory.get('/')
+                force_authenticate(request, user=user)
+                view(request).render()
+            return target
+        return bench
+
+    # ----------------------
+    # Fixtures
+    # ----------------------
+    def unsaved_locations(self, size):
+        return [
+            Location(name=f"bench-{i}", latitude=-34 + (i % 700) / 10, longitude=16 + i / 1000,
+                     city='Bench', country='Synthetic')
+            for i in range(size)
+        ]
+
+    def bench_user(self):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        return user
+
+    def seed_crops(self, size):
+        Crop.objects.all().delete()
+        Crop.objects.bulk_create([
+            Crop(name=f"crop-{i}", category='Vegetable', optimal_temp_min=12, optimal_temp_max=28,
+                 optimal_rainfall_min=40, optimal_rainfall_max=120, soil_type='loam',
+                 planting_season='spring', days_to_maturity=90, spacing_cm=30,
+                 growing_tips='Keep the soil moist. ' * 20, common_pests='Aphids, cutworms',
+                 fertilizer_schedule='Side-dress every three weeks. ' * 5)
+            for i in range(size)
+        ])
+        return self.bench_user()
+
+    def seed_locations(self, size):
+        user = self.bench_user()
+        Location.objects.all().delete()
+        Location.objects.bulk_create([
+            Location(user=user, **{field: getattr(location, field) for field in
+                                   ('name', 'latitude', 'longitude', 'city', 'country')})
+            for location in self.unsaved_locations(size)
+        ])
+        return user
+
+    def seed_weather(self, size):
+        user = self.seed_locations(1)
+        location = Location.objects.get()
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+        WeatherData.objects.bulk_create([
+            WeatherData(location=location, temperature_current=20 + i % 10, temperature_min=10,
+                        temperature_max=30, humidity=55, precipitation=i % 7, weather_code=(0, 3, 61)[i % 3],
+                        weather_description='Synthetic',
+                        recorded_at=datetime.fromtimestamp(start + i * 3600, tz=timezone.utc))
+            for i in range(size)
+        ])
+        return user
+
+    # ----------------------
+    # Baseline comparison
+    # ----------------------
+    def compare(self, baseline_path, threshold):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)['results']
+
+        regressions = []
+        for key, result in self.results.items():
+            if key not in baseline:
+                continue
+            ratio = result['median_s'] / baseline[key]['median_s'] if baseline[key]['median_s'] else 1.0
+            marker = ''
+            if ratio > 1 + threshold:
+                regressions.append(key)
+                marker = '  REGRESSION'
+            self.stdout.write(f"{key:<36} {ratio:6.2f}x baseline{marker}")
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) slower than baseline by more than "
+                f"{threshold:.0%}: {', '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
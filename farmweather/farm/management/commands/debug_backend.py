@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
-from farm.services import OpenMeteoService
-from farm.models import Crop, Location, WeatherData
+from farmweather.farm.services import OpenMeteoService
+from farmweather.farm.models import Crop, Location, WeatherData
 from datetime import datetime, timedelta
 
 class Command(BaseCommand):
@@ -33,8 +33,20 @@ class Command(BaseCommand):
         self.stdout.write(f"Crops in DB: {crop_count}")
         if crop_count == 0:
             self.stdout.write("Creating test crop...")
-            Crop.objects.create(name="Test Maize", category="Grain", planting_season="Spring")
+            Crop.objects.create(
+                name="Test Maize",
+                category="Grain",
+                planting_season="spring",
+                optimal_temp_min=18,
+                optimal_temp_max=30,
+                optimal_rainfall_min=50,
+                optimal_rainfall_max=120,
+                soil_type="loam",
+                days_to_maturity=120,
+                spacing_cm=75,
+            )
             self.stdout.write(f"New Crops in DB: {Crop.objects.count()}")
+            self.stdout.write("Load a full catalogue with: manage.py load_crops <file>")
 
         location_count = Location.objects.count()
         self.stdout.write(f"Locations in DB: {location_count}")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from farmweather.farm.notifications import dispatch
+
+
+class Command(BaseCommand):
+    help = 'Send queued notification emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            help='Sending threads, one SMTP connection each (default: OUTBOX_DISPATCH_WORKERS)')
+        parser.add_argument('--batch-size', type=int,
+                            help='Messages leased per claim (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new messages instead of exiting once the outbox is drained')
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds between polls of an empty outbox with --loop')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            stats = dispatch(
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                keep_polling=options['loop'],
+                poll_interval=options['poll_interval'],
+            )
+        except KeyboardInterrupt:
+            return
+        elapsed = time.perf_counter() - start
+
+        if stats.failed:
+            self.stderr.write(f"{stats.failed} messages failed for good after OUTBOX_MAX_ATTEMPTS attempts")
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {stats.sent} messages as {stats.emails} emails in {stats.batches} batches "
+            f"({stats.retried} rescheduled for retry) in {elapsed:.2f}s "
+            f"({stats.sent / elapsed if elapsed else 0:.0f} messages/s)"
+        ))
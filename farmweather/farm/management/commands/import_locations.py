@@ -0,0 +1,54 @@
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from farmweather.farm.location_import import import_locations, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import locations from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSON list of locations')
+        parser.add_argument('--user', help='Import every row for this username; '
+                                           'otherwise each row needs a username column')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--partial', action='store_true',
+                            help='Import the valid rows even when some rows are invalid')
+        parser.add_argument('--no-geocode', action='store_true',
+                            help='Reject rows without coordinates instead of geocoding their city')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user '{options['user']}'")
+
+        try:
+            rows = parse_rows(path.read_text(encoding='utf-8-sig'), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        start = time.perf_counter()
+        result = import_locations(
+            rows, user=user, partial=options['partial'], geocode_missing=not options['no_geocode'],
+        )
+        elapsed = time.perf_counter() - start
+
+        for error in result['errors']:
+            details = '; '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stderr.write(f"Row {error['row']}: {details}")
+        if result['errors'] and not result['created']:
+            raise CommandError(f"{len(result['errors'])} invalid rows; nothing imported")
+
+        rate = result['created'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} of {len(rows)} locations in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
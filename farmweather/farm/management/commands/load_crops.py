@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farmweather.farm.crop_catalogue import COMPANION_SEPARATOR, load_crops, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load a crop catalogue (CSV or JSON) and its companion-plant links'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSON list of crops. '
+                                         f'In CSV, companion_plants is a "{COMPANION_SEPARATOR}"-separated list of names')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--partial', action='store_true',
+                            help='Load the valid rows even when some rows are invalid')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+        try:
+            rows = parse_rows(path.read_text(encoding='utf-8-sig'), fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        start = time.perf_counter()
+        result = load_crops(rows, partial=options['partial'])
+        elapsed = time.perf_counter() - start
+
+        for error in result['errors']:
+            details = '; '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stderr.write(f"Row {error['row']}: {details}")
+        if result['errors'] and not result['crops']:
+            raise CommandError(f"{len(result['errors'])} invalid rows; nothing loaded")
+
+        rate = result['crops'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {result['crops']} of {len(rows)} crops and {result['companions']} companion links "
+            f"in {elapsed:.2f}s ({rate:.0f} crops/s)"
+        ))
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+_local = threading.local()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Command(BaseCommand):
+    help = 'Drive the farm API and pages at a target request rate and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request; repeat to rotate through several '
+                                 '(default: the crop, location and weather list endpoints)')
+        parser.add_argument('--rate', type=float, default=20, help='Target requests per second')
+        parser.add_argument('--duration', type=float, default=30, help='Test length in seconds')
+        parser.add_argument('--concurrency', type=int, default=32, help='Maximum requests in flight')
+        parser.add_argument('--token', help='DRF auth token sent as "Authorization: Token <token>"')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['rate'] <= 0:
+            raise CommandError("--rate must be positive")
+        paths = options['paths'] or ['/crops/', '/locations/', '/weather/']
+        urls = [options['base_url'].rstrip('/') + path for path in paths]
+        headers = {'Authorization': f"Token {options['token']}"} if options['token'] else {}
+
+        latencies, statuses, lock = [], Counter(), threading.Lock()
+
+        def fire(url, scheduled):
+            session = getattr(_local, 'session', None)
+            if session is None:
+                session = _local.session = requests.Session()
+            try:
+                status = session.get(url, headers=headers, timeout=options['timeout']).status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            # Measured from the scheduled send time so queueing delay counts too
+            latency = time.perf_counter() - scheduled
+            with lock:
+                latencies.append(latency)
+                statuses[status] += 1
+
+        # Open-loop schedule: requests go out on time whether or not earlier ones finished
+        interval = 1 / options['rate']
+        total = int(options['rate'] * options['duration'])
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for i in range(total):
+                scheduled = start + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, urls[i % len(urls)], scheduled)
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        errors = sum(count for status, count in statuses.items()
+                     if not isinstance(status, int) or status >= 400)
+        report = {
+            'requests': len(latencies),
+            'errors': errors,
+            'elapsed_s': round(elapsed, 3),
+            'target_rps': options['rate'],
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'latency_ms': {
+                name: round(percentile(latencies, pct) * 1000, 2) if latencies else None
+                for name, pct in (('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100))
+            },
+            'statuses': {str(status): count for status, count in statuses.items()},
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(
+            f"{report['requests']} requests in {report['elapsed_s']}s "
+            f"({report['throughput_rps']} req/s, target {report['target_rps']}), {errors} errors"
+        )
+        self.stdout.write("Latency: " + ", ".join(
+            f"{name}={value}ms" for name, value in report['latency_ms'].items()
+        ))
+        self.stdout.write(f"Statuses: {report['statuses']}")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from farmweather.farm.standin import StandInConfig, make_server
+
+
+class Command(BaseCommand):
+    help = 'Run a local Open-Meteo and MapMyCrop stand-in server for offline performance testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--latency-ms', type=float, default=0,
+                            help='Fixed delay added to every response')
+        parser.add_argument('--jitter-ms', type=float, default=0,
+                            help='Extra random delay of up to this many milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with HTTP 503')
+        parser.add_argument('--padding-bytes', type=int, default=0,
+                            help='Pad every payload by this many bytes')
+
+    def handle(self, *args, **options):
+        config = StandInConfig(
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            padding_bytes=options['padding_bytes'],
+        )
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(
+            f"Open-Meteo stand-in listening on http://{options['host']}:{options['port']}/v1 "
+            f"(set OPEN_METEO_BASE_URL to this, and MAPMYCROP_BASE_URL to its /monitor)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
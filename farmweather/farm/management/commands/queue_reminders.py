@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farmweather.farm.notifications import queue_reminders
+
+
+class Command(BaseCommand):
+    help = "Queue the day's planting (watering-due) and harvest reminder emails in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to queue reminders for, YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        counts = queue_reminders(day)
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {counts['planting_reminder']} planting and {counts['harvest_reminder']} harvest reminders "
+            f"(already queued ones are skipped)"
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from farmweather.farm.irrigation import schedule_all
+
+
+class Command(BaseCommand):
+    help = "Recompute next-watering dates for every user's preferred crops from the cached forecasts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            help='Profiles per bulk forecast read and upsert (default: IRRIGATION_CHUNK_SIZE)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        totals = schedule_all(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start
+
+        if totals['without_forecast']:
+            self.stderr.write(
+                f"{totals['without_forecast']} schedules have no forecast and assume a dry week"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Scheduled {totals['schedules']} crops for {totals['profiles']} profiles "
+            f"({totals['unchanged']} unchanged since the last forecast version, "
+            f"{totals['simulations']} distinct simulations, {totals['removed']} stale removed) in {elapsed:.2f}s"
+        ))
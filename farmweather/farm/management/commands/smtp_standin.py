@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from farmweather.farm.smtp_standin import SMTPStandInConfig, make_server
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP stand-in server for offline notification testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=2525)
+        parser.add_argument('--latency-ms', type=float, default=0,
+                            help='Delay added to every accepted message')
+        parser.add_argument('--reject-rate', type=float, default=0.0,
+                            help='Fraction of recipients answered with a transient 451')
+
+    def handle(self, *args, **options):
+        config = SMTPStandInConfig(latency_ms=options['latency_ms'], reject_rate=options['reject_rate'])
+        server = make_server(options['host'], options['port'], config)
+        self.stdout.write(
+            f"SMTP stand-in listening on {options['host']}:{options['port']} "
+            f"(set EMAIL_HOST and EMAIL_PORT to this)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Accepted {server.stats['messages']} messages over {server.stats['connections']} connections")
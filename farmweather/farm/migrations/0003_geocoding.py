@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0002_userprofile_address_userprofile_city_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedPlace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.BigIntegerField(unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('search_name', models.CharField(db_index=True, max_length=200)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('elevation', models.FloatField(blank=True, null=True)),
+                ('timezone', models.CharField(default='UTC', max_length=50)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('country_code', models.CharField(blank=True, max_length=2)),
+                ('admin1', models.CharField(blank=True, max_length=100)),
+                ('population', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GeocodingQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=200, unique=True)),
+                ('results', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:08
+
+from django.db import migrations, models
+
+from farmweather.farm import geo
+
+
+def fill_geohash(apps, schema_editor):
+    Location = apps.get_model('farm', 'Location')
+    locations = list(Location.objects.only('pk', 'latitude', 'longitude'))
+    for location in locations:
+        location.geohash = geo.encode(location.latitude, location.longitude)
+    Location.objects.bulk_update(locations, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0003_geocoding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
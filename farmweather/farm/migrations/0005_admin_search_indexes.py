@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:22
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0004_location_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='farm_location_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['recorded_at'], name='farm_weathe_recorde_d996f3_idx'),
+        ),
+    ]
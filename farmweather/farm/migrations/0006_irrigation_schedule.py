@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0005_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IrrigationSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_watering', models.DateField()),
+                ('water_need_mm', models.FloatField(help_text='Water applied per watering')),
+                ('rain_credit_mm', models.FloatField(default=0, help_text='Expected forecast rain counted against the need')),
+                ('used_forecast', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(db_index=True)),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farm.crop')),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farm.location')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='irrigation_schedules', to='farm.userprofile')),
+            ],
+            options={
+                'ordering': ['next_watering'],
+                'indexes': [models.Index(fields=['profile', 'next_watering'], name='farm_irriga_profile_478c51_idx')],
+                'unique_together': {('profile', 'crop')},
+            },
+        ),
+    ]
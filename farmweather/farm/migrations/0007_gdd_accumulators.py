@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0006_irrigation_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crop',
+            name='gdd_base_temp',
+            field=models.FloatField(default=10.0, help_text='Growing degree day base temperature in Celsius'),
+        ),
+        migrations.AddField(
+            model_name='crop',
+            name='gdd_to_maturity',
+            field=models.FloatField(blank=True, help_text='Growing degree days from planting to maturity', null=True),
+        ),
+        migrations.CreateModel(
+            name='GDDAccumulator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_temp', models.FloatField(help_text='Crop GDD base temperature rounded to 0.1 Celsius')),
+                ('gdd', models.FloatField(default=0)),
+                ('days', models.IntegerField(default=0)),
+                ('started_on', models.DateField()),
+                ('day', models.DateField()),
+                ('day_min', models.FloatField()),
+                ('day_max', models.FloatField()),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gdd_accumulators', to='farm.location')),
+            ],
+            options={
+                'unique_together': {('location', 'base_temp')},
+            },
+        ),
+    ]
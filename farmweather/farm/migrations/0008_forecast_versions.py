@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farm', '0007_gdd_accumulators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='irrigationschedule',
+            name='forecast_version',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ForecastChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField()),
+                ('changes', models.JSONField(default=dict, help_text='{date: {field: [old, new]}}')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_changes', to='farm.location')),
+            ],
+            options={
+                'ordering': ['id'],
+                'unique_together': {('location', 'version')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ForecastVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField(default=1)),
+                ('content_hash', models.CharField(max_length=40)),
+                ('baseline', models.JSONField(default=dict)),
+                ('changed_at', models.DateTimeField()),
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_version', to='farm.location')),
+            ],
+        ),
+    ]
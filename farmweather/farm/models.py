@@ -1,8 +1,84 @@
 from django.db import models
 from django.contrib import admin
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import hashlib
 import json
+import time
+from .instrumentation import timed
+from . import geo
+
+class LocationQuerySet(models.QuerySet):
+    """Spatial lookups backed by the indexed geohash column"""
+
+    def name_prefix(self, prefix):
+        """
+        Case-insensitive name prefix match as a range over the LOWER(name)
+        index; a LIKE 'prefix%' would scan the whole table instead.
+        """
+        prefix = prefix.lower()
+        return self.alias(name_lower=Lower('name')).filter(
+            name_lower__gte=prefix, name_lower__lt=prefix + '\U0010ffff'
+        )
+
+    def _candidates(self, latitude, longitude, precision):
+        if precision == 0:
+            return self
+        prefixes = geo.neighbourhood(geo.encode(latitude, longitude, precision))
+        # One index range per cell; LIKE 'prefix%' would scan the table
+        query = Q()
+        for prefix in prefixes:
+            query |= Q(geohash__gte=prefix, geohash__lt=prefix + '~')
+        return self.filter(query)
+
+    def _with_distance(self, locations, latitude, longitude):
+        for location in locations:
+            location.distance_km = geo.haversine_km(latitude, longitude, location.latitude, location.longitude)
+        return sorted(locations, key=lambda location: location.distance_km)
+
+    def within_radius(self, latitude, longitude, radius_km):
+        """Locations within `radius_km` of a point, nearest first, each with `distance_km`"""
+        precision = geo.covering_precision(latitude, radius_km)
+        candidates = self._candidates(latitude, longitude, precision)
+        return [
+            location for location in self._with_distance(list(candidates), latitude, longitude)
+            if location.distance_km <= radius_km
+        ]
+
+    def nearest(self, latitude, longitude, k=10):
+        """
+        The `k` locations closest to a point, each with `distance_km`.
+        Searches outward one grid level at a time until the k-th hit is
+        guaranteed to be inside the searched neighbourhood.
+        """
+        for precision in range(7, -1, -1):
+            candidates = self._with_distance(
+                list(self._candidates(latitude, longitude, precision)), latitude, longitude
+            )
+            if precision == 0:
+                return candidates[:k]
+            if len(candidates) >= k:
+                # The 3x3 block fully covers any circle narrower than one cell
+                radius_km = candidates[k - 1].distance_km
+                if geo.covering_precision(latitude, radius_km) >= precision:
+                    return candidates[:k]
+        return []
+
+    def weather_cells(self, precision=None):
+        """Group location ids by shared weather grid cell: {cell: [ids]}"""
+        precision = precision or settings.WEATHER_CELL_PRECISION
+        cells = {}
+        for pk, geohash in self.values_list('pk', 'geohash'):
+            cells.setdefault(geohash[:precision], []).append(pk)
+        return cells
+
 
 class Location(models.Model):
     """User location with OpenMeteo integration"""
@@ -15,6 +91,7 @@ class Location(models.Model):
     country_code = models.CharField(max_length=2, default='')
     timezone = models.CharField(max_length=50, default='UTC')
     elevation = models.FloatField(null=True, blank=True)  # OpenMeteo provides this
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)  # maintained on save
     
     # Location metadata
     is_primary = models.BooleanField(default=False)
@@ -24,28 +101,65 @@ class Location(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = LocationQuerySet.as_manager()
     
     class Meta:
         unique_together = ['user', 'name']
         indexes = [
             models.Index(fields=['latitude', 'longitude']),
             models.Index(fields=['user', 'is_primary']),
+            models.Index(Lower('name'), name='farm_location_name_lower_idx'),
         ]
     
     def save(self, *args, **kwargs):
-        # Ensure only one primary location per user
-        if self.is_primary:
-            Location.objects.filter(user=self.user, is_primary=True).update(is_primary=False)
-        super().save(*args, **kwargs)
+        # Demoting the old primary and saving this row commit together, so
+        # the write lock is taken once instead of twice
+        with transaction.atomic():
+            # Ensure only one primary location per user
+            if self.is_primary:
+                Location.objects.filter(user=self.user, is_primary=True).update(is_primary=False)
+            self.geohash = geo.encode(self.latitude, self.longitude)
+            super().save(*args, **kwargs)
+
+    @property
+    def tzinfo(self):
+        """The location's timezone, or UTC when it is unset or not a known zone"""
+        try:
+            return ZoneInfo(self.timezone or 'UTC')
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo('UTC')
+
+    @property
+    def weather_cell(self):
+        """Grid cell shared by nearby locations, e.g. for regional alerts"""
+        return self.geohash[:settings.WEATHER_CELL_PRECISION]
     
     def get_cache_key(self, data_type='current'):
         """Generate cache key for weather data"""
         return f"weather:{data_type}:{self.latitude}:{self.longitude}"
+
+    def get_cache_meta(self, data_type='current'):
+        """Return the ETag and expiry stored next to a cached weather payload"""
+        return cache.get(f"{self.get_cache_key(data_type)}:meta")
+
+    def _cache_weather(self, cache_key, data, timeout):
+        """Cache a weather payload together with its content-version ETag"""
+        payload = json.dumps(data)
+        cache.set_many({
+            cache_key: payload,
+            f"{cache_key}:meta": {
+                'etag': hashlib.sha1(payload.encode()).hexdigest(),
+                'expires_at': time.time() + timeout,
+            },
+        }, timeout)
     
     def get_current_weather(self):
         """Fetch current weather from OpenMeteo with caching"""
         cache_key = self.get_cache_key('current')
-        cached_data = cache.get(cache_key)
+        with timed('cache') as phase:
+            cached_data = cache.get(cache_key)
+            phase.name = 'cache_hit' if cached_data else 'cache_miss'
         
         if cached_data:
             return json.loads(cached_data)
@@ -54,16 +168,20 @@ class Location(models.Model):
         weather_service = OpenMeteoService()
         weather_data = weather_service.get_current_weather(self.latitude, self.longitude)
         
-        if weather_data:
+        # Stale fallbacks from a failing upstream are served but never cached
+        if weather_data and not weather_data.get('stale'):
             # Cache for 10 minutes
-            cache.set(cache_key, json.dumps(weather_data), 600)
+            self._cache_weather(cache_key, weather_data, 600)
+            self._record_snapshot(weather_data)
         
         return weather_data
     
     def get_weather_forecast(self, days=7):
         """Get weather forecast for next N days"""
         cache_key = self.get_cache_key(f'forecast_{days}')
-        cached_data = cache.get(cache_key)
+        with timed('cache') as phase:
+            cached_data = cache.get(cache_key)
+            phase.name = 'cache_hit' if cached_data else 'cache_miss'
         
         if cached_data:
             return json.loads(cached_data)
@@ -74,11 +192,127 @@ class Location(models.Model):
             self.latitude, self.longitude, days
         )
         
-        if forecast_data:
+        if forecast_data and not forecast_data.get('stale'):
             # Cache forecast for 30 minutes
-            cache.set(cache_key, json.dumps(forecast_data), 1800)
+            self._cache_weather(cache_key, forecast_data, 1800)
+            from .forecast_changes import record_forecasts
+            record_forecasts([(self, forecast_data)])
         
         return forecast_data
+
+    def get_historical_weather(self, start_date, end_date):
+        """Daily archive weather from start_date to end_date, cached like forecasts"""
+        cache_key = self.get_cache_key(f'history_{start_date.isoformat()}_{end_date.isoformat()}')
+        with timed('cache') as phase:
+            cached_data = cache.get(cache_key)
+            phase.name = 'cache_hit' if cached_data else 'cache_miss'
+
+        if cached_data:
+            return json.loads(cached_data)
+
+        from .services import OpenMeteoService
+        history = OpenMeteoService().get_historical_weather(self.latitude, self.longitude, start_date, end_date)
+        if history:
+            self._cache_weather(cache_key, history, settings.HISTORICAL_WEATHER_CACHE_TTL)
+        return history
+
+    def get_hourly_forecast(self, days=7):
+        """
+        Hourly forecast for the next N days as a HourlyForecast. Cached as
+        the object itself, whose typed arrays pickle compactly, not as JSON.
+        """
+        cache_key = self.get_cache_key(f'hourly_{days}')
+        with timed('cache') as phase:
+            forecast = cache.get(cache_key)
+            phase.name = 'cache_hit' if forecast is not None else 'cache_miss'
+
+        if forecast is not None:
+            return forecast
+
+        from .services import OpenMeteoService
+        forecast = OpenMeteoService().get_hourly_forecast(self.latitude, self.longitude, days)
+        if forecast and not forecast.stale_since:
+            cache.set(cache_key, forecast, 1800)
+        return forecast
+
+    def _record_snapshot(self, current):
+        """Queue a WeatherData row for freshly fetched current weather"""
+        if not settings.RECORD_WEATHER_SNAPSHOTS or self.pk is None:
+            return
+        snapshot = WeatherData.from_current_weather(self, current)
+        if snapshot is None:
+            return
+        from .gdd import accumulate_readings
+        from .write_queue import get_write_queue
+        queue = get_write_queue()
+        queue.submit(
+            snapshot,
+            unique_fields=['location', 'recorded_at'],
+            update_fields=WeatherData.SNAPSHOT_FIELDS,
+        )
+        # Queued writes are bulk inserts without post_save, so accumulate GDD alongside
+        queue.submit(lambda: accumulate_readings([snapshot]))
+
+    @classmethod
+    def get_bulk_weather(cls, locations, days=7, include=('current_weather', 'forecast')):
+        """
+        Current weather and forecast for many locations at once.
+        Reads every cache entry in one multi-get and fetches the misses
+        upstream as batched multi-location requests.
+        Returns {location.id: {'current_weather': ..., 'forecast': ...}},
+        limited to the kinds named in `include`.
+        """
+        kinds = {
+            'current_weather': ('current', 600),
+            'forecast': (f'forecast_{days}', 1800),
+        }
+        kinds = {field: kind for field, kind in kinds.items() if field in include}
+        keys = [
+            location.get_cache_key(data_type)
+            for location in locations
+            for data_type, _ in kinds.values()
+        ]
+        with timed('cache'):
+            cached = cache.get_many(keys)
+        results = {location.id: {} for location in locations}
+
+        from .services import OpenMeteoService
+        weather_service = OpenMeteoService()
+        fetchers = {
+            'current_weather': weather_service.get_current_weather_batch,
+            'forecast': lambda coords: weather_service.get_weather_forecast_batch(coords, days),
+        }
+
+        for field, (data_type, timeout) in kinds.items():
+            # Locations sharing coordinates share a cache entry and an upstream slot
+            misses = {}
+            for location in locations:
+                cache_key = location.get_cache_key(data_type)
+                if cache_key in cached:
+                    results[location.id][field] = json.loads(cached[cache_key])
+                else:
+                    misses.setdefault(cache_key, []).append(location)
+
+            if not misses:
+                continue
+            groups = list(misses.values())
+            fetched = fetchers[field]([(group[0].latitude, group[0].longitude) for group in groups])
+            fresh_forecasts = []
+            for group, data in zip(groups, fetched):
+                if data and not data.get('stale'):
+                    group[0]._cache_weather(group[0].get_cache_key(data_type), data, timeout)
+                    if field == 'current_weather':
+                        for location in group:
+                            location._record_snapshot(data)
+                    else:
+                        fresh_forecasts.extend((location, data) for location in group)
+                for location in group:
+                    results[location.id][field] = data
+            if fresh_forecasts:
+                from .forecast_changes import record_forecasts
+                record_forecasts(fresh_forecasts)
+
+        return results
     
     def __str__(self):
         return f"{self.name} ({self.city}, {self.country})"
@@ -120,31 +354,52 @@ class WeatherData(models.Model):
         indexes = [
             models.Index(fields=['location', 'recorded_at']),
             models.Index(fields=['weather_code']),
+            # Default ordering and admin date navigation across all locations
+            models.Index(fields=['recorded_at']),
         ]
     
+    SNAPSHOT_FIELDS = [
+        'temperature_current', 'humidity', 'pressure', 'wind_speed', 'wind_direction',
+        'wind_gusts', 'precipitation', 'weather_code', 'weather_description', 'cloud_cover',
+    ]
+
+    @classmethod
+    def from_current_weather(cls, location, current):
+        """
+        Unsaved row built from OpenMeteoService.get_current_weather output,
+        or None when required readings are missing.
+        """
+        if current.get('temperature') is None or current.get('humidity') is None \
+                or current.get('weather_code') is None:
+            return None
+
+        from farmweather.utils import get_weather_description
+        try:
+            recorded_at = datetime.fromisoformat(current['time']).replace(
+                tzinfo=ZoneInfo(current.get('timezone') or location.timezone or 'UTC')
+            )
+        except (KeyError, TypeError, ValueError):
+            recorded_at = timezone.now().replace(second=0, microsecond=0)
+
+        return cls(
+            location=location,
+            temperature_current=current['temperature'],
+            humidity=current['humidity'],
+            pressure=current.get('pressure'),
+            wind_speed=current.get('wind_speed'),
+            wind_direction=current.get('wind_direction'),
+            wind_gusts=current.get('wind_gusts'),
+            precipitation=current.get('precipitation') or 0,
+            weather_code=current['weather_code'],
+            weather_description=get_weather_description(current['weather_code']),
+            cloud_cover=current.get('cloud_cover'),
+            recorded_at=recorded_at,
+        )
+
     def get_weather_emoji(self):
         """Convert OpenMeteo weather code to emoji"""
-        weather_emojis = {
-            0: '☀️',      
-            1: '🌤️',      
-            2: '⛅',      
-            3: '☁️',      
-            45: '🌫️',     
-            48: '🌫️',     
-            51: '🌦️',     
-            53: '🌦️',     
-            55: '🌦️',     
-            61: '🌧️',     
-            63: '🌧️',     
-            65: '🌧️',     
-            80: '🌦️',     
-            81: '🌧️',     
-            82: '⛈️',     
-            95: '⛈️',     
-            96: '⛈️',     
-            99: '⛈️',     
-        }
-        return weather_emojis.get(self.weather_code, '🌤️')
+        from farmweather.utils import get_weather_emoji
+        return get_weather_emoji(self.weather_code)
 
 class Crop(models.Model):
     """Enhanced crop model for farming recommendations"""
@@ -195,6 +450,10 @@ class Crop(models.Model):
     days_to_germination = models.IntegerField(default=7)
     days_to_maturity = models.IntegerField()
     harvest_duration_days = models.IntegerField(default=30)
+    gdd_base_temp = models.FloatField(default=10.0, help_text="Growing degree day base temperature in Celsius")
+    gdd_to_maturity = models.FloatField(
+        null=True, blank=True, help_text="Growing degree days from planting to maturity"
+    )
     
     # Spacing and care
     spacing_cm = models.IntegerField(help_text="Plant spacing in centimeters")
@@ -262,6 +521,158 @@ class UserProfile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class IrrigationSchedule(models.Model):
+    """Next watering date for one of a user's preferred crops (see farm/irrigation.py)"""
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='irrigation_schedules')
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='+')
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    next_watering = models.DateField()
+    water_need_mm = models.FloatField(help_text="Water applied per watering")
+    rain_credit_mm = models.FloatField(default=0, help_text="Expected forecast rain counted against the need")
+    used_forecast = models.BooleanField(default=True)
+    forecast_version = models.IntegerField(null=True, blank=True)
+    computed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ['profile', 'crop']
+        ordering = ['next_watering']
+        indexes = [
+            models.Index(fields=['profile', 'next_watering']),
+        ]
+
+    def __str__(self):
+        return f"Water {self.crop} on {self.next_watering}"
+
+
+class GDDAccumulator(models.Model):
+    """
+    Running growing degree days at a location for one base temperature,
+    shared by every crop with that base (see farm/gdd.py). `gdd` sums the
+    closed days; `day` is the open day and its low/high so far.
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='gdd_accumulators')
+    base_temp = models.FloatField(help_text='Crop GDD base temperature rounded to 0.1 Celsius')
+
+    gdd = models.FloatField(default=0)
+    days = models.IntegerField(default=0)
+    started_on = models.DateField()
+    day = models.DateField()
+    day_min = models.FloatField()
+    day_max = models.FloatField()
+
+    class Meta:
+        unique_together = ['location', 'base_temp']
+
+    def __str__(self):
+        return f"{self.location} base {self.base_temp}: {self.gdd:.0f} GDD"
+
+
+class ForecastVersion(models.Model):
+    """
+    Change tracking for a location's daily forecast (see farm/forecast_changes.py).
+    `version` only moves on a material change; `baseline` is the normalized
+    forecast it was last moved for, `content_hash` the latest fetch.
+    """
+    location = models.OneToOneField(Location, on_delete=models.CASCADE, related_name='forecast_version')
+    version = models.IntegerField(default=1)
+    content_hash = models.CharField(max_length=40)
+    baseline = models.JSONField(default=dict)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.location} forecast v{self.version}"
+
+
+class ForecastChange(models.Model):
+    """Feed entry: a location's forecast moved beyond FORECAST_CHANGE_THRESHOLDS"""
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name='forecast_changes')
+    version = models.IntegerField()
+    changes = models.JSONField(default=dict, help_text="{date: {field: [old, new]}}")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        unique_together = ['location', 'version']
+
+    def __str__(self):
+        return f"{self.location} forecast v{self.version}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Notification written in the same transaction as the change that caused
+    it and delivered later by the dispatcher (see farm/notifications.py).
+    """
+    KINDS = [
+        ('weather_alert', 'Weather alert'),
+        ('planting_reminder', 'Planting reminder'),
+        ('harvest_reminder', 'Harvest reminder'),
+    ]
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    recipient = models.EmailField()
+    kind = models.CharField(max_length=20, choices=KINDS)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    # Lets producers re-run without queueing the same notification twice
+    dedupe_key = models.CharField(max_length=120, unique=True)
+
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    lease_token = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher's claim query
+            models.Index(fields=['status', 'available_at']),
+            models.Index(fields=['lease_token']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.recipient} ({self.status})"
+
+
+class GeocodedPlace(models.Model):
+    """Place seen in a geocoding response, kept as a local search index"""
+    external_id = models.BigIntegerField(unique=True)  # Open-Meteo geocoding id
+    name = models.CharField(max_length=200)
+    search_name = models.CharField(max_length=200, db_index=True)  # normalized name
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    elevation = models.FloatField(null=True, blank=True)
+    timezone = models.CharField(max_length=50, default='UTC')
+    country = models.CharField(max_length=100, blank=True)
+    country_code = models.CharField(max_length=2, blank=True)
+    admin1 = models.CharField(max_length=100, blank=True)
+    population = models.BigIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}, {self.country}"
+
+class GeocodingQuery(models.Model):
+    """Cached answer to a normalized geocoding query"""
+    query = models.CharField(max_length=200, unique=True)
+    results = models.JSONField(default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.query
+
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('id', 'phone_display', 'address_display')
 
@@ -0,0 +1,336 @@
+"""
+Email notifications through a transactional outbox.
+
+Producers never talk to SMTP. They add OutboxMessage rows, in the same
+transaction as whatever caused them where there is one (forecast changes
+queue their weather alerts that way). Every message has a dedupe key, so
+re-running a producer queues nothing twice.
+
+The dispatcher runs OUTBOX_DISPATCH_WORKERS threads. Each keeps one SMTP
+connection open for the whole run and repeatedly:
+
+1. claims up to OUTBOX_BATCH_SIZE due messages by stamping them with its
+   lease token (a conditional UPDATE, so two workers never claim the same
+   row; SKIP LOCKED is used where the database has it). A worker that dies
+   leaves its rows to be claimed again when the lease runs out;
+2. sends one email per recipient, folding that recipient's messages into
+   a digest;
+3. marks the batch sent in one UPDATE, or schedules failures for a retry
+   with exponential backoff until OUTBOX_MAX_ATTEMPTS. Both writes only
+   touch rows still leased to the worker.
+
+There is no planting calendar to remind anyone of, so the
+`planting_reminders` preference gates watering-due reminders from the
+irrigation schedule; they are queued with kind 'planting_reminder'.
+"""
+import logging
+import random
+import smtplib
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .gdd import base_key, crop_progress
+from .instrumentation import submit
+from .models import Crop, GDDAccumulator, IrrigationSchedule, OutboxMessage, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Harvest reminders go out this many days before projected maturity
+HARVEST_NOTICE_DAYS = 7
+PRODUCER_CHUNK_SIZE = 2000
+
+
+# ----------------------
+# Producers
+# ----------------------
+def enqueue(messages):
+    """Add unsaved OutboxMessages, skipping dedupe keys already queued"""
+    OutboxMessage.objects.bulk_create(messages, batch_size=500, ignore_conflicts=True)
+    return len(messages)
+
+
+def weather_alert_messages(changes):
+    """
+    Messages for users with weather alerts whose primary location is in
+    `changes` (ForecastChange rows, saved or not).
+    """
+    by_location = {change.location_id: change for change in changes}
+    profiles = (
+        UserProfile.objects.filter(weather_alerts=True, primary_location_id__in=by_location)
+        .exclude(user__email='')
+        .values_list('user_id', 'user__email', 'primary_location_id', 'primary_location__name')
+    )
+    messages = []
+    for user_id, email, location_id, location_name in profiles:
+        change = by_location[location_id]
+        lines = [
+            f"{day}: " + ', '.join(f"{field.replace('_', ' ')} {old} -> {new}" for field, (old, new) in fields.items())
+            for day, fields in sorted(change.changes.items())
+        ]
+        messages.append(OutboxMessage(
+            user_id=user_id,
+            recipient=email,
+            kind='weather_alert',
+            subject=f"Forecast update for {location_name}",
+            body="The forecast for your farm has changed:\n\n" + '\n'.join(lines),
+            dedupe_key=f"weather:{user_id}:{location_id}:{change.version}",
+        ))
+    return messages
+
+
+def _planting_reminders(day):
+    """
+    One message per profile listing the crops due for watering on `day`,
+    sent to profiles that opted into `planting_reminders`
+    """
+    rows = (
+        IrrigationSchedule.objects.filter(next_watering=day, profile__planting_reminders=True)
+        .exclude(profile__user__email='')
+        .order_by('profile_id', 'crop__name')
+        .values_list('profile_id', 'profile__user_id', 'profile__user__email', 'crop__name', 'water_need_mm')
+    )
+    grouped = defaultdict(list)
+    recipients = {}
+    for profile_id, user_id, email, crop_name, need in rows.iterator(chunk_size=PRODUCER_CHUNK_SIZE):
+        grouped[profile_id].append(f"- {crop_name}: about {need:g} mm")
+        recipients[profile_id] = (user_id, email)
+
+    return [
+        OutboxMessage(
+            user_id=recipients[profile_id][0],
+            recipient=recipients[profile_id][1],
+            kind='planting_reminder',
+            subject=f"Watering due on {day:%a %d %b}",
+            body="These crops are due for watering:\n\n" + '\n'.join(lines),
+            dedupe_key=f"planting:{profile_id}:{day.isoformat()}",
+        )
+        for profile_id, lines in grouped.items()
+    ]
+
+
+def _harvest_reminders(day):
+    """Preferred crops whose GDD-projected maturity falls within HARVEST_NOTICE_DAYS"""
+    horizon = day + timedelta(days=HARVEST_NOTICE_DAYS)
+    crops = {
+        crop.pk: crop
+        for crop in Crop.objects.only('id', 'name', 'gdd_base_temp', 'gdd_to_maturity', 'days_to_maturity')
+    }
+    Preferred = UserProfile.preferred_crops.through
+    profiles = list(
+        UserProfile.objects.filter(harvest_reminders=True, primary_location__isnull=False)
+        .exclude(user__email='')
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'user__email', 'primary_location_id')
+    )
+    messages = []
+    for start in range(0, len(profiles), PRODUCER_CHUNK_SIZE):
+        chunk = {pk: (user_id, email, location_id) for pk, user_id, email, location_id in profiles[start:start + PRODUCER_CHUNK_SIZE]}
+        accumulators = {
+            (acc.location_id, base_key(acc.base_temp)): acc
+            for acc in GDDAccumulator.objects.filter(location_id__in={value[2] for value in chunk.values()})
+        }
+        for profile_id, crop_id in Preferred.objects.filter(userprofile_id__in=chunk).values_list('userprofile_id', 'crop_id'):
+            user_id, email, location_id = chunk[profile_id]
+            crop = crops[crop_id]
+            accumulator = accumulators.get((location_id, base_key(crop.gdd_base_temp)))
+            if accumulator is None:
+                continue
+            progress = crop_progress(accumulator, crop)
+            projected = progress['projected_maturity']
+            if projected is None or not day <= projected <= horizon:
+                continue
+            messages.append(OutboxMessage(
+                user_id=user_id,
+                recipient=email,
+                kind='harvest_reminder',
+                subject=f"{crop.name} is nearly ready",
+                body=(
+                    f"{crop.name} is projected to mature around {projected:%a %d %b} "
+                    f"({progress['gdd']:g} growing degree days so far)."
+                ),
+                dedupe_key=f"harvest:{profile_id}:{crop_id}:{accumulator.started_on.isoformat()}",
+            ))
+    return messages
+
+
+def queue_reminders(day=None):
+    """Queue the day's planting (watering) and harvest reminders. Returns counts per kind."""
+    day = day or timezone.localdate()
+    planting = _planting_reminders(day)
+    harvest = _harvest_reminders(day)
+    with transaction.atomic():
+        enqueue(planting)
+        enqueue(harvest)
+    return {'planting_reminder': len(planting), 'harvest_reminder': len(harvest)}
+
+
+# ----------------------
+# Dispatcher
+# ----------------------
+class DispatchStats:
+    def __init__(self):
+        self.sent = 0
+        self.emails = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    def add(self, other):
+        for name in ('sent', 'emails', 'retried', 'failed', 'batches'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def backoff_seconds(attempts):
+    """Exponential delay before retry number `attempts`, with jitter"""
+    delay = min(settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(batch_size, lease_seconds):
+    """Lease up to `batch_size` due messages to a new token. Returns (token, messages)."""
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    free = Q(leased_until__isnull=True) | Q(leased_until__lt=now)
+    with transaction.atomic():
+        due = (
+            OutboxMessage.objects.filter(free, status='pending', available_at__lte=now)
+            .order_by('available_at', 'pk')
+            .values_list('pk', flat=True)
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due[:batch_size])
+        if ids:
+            # Re-checking the lease keeps this safe on databases without SKIP LOCKED
+            OutboxMessage.objects.filter(free, pk__in=ids).update(
+                lease_token=token, leased_until=now + timedelta(seconds=lease_seconds),
+            )
+    if not ids:
+        return token, []
+    return token, list(OutboxMessage.objects.filter(lease_token=token).order_by('recipient', 'pk'))
+
+
+def _compose(messages):
+    """One email for all of a recipient's messages"""
+    if len(messages) == 1:
+        subject, body = messages[0].subject, messages[0].body
+    else:
+        subject = f"{len(messages)} updates for your farm"
+        body = '\n\n----\n\n'.join(f"{message.subject}\n\n{message.body}" for message in messages)
+    return mail.EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [messages[0].recipient])
+
+
+def deliver(smtp, messages):
+    """
+    Send `messages` over the `smtp` connection, one email per recipient. Returns (sent messages, {message: error}); after a connection
+    failure the rest of the batch is returned as failed too.
+    """
+    groups = defaultdict(list)
+    for message in messages:
+        groups[message.recipient].append(message)
+
+    sent, failed = [], {}
+    pending = list(groups.values())
+    for index, group in enumerate(pending):
+        try:
+            # Opens on first use or after a failure; otherwise the connection stays up between batches
+            smtp.open()
+            smtp.send_messages([_compose(group)])
+            sent.extend(group)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+            failed.update({message: str(e) for message in group})
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning(f"SMTP connection failed: {e}")
+            smtp.close()
+            for rest in pending[index:]:
+                failed.update({message: f"Connection failed: {e}" for message in rest})
+            break
+    return sent, failed
+
+
+def finish(token, sent, failed):
+    """
+    Record a delivered batch: sent rows in one UPDATE, failures rescheduled
+    or given up in one UPDATE per (attempts, error). Every write is limited
+    to rows still holding `token`, so a worker whose lease ran out cannot
+    overwrite a row another worker has since claimed.
+    """
+    now = timezone.now()
+    if sent:
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in sent], lease_token=token).update(
+            status='sent', sent_at=now, attempts=F('attempts') + 1, lease_token='', leased_until=None, last_error='',
+        )
+    groups = defaultdict(list)
+    for message, error in failed.items():
+        message.attempts += 1
+        message.last_error = error[:1000]
+        message.lease_token = ''
+        message.leased_until = None
+        groups[(message.attempts, message.last_error)].append(message)
+    for (attempts, error), messages in groups.items():
+        if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            changes = {'status': 'failed'}
+        else:
+            # One jittered delay per group keeps this to a single UPDATE
+            changes = {'available_at': now + timedelta(seconds=backoff_seconds(attempts))}
+        for message in messages:
+            for field, value in changes.items():
+                setattr(message, field, value)
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in messages], lease_token=token).update(
+            attempts=attempts, last_error=error, lease_token='', leased_until=None, **changes,
+        )
+
+
+def _worker(batch_size, lease_seconds, keep_polling, poll_interval, stop):
+    stats = DispatchStats()
+    smtp = mail.get_connection(fail_silently=False)
+    try:
+        while not stop.is_set():
+            token, messages = claim(batch_size, lease_seconds)
+            if not messages:
+                if not keep_polling:
+                    break
+                stop.wait(poll_interval)
+                continue
+            sent, failed = deliver(smtp, messages)
+            finish(token, sent, failed)
+            stats.batches += 1
+            stats.sent += len(sent)
+            stats.emails += len({message.recipient for message in sent})
+            stats.failed += sum(1 for message in failed if message.status == 'failed')
+            stats.retried += sum(1 for message in failed if message.status == 'pending')
+    finally:
+        smtp.close()
+        connection.close()
+    return stats
+
+
+def dispatch(workers=None, batch_size=None, keep_polling=False, poll_interval=5.0, stop=None):
+    """
+    Deliver due messages with `workers` threads, each holding one SMTP
+    connection. Without `keep_polling` it returns once nothing is due.
+    """
+    workers = workers or settings.OUTBOX_DISPATCH_WORKERS
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    stop = stop or threading.Event()
+    start = time.perf_counter()
+    total = DispatchStats()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            submit(pool, _worker, batch_size, settings.OUTBOX_LEASE_SECONDS, keep_polling, poll_interval, stop)
+            for _ in range(workers)
+        ]
+        for future in futures:
+            total.add(future.result())
+    logger.info(f"Dispatched {total.sent} notifications in {time.perf_counter() - start:.2f}s")
+    return total
@@ -0,0 +1,150 @@
+"""
+Protection for upstream API calls.
+
+A token bucket caps the rate of outgoing requests and a circuit breaker
+stops calling an upstream that keeps failing, so workers fail fast instead
+of waiting out HTTP timeouts. Both are shared by every service instance in
+the process.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from requests.exceptions import RequestException
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(RequestException):
+    """Raised instead of calling upstream while the breaker is open or the rate limit is exhausted"""
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=0.0):
+        """Take a token, waiting at most `timeout` seconds for one. Returns False on failure."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Closed: calls flow and consecutive failures are counted.
+    Open: calls are refused until `reset_timeout` seconds have passed.
+    Half-open: a single trial call decides whether to close or re-open.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def release(self):
+        """Give back an allowed call that was never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed after successful trial call")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self._failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def upstream_guards(name):
+    """The process-wide (TokenBucket, CircuitBreaker) pair for the upstream called `name`"""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = (
+                TokenBucket(settings.UPSTREAM_RATE_LIMIT_PER_SECOND, settings.UPSTREAM_RATE_LIMIT_BURST),
+                CircuitBreaker(settings.UPSTREAM_BREAKER_FAILURES, settings.UPSTREAM_BREAKER_RESET_SECONDS),
+            )
+        return _guards[name]
+
+
+def guarded_get(session, name, url, **kwargs):
+    """
+    Issue `session.get(url, **kwargs)` through the rate limiter and circuit
+    breaker for `name`. Raises UpstreamUnavailable without touching the
+    network when either refuses the call; 5xx responses and transport
+    errors count as breaker failures.
+    """
+    limiter, breaker = upstream_guards(name)
+    if not breaker.allow():
+        raise UpstreamUnavailable(f"{name} circuit breaker is open")
+    if not limiter.acquire(settings.UPSTREAM_RATE_LIMIT_WAIT):
+        breaker.release()
+        raise UpstreamUnavailable(f"{name} rate limit exhausted")
+
+    recorded = False
+    try:
+        response = session.get(url, **kwargs)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        recorded = True
+    except RequestException:
+        breaker.record_failure()
+        recorded = True
+        raise
+    finally:
+        # Any other error says nothing about upstream health, but must not
+        # leave a half-open breaker waiting on a trial that never reports
+        if not recorded:
+            breaker.release()
+    return response
@@ -1,30 +1,209 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import User
-from .models import Crop, Location, WeatherData, UserProfile
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch
+from farmweather.utils import get_weather_emoji
+from .models import Crop, IrrigationSchedule, Location, WeatherData, UserProfile
+
+
+def _nullable(convert):
+    return lambda value: None if value is None else convert(value)
+
+
+# Field types whose to_representation is a plain type conversion
+VALUES_CONVERTERS = {
+    serializers.BooleanField: bool,
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.SlugField: str,
+    serializers.URLField: str,
+}
+if hasattr(serializers, 'BigIntegerField'):  # DRF 3.16+
+    VALUES_CONVERTERS[serializers.BigIntegerField] = int
+
+
+def _datetime_converter(field):
+    """ISO 8601 datetimes with the field's timezone resolved once rather than per value"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if not isinstance(output_format, str) or output_format.lower() != ISO_8601 or field_timezone is None:
+        return _nullable(field.to_representation)
+
+    def convert(value):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _values_converter(field):
+    """Plain function producing the same output as `field.to_representation`, or None"""
+    if getattr(field, 'coerce_to_string', False):
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return _nullable(lambda value: value)
+    if type(field) is serializers.DateTimeField:
+        return _datetime_converter(field)
+    if type(field) is serializers.DateField:
+        return _nullable(field.to_representation)
+    convert = VALUES_CONVERTERS.get(type(field))
+    return _nullable(convert) if convert else None
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """
+    Serializes querysets from `values_list()` rows instead of model
+    instances, converting each column with a plan compiled from the child
+    serializer's fields. The output is identical to the generic path, which
+    is still used for anything the plan cannot express.
+    """
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, models.QuerySet):
+            compiled = self.child.compile_values_plan()
+            if compiled is not None:
+                columns, plan = compiled
+                return [
+                    {name: convert(row[index]) for name, index, convert in plan}
+                    for row in data.values_list(*columns)
+                ]
+        return super().to_representation(data)
+
+
+class ValuesPlanMixin:
+    """
+    Lets a ModelSerializer be listed through ValuesListSerializer.
+    `values_computed` maps method sources to (column, function) pairs so
+    computed fields can be filled from a column without the instance.
+    """
+    values_computed = {}
+
+    def compile_values_plan(self):
+        """(columns, [(name, column index, converter)]) or None when unsupported"""
+        columns, plan = [], []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if field.source in self.values_computed:
+                column, convert = self.values_computed[field.source]
+            else:
+                try:
+                    column = self.Meta.model._meta.get_field(field.source).attname
+                except FieldDoesNotExist:
+                    return None
+                convert = _values_converter(field)
+                if convert is None:
+                    return None
+            if column not in columns:
+                columns.append(column)
+            plan.append((name, columns.index(column), convert))
+        return columns, plan
+
+
+class SparseFieldsMixin:
+    """
+    Narrows a ModelSerializer to the field names the view puts in the
+    `sparse_fields` context entry (None renders everything). Only the
+    top-level serializer is narrowed; nested serializers keep their fields.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('sparse_fields')
+        if selected is None or not self._is_top_level():
+            return fields
+        return {name: field for name, field in fields.items() if name in selected}
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def project_queryset(self, queryset, narrow=True):
+        """
+        Load only what the rendered fields need: their columns (when
+        `narrow`), joins for nested objects and prefetches for many-valued
+        relations. Returns `queryset` unchanged when a field's needs cannot
+        be worked out, e.g. a method or property source.
+        """
+        opts = self.Meta.model._meta
+        computed = getattr(self, 'values_computed', {})
+        only, select, prefetch = {opts.pk.name}, [], []
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            if field.source in computed:
+                only.add(opts.get_field(computed[field.source][0]).name)
+                continue
+            try:
+                model_field = opts.get_field(field.source.split('.')[0])
+            except FieldDoesNotExist:
+                return queryset
+            if model_field.many_to_many or model_field.one_to_many:
+                related_pks_only = (
+                    isinstance(field, serializers.ManyRelatedField)
+                    and isinstance(field.child_relation, serializers.PrimaryKeyRelatedField)
+                )
+                related = model_field.related_model
+                prefetch.append(Prefetch(
+                    model_field.name,
+                    queryset=related.objects.only(related._meta.pk.name) if related_pks_only else None,
+                ))
+            elif isinstance(field, serializers.BaseSerializer) or '.' in field.source:
+                only.add(model_field.name)
+                select.append(model_field.name)
+            else:
+                only.add(model_field.name)
+
+        if narrow:
+            queryset = queryset.only(*only)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     class Meta:
         model = UserProfile
         fields = '__all__'
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = '__all__'
 
-class WeatherDataSerializer(serializers.ModelSerializer):
+class WeatherDataSerializer(SparseFieldsMixin, ValuesPlanMixin, serializers.ModelSerializer):
     weather_emoji = serializers.CharField(source="get_weather_emoji", read_only=True)
+    values_computed = {"get_weather_emoji": ("weather_code", get_weather_emoji)}
     class Meta:
         model = WeatherData
         fields = '__all__'
+        list_serializer_class = ValuesListSerializer
 
-class CropSerializer(serializers.ModelSerializer):
+class CropSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Crop
         fields = '__all__'
+
+class IrrigationScheduleSerializer(serializers.ModelSerializer):
+    crop_name = serializers.CharField(source="crop.name", read_only=True)
+    class Meta:
+        model = IrrigationSchedule
+        fields = [
+            'crop', 'crop_name', 'location', 'next_watering', 'water_need_mm',
+            'rain_credit_mm', 'used_forecast', 'computed_at',
+        ]
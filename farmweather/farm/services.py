@@ -1,18 +1,94 @@
 import requests
 from django.conf import settings
 from  django.core.cache import cache
+from django.utils import timezone
 from datetime import datetime, timedelta
 import logging
 from requests.exceptions import RequestException
+from .et0 import add_et0
+from .hourly import HOURLY_SERIES, HourlyForecast
+from .instrumentation import timed
+from .resilience import guarded_get
 
 logger = logging.getLogger(__name__)
 
 class OpenMeteoService:
 
+    CURRENT_FIELDS = [
+        'temperature_2m',
+        'relative_humidity_2m',
+        'apparent_temperature',
+        'is_day',
+        'precipitation',
+        'weather_code',
+        'cloud_cover',
+        'pressure_msl',
+        'surface_pressure',
+        'wind_speed_10m',
+        'wind_direction_10m',
+        'wind_gusts_10m',
+    ]
+
+    DAILY_FORECAST_FIELDS = [
+        'temperature_2m_max',
+        'temperature_2m_min',
+        'apparent_temperature_max',
+        'apparent_temperature_min',
+        'precipitation_sum',
+        'precipitation_probability_max',
+        'weather_code',
+        'cloud_cover_mean',
+        'windspeed_10m_max',
+        'windgusts_10m_max',
+        'wind_direction_10m_dominant',
+        'uv_index_max',
+        # For reference evapotranspiration (farm/et0.py)
+        'shortwave_radiation_sum',
+        'relative_humidity_2m_mean',
+        'wind_speed_10m_mean',
+    ]
+
+    HOURLY_FORECAST_FIELDS = list(HOURLY_SERIES.values())
+
     def __init__(self):
         self.base_url = settings.OPENMETEO_BASE_URL
         self.geocoding_url = settings.GEOCODING_API_URL
 
+    def _get(self, url, params, timeout, upstream='open-meteo'):
+        """
+        Single choke point for upstream HTTP calls. Calls pass through the
+        shared rate limiter and circuit breaker and connect with a short
+        timeout, so an unhealthy upstream fails fast.
+        """
+        with timed('upstream'):
+            return guarded_get(
+                requests, upstream, url, params=params,
+                timeout=(settings.UPSTREAM_CONNECT_TIMEOUT, timeout),
+            )
+
+    def _stale_key(self, kind, latitude, longitude):
+        return f"weather:last_good:{kind}:{latitude}:{longitude}"
+
+    def _remember(self, kind, latitude, longitude, data):
+        """Keep the latest good payload for degraded mode"""
+        cache.set(self._stale_key(kind, latitude, longitude), {
+            'data': data,
+            'fetched_at': timezone.now().isoformat(),
+        }, settings.UPSTREAM_STALE_TTL)
+
+    def _last_known_good(self, kind, latitude, longitude):
+        """
+        Last successful payload marked as stale, or None. Served while the
+        upstream is failing instead of an error.
+        """
+        entry = cache.get(self._stale_key(kind, latitude, longitude))
+        if not entry:
+            return None
+        logger.warning(f"Serving stale {kind} weather for {latitude},{longitude} from {entry['fetched_at']}")
+        if isinstance(entry['data'], HourlyForecast):
+            return entry['data'].as_stale(entry['fetched_at'])
+        return {**entry['data'], 'stale': True, 'stale_since': entry['fetched_at']}
+
     def get_current_weather(self, latitude: float, longitude: float) -> dict:
 
         try:
@@ -20,52 +96,55 @@ class OpenMeteoService:
             params = {
                 'latitude': latitude,
                 'longitude': longitude,
-                'current' : [
-                    'temperature_2m',
-                    'relative_humidity_2m',
-                    'apparent_temperature',
-                    'is_day',
-                    'precipitation',
-                    'weather_code',
-                    'cloud_cover',
-                    'pressure_msl',
-                    'surface_pressure',
-                    'wind_speed_10m',
-                    'wind_direction_10m',
-                    'wind_gusts_10m',
-                ],
+                'current' : self.CURRENT_FIELDS,
                 'timezone': 'auto',
                 'forecast_days': 1,
             }
 
-            response = requests.get(url, params=params, timeout=10)
+            response = self._get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-
-            current = data.get('current', {})
-            return {
-                'temperature': current.get('temperature_2m'),
-                'humidity': current.get('relative_humidity_2m'),
-                'surface_pressure': current.get('surface_pressure'),
-                'apparent_temperature': current.get('apparent_temperature'),
-                'is_day': current.get('is_day') == 1,
-                'precipitation': current.get('precipitation'),
-                'weather_code': current.get('weather_code'),
-                'cloud_cover': current.get('cloud_cover'),
-                'pressure': current.get('pressure_msl') or current.get('surface_pressure'),
-                'wind_speed': current.get('wind_speed_10m'),
-                'wind_direction': current.get('wind_direction_10m'),
-                'wind_gusts': current.get('wind_gusts_10m'),
-                'timezone': data.get('timezone'),
-                'elevation': data.get('elevation'),
-                'time': current.get('time'),
-            }
+            current = self._parse_current_weather(response.json())
+            self._remember('current', latitude, longitude, current)
+            return current
         except requests.RequestException as e:
                     logger.error(f"Error fetching current weather: {e}")
-                    return None
+                    return self._last_known_good('current', latitude, longitude)
         except Exception as e:
             logger.error(f"Weather data processing error: {e}")
             return None
+
+    def get_current_weather_batch(self, coordinates: list[tuple[float, float]]) -> list[dict | None]:
+        """
+        Fetch current weather for many coordinates using Open-Meteo's
+        multi-location requests. Results line up with `coordinates`;
+        entries are None where a chunk failed.
+        """
+        return self._fetch_batch(
+            coordinates,
+            {'current': self.CURRENT_FIELDS, 'timezone': 'auto', 'forecast_days': 1},
+            self._parse_current_weather,
+            'current',
+        )
+
+    def _parse_current_weather(self, data: dict) -> dict:
+        current = data.get('current', {})
+        return {
+            'temperature': current.get('temperature_2m'),
+            'humidity': current.get('relative_humidity_2m'),
+            'surface_pressure': current.get('surface_pressure'),
+            'apparent_temperature': current.get('apparent_temperature'),
+            'is_day': current.get('is_day') == 1,
+            'precipitation': current.get('precipitation'),
+            'weather_code': current.get('weather_code'),
+            'cloud_cover': current.get('cloud_cover'),
+            'pressure': current.get('pressure_msl') or current.get('surface_pressure'),
+            'wind_speed': current.get('wind_speed_10m'),
+            'wind_direction': current.get('wind_direction_10m'),
+            'wind_gusts': current.get('wind_gusts_10m'),
+            'timezone': data.get('timezone'),
+            'elevation': data.get('elevation'),
+            'time': current.get('time'),
+        }
         
         
     def get_weather_forecast(self, latitude: float, longitude: float, days: int = 7) -> dict:
@@ -74,63 +153,131 @@ class OpenMeteoService:
             params = {
                 'latitude': latitude,
                 'longitude': longitude,
-                'daily': [
-                    'temperature_2m_max',
-                    'temperature_2m_min',
-                    'apparent_temperature_max',
-                    'apparent_temperature_min',
-                    'precipitation_sum',
-                    'precipitation_probability_max',
-                    'weather_code',
-                    'cloud_cover_mean',
-                    'windspeed_10m_max',
-                    'windgusts_10m_max',
-                    'wind_direction_10m_dominant',
-                    'uv_index_max',
-                ],
+                'daily': self.DAILY_FORECAST_FIELDS,
                 'timezone': 'auto',
                 'forecast_days': min(days, 16),
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self._get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            forecast_data = self._parse_forecast(response.json())
+            self._remember(f'forecast_{days}', latitude, longitude, forecast_data)
+            return forecast_data
+        
+        except requests.RequestException as e:
+            logger.error(f"Error fetching weather forecast: {e}")
+            return self._last_known_good(f'forecast_{days}', latitude, longitude)
+        except Exception as e:
+            logger.error(f"Forecast data processing error: {e}")
+            return None
 
-            daily = data.get('daily', {})
-            dates = daily.get('time', [])
+    def get_weather_forecast_batch(self, coordinates: list[tuple[float, float]], days: int = 7) -> list[dict | None]:
+        """Multi-location counterpart of get_weather_forecast"""
+        return self._fetch_batch(
+            coordinates,
+            {'daily': self.DAILY_FORECAST_FIELDS, 'timezone': 'auto', 'forecast_days': min(days, 16)},
+            self._parse_forecast,
+            f'forecast_{days}',
+        )
 
-            forecast_data = {
-                'timezone': data.get('timezone'),
-                'elevation': data.get('elevation'),
-                'days': []
+    def _parse_forecast(self, data: dict) -> dict:
+        daily = data.get('daily', {})
+        dates = daily.get('time', [])
+
+        forecast_data = {
+            'timezone': data.get('timezone'),
+            'elevation': data.get('elevation'),
+            'days': []
+        }
+        
+
+        for i, date_str in enumerate(dates):
+            day_data = {
+                'date': date_str,
+                'temperature_max': daily.get('temperature_2m_max', [None]*len(dates))[i],
+                'temperature_min': daily.get('temperature_2m_min', [None]*len(dates))[i],
+                'apparent_temperature_max': daily.get('apparent_temperature_max', [None]*len(dates))[i],
+                'apparent_temperature_min': daily.get('apparent_temperature_min', [None]*len(dates))[i],
+                'precipitation_sum': daily.get('precipitation_sum', [0]*len(dates))[i],
+                'precipitation_probability': daily.get('precipitation_probability_max', [0]*len(dates))[i],
+                'weather_code': daily.get('weather_code', [None]*len(dates))[i],
+                'cloud_cover_mean': daily.get('cloud_cover_mean', [None]*len(dates))[i],
+                'wind_speed_max': daily.get('windspeed_10m_max', [None]*len(dates))[i],
+                'wind_gusts_max': daily.get('windgusts_10m_max', [None]*len(dates))[i],
+                'wind_direction': daily.get('wind_direction_10m_dominant', [None]*len(dates))[i],
+                'uv_index': daily.get('uv_index_max', [None]*len(dates))[i],
+                'shortwave_radiation_sum': daily.get('shortwave_radiation_sum', [None]*len(dates))[i],
+                'humidity_mean': daily.get('relative_humidity_2m_mean', [None]*len(dates))[i],
+                'wind_speed_mean': daily.get('wind_speed_10m_mean', [None]*len(dates))[i],
             }
-            
+            forecast_data['days'].append(day_data)
 
-            for i, date_str in enumerate(dates):
-                day_data = {
-                    'date': date_str,
-                    'temperature_max': daily.get('temperature_2m_max', [None]*len(dates))[i],
-                    'temperature_min': daily.get('temperature_2m_min', [None]*len(dates))[i],
-                    'apparent_temperature_max': daily.get('apparent_temperature_max', [None]*len(dates))[i],
-                    'apparent_temperature_min': daily.get('apparent_temperature_min', [None]*len(dates))[i],
-                    'precipitation_sum': daily.get('precipitation_sum', [0]*len(dates))[i],
-                    'precipitation_probability': daily.get('precipitation_probability_max', [0]*len(dates))[i],
-                    'weather_code': daily.get('weather_code', [None]*len(dates))[i],
-                    'cloud_cover_mean': daily.get('cloud_cover_mean', [None]*len(dates))[i],
-                    'wind_speed_max': daily.get('windspeed_10m_max', [None]*len(dates))[i],
-                    'wind_gusts_max': daily.get('windgusts_10m_max', [None]*len(dates))[i],
-                    'wind_direction': daily.get('wind_direction_10m_dominant', [None]*len(dates))[i],
-                    'uv_index': daily.get('uv_index_max', [None]*len(dates))[i]
-                }
-                forecast_data['days'].append(day_data)
+        # Cached with the forecast, so ET0 is computed once per fetch
+        add_et0(forecast_data['days'], data.get('latitude'), data.get('elevation'))
+        return forecast_data
+
+    def get_hourly_forecast(self, latitude: float, longitude: float, days: int = 7) -> HourlyForecast | None:
+        """Hourly forecast as compact typed arrays (see farm/hourly.py)"""
+        try:
+            url = f"{self.base_url}/forecast"
+            params = {
+                'latitude': latitude,
+                'longitude': longitude,
+                'hourly': self.HOURLY_FORECAST_FIELDS,
+                'timezone': 'auto',
+                'timeformat': 'unixtime',
+                'forecast_days': min(days, 16),
+            }
+            response = self._get(url, params=params, timeout=10)
+            response.raise_for_status()
+            forecast = HourlyForecast.from_response(response.json())
+            self._remember(f'hourly_{days}', latitude, longitude, forecast)
+            return forecast
 
-            return forecast_data
-        
         except requests.RequestException as e:
-            logger.error(f"Error fetching weather forecast: {e}")
-            return None
+            logger.error(f"Error fetching hourly forecast: {e}")
+            return self._last_known_good(f'hourly_{days}', latitude, longitude)
         except Exception as e:
-            logger.error(f"Forecast data processing error: {e}")
+            logger.error(f"Hourly forecast processing error: {e}")
             return None
+
+    def _fetch_batch(self, coordinates, params, parse, kind) -> list[dict | None]:
+        """
+        Request `coordinates` in chunks of OPENMETEO_BATCH_SIZE, one upstream
+        call per chunk, and parse every location block in the response.
+        Failed chunks fall back to the last known good payloads.
+        """
+        results = []
+        chunk_size = settings.OPENMETEO_BATCH_SIZE
+        for start in range(0, len(coordinates), chunk_size):
+            chunk = coordinates[start:start + chunk_size]
+            try:
+                response = self._get(f"{self.base_url}/forecast", params={
+                    **params,
+                    'latitude': ','.join(str(lat) for lat, _ in chunk),
+                    'longitude': ','.join(str(lon) for _, lon in chunk),
+                }, timeout=15)
+                response.raise_for_status()
+                data = response.json()
+                # A single coordinate comes back as an object, several as a list
+                blocks = data if isinstance(data, list) else [data]
+                if len(blocks) != len(chunk):
+                    # Blocks are matched to coordinates by position, so a short answer cannot be placed
+                    logger.error(f"Weather batch returned {len(blocks)} locations for {len(chunk)} requested")
+                    results.extend(self._last_known_good(kind, lat, lon) for lat, lon in chunk)
+                    continue
+                parsed = [parse(block) for block in blocks]
+                cache.set_many({
+                    self._stale_key(kind, lat, lon): {'data': item, 'fetched_at': timezone.now().isoformat()}
+                    for (lat, lon), item in zip(chunk, parsed)
+                }, settings.UPSTREAM_STALE_TTL)
+                results.extend(parsed)
+            except requests.RequestException as e:
+                logger.error(f"Error fetching weather batch: {e}")
+                results.extend(self._last_known_good(kind, lat, lon) for lat, lon in chunk)
+            except Exception as e:
+                logger.error(f"Weather batch processing error: {e}")
+                results.extend([None] * len(chunk))
+        return results
     
     def get_historical_weather(self, latitude: float, longitude: float, start_date, end_date) -> dict | None:
     
@@ -146,12 +293,15 @@ class OpenMeteoService:
                     'temperature_2m_max',
                     'temperature_2m_min',
                     'precipitation_sum',
-                    'wind_speed_10m_max'
+                    'wind_speed_10m_max',
+                    'shortwave_radiation_sum',
+                    'relative_humidity_2m_mean',
+                    'wind_speed_10m_mean',
                 ],
                 'timezone': 'auto'
             }
 
-            response = requests.get(url, params=params, timeout=15)
+            response = self._get(url, params=params, timeout=15)
             response.raise_for_status()
             data = response.json()
 
@@ -171,10 +321,15 @@ class OpenMeteoService:
                     'temperature_max': daily.get('temperature_2m_max', [None]*len(dates))[i],
                     'temperature_min': daily.get('temperature_2m_min', [None]*len(dates))[i],
                     'precipitation_sum': daily.get('precipitation_sum', [0]*len(dates))[i],
-                    'wind_speed_max': daily.get('wind_speed_10m_max', [None]*len(dates))[i]
+                    'wind_speed_max': daily.get('wind_speed_10m_max', [None]*len(dates))[i],
+                    'shortwave_radiation_sum': daily.get('shortwave_radiation_sum', [None]*len(dates))[i],
+                    'humidity_mean': daily.get('relative_humidity_2m_mean', [None]*len(dates))[i],
+                    'wind_speed_mean': daily.get('wind_speed_10m_mean', [None]*len(dates))[i],
                 }
                 historical_data['days'].append(day_data)
 
+            add_et0(historical_data['days'], latitude, historical_data['elevation'])
+
             return historical_data
 
         except requests.RequestException as e:
@@ -183,4 +338,42 @@ class OpenMeteoService:
         except Exception as e:
             logger.error(f"Historical weather data processing error: {e}")
             return None
-        
+
+    def geocode(self, name: str, count: int = 10, language: str = 'en') -> list[dict] | None:
+        """
+        Look up places matching `name` with the Open-Meteo geocoding API.
+        Returns a list of places (possibly empty) or None on failure.
+        """
+        try:
+            params = {
+                'name': name,
+                'count': count,
+                'language': language,
+                'format': 'json',
+            }
+            response = self._get(self.geocoding_url, params=params, timeout=10, upstream='open-meteo-geocoding')
+            response.raise_for_status()
+            data = response.json()
+
+            return [
+                {
+                    'id': place.get('id'),
+                    'name': place.get('name'),
+                    'latitude': place.get('latitude'),
+                    'longitude': place.get('longitude'),
+                    'elevation': place.get('elevation'),
+                    'timezone': place.get('timezone', 'UTC'),
+                    'country': place.get('country', ''),
+                    'country_code': place.get('country_code', ''),
+                    'admin1': place.get('admin1', ''),
+                    'population': place.get('population'),
+                }
+                for place in data.get('results', [])
+            ]
+
+        except requests.RequestException as e:
+            logger.error(f"Geocoding API error: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Geocoding data processing error: {e}")
+            return None
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .gdd import BASE_TEMPS_CACHE_KEY, accumulate_readings
+from .models import Crop, WeatherData
+
+
+@receiver(post_save, sender=WeatherData)
+def accumulate_gdd(sender, instance, raw=False, **kwargs):
+    """Fold each saved reading into its location's GDD accumulators once it is committed"""
+    if raw:
+        return
+    transaction.on_commit(lambda: accumulate_readings([instance]))
+
+
+@receiver(post_save, sender=Crop)
+def refresh_gdd_base_temps(sender, instance, **kwargs):
+    """A new base temperature needs its own accumulators from the next reading on"""
+    cache.delete(BASE_TEMPS_CACHE_KEY)
@@ -0,0 +1,106 @@
+"""
+Local SMTP stand-in.
+
+Speaks enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for
+Django's SMTP email backend, counts what it accepts and discards it, with
+configurable per-message latency and a rate of transient 451 rejections.
+Point EMAIL_HOST/EMAIL_PORT at it to run dispatcher experiments offline.
+"""
+import logging
+import random
+import socket
+import socketserver
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPStandInConfig:
+    def __init__(self, latency_ms=0, reject_rate=0.0, keep_messages=False):
+        self.latency_ms = latency_ms
+        self.reject_rate = reject_rate
+        self.keep_messages = keep_messages
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # Multi-line replies go out as separate writes; avoid Nagle/delayed-ACK stalls
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.count('connections')
+        self.reply('220 farmweather SMTP stand-in ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].decode('ascii', 'replace').upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250-stand-in' if verb == 'EHLO' else '250 stand-in')
+                if verb == 'EHLO':
+                    self.reply('250 8BITMIME')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if server.config.reject_rate and random.random() < server.config.reject_rate:
+                    server.count('rejected')
+                    self.reply('451 4.3.0 Injected stand-in failure, try again later')
+                else:
+                    recipients.append(line[5:].decode('utf-8', 'replace').strip())
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for data_line in self.rfile:
+                    if data_line in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(data_line)
+                if server.config.latency_ms:
+                    time.sleep(server.config.latency_ms / 1000)
+                server.accept(recipients, b''.join(data))
+                self.reply('250 OK queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStandInServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, SMTPStandInHandler)
+        self.config = config
+        self.stats = {'connections': 0, 'messages': 0, 'recipients': 0, 'rejected': 0}
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def accept(self, recipients, data):
+        with self._lock:
+            self.stats['messages'] += 1
+            self.stats['recipients'] += len(recipients)
+            if self.config.keep_messages:
+                self.messages.append((recipients, data))
+
+
+def make_server(host, port, config):
+    return SMTPStandInServer((host, port), config)
@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Open-Meteo and MapMyCrop APIs.
+
+Serves the `/forecast` and `/archive` endpoints that OpenMeteoService uses
+and the MapMyCrop `/monitor` endpoint, with synthetic payloads from
+`farm.synthetic` and configurable latency, error rate and payload size.
+Point OPEN_METEO_BASE_URL at it (and MAPMYCROP_BASE_URL at its /monitor)
+to run performance experiments offline.
+"""
+import json
+import logging
+import random
+import socket
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .synthetic import archive_response, forecast_response, monitor_response
+
+logger = logging.getLogger(__name__)
+
+
+class StandInConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, padding_bytes=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.padding_bytes = padding_bytes
+
+
+class OpenMeteoStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; avoid Nagle/delayed-ACK stalls
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        config = self.server.config
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if config.error_rate and random.random() < config.error_rate:
+            return self.send_json(503, {'error': True, 'reason': 'Injected stand-in failure'})
+
+        url = urlparse(self.path)
+        # Open-Meteo takes repeated list params as comma-separated values
+        params = {key: ','.join(values) for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+        try:
+            if path.endswith('/forecast'):
+                payload = forecast_response(params)
+            elif path.endswith('/archive'):
+                payload = archive_response(params)
+            elif path.endswith('/monitor'):
+                payload = monitor_response(params)
+            else:
+                return self.send_json(404, {'error': True, 'reason': f'No stand-in for {url.path}'})
+        except (KeyError, ValueError) as e:
+            return self.send_json(400, {'error': True, 'reason': f'Invalid parameters: {e}'})
+
+        if config.padding_bytes and isinstance(payload, dict):
+            payload['padding'] = 'x' * config.padding_bytes
+        self.send_json(200, payload)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host, port, config):
+    server = ThreadingHTTPServer((host, port), OpenMeteoStandInHandler)
+    server.daemon_threads = True
+    server.config = config
+    return server
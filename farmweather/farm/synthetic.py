@@ -0,0 +1,179 @@
+"""
+Deterministic synthetic Open-Meteo payloads.
+
+Used by the benchmark command and anything else that must exercise the
+weather code paths without touching the network. Values are seeded from
+the coordinates so the same request always yields the same payload.
+"""
+import math
+import random
+from datetime import date, datetime, timedelta, timezone
+
+WEATHER_CODES = [0, 1, 2, 3, 45, 51, 61, 63, 80, 95]
+
+
+def _rng(*seed):
+    return random.Random(hash(tuple(round(float(s), 4) for s in seed)))
+
+
+def _coordinates(params):
+    """Split Open-Meteo's comma-separated multi-location coordinates"""
+    latitudes = [float(v) for v in str(params.get('latitude', 0)).split(',')]
+    longitudes = [float(v) for v in str(params.get('longitude', 0)).split(',')]
+    return list(zip(latitudes, longitudes))
+
+
+def current_block(latitude, longitude):
+    rng = _rng(latitude, longitude)
+    base = 25 - abs(latitude) / 3
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'timezone': 'UTC',
+        'elevation': round(rng.uniform(0, 1800), 1),
+        'current': {
+            'time': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:00'),
+            'temperature_2m': round(base + rng.uniform(-5, 5), 1),
+            'relative_humidity_2m': rng.randint(20, 95),
+            'apparent_temperature': round(base + rng.uniform(-7, 5), 1),
+            'is_day': 1,
+            'precipitation': round(max(0.0, rng.gauss(0.5, 1.5)), 1),
+            'weather_code': rng.choice(WEATHER_CODES),
+            'cloud_cover': rng.randint(0, 100),
+            'pressure_msl': round(rng.uniform(995, 1030), 1),
+            'surface_pressure': round(rng.uniform(850, 1020), 1),
+            'wind_speed_10m': round(rng.uniform(0, 40), 1),
+            'wind_direction_10m': rng.randint(0, 359),
+            'wind_gusts_10m': round(rng.uniform(5, 70), 1),
+        },
+    }
+
+
+def daily_block(latitude, longitude, start, days):
+    rng = _rng(latitude, longitude, start.toordinal())
+    base = 25 - abs(latitude) / 3
+    dates = [start + timedelta(days=i) for i in range(days)]
+    highs = [round(base + 6 * math.sin(d.toordinal() / 58.0) + rng.uniform(-3, 3), 1) for d in dates]
+    lows = [round(high - rng.uniform(6, 14), 1) for high in highs]
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'timezone': 'UTC',
+        'elevation': round(rng.uniform(0, 1800), 1),
+        'daily': {
+            'time': [d.isoformat() for d in dates],
+            'temperature_2m_max': highs,
+            'temperature_2m_min': lows,
+            'apparent_temperature_max': [round(h + rng.uniform(-2, 2), 1) for h in highs],
+            'apparent_temperature_min': [round(l + rng.uniform(-2, 2), 1) for l in lows],
+            'precipitation_sum': [round(max(0.0, rng.gauss(1.5, 4)), 1) for _ in dates],
+            'precipitation_probability_max': [rng.randint(0, 100) for _ in dates],
+            'weather_code': [rng.choice(WEATHER_CODES) for _ in dates],
+            'cloud_cover_mean': [rng.randint(0, 100) for _ in dates],
+            'windspeed_10m_max': [round(rng.uniform(5, 45), 1) for _ in dates],
+            'windgusts_10m_max': [round(rng.uniform(10, 80), 1) for _ in dates],
+            'wind_direction_10m_dominant': [rng.randint(0, 359) for _ in dates],
+            'uv_index_max': [round(rng.uniform(0, 12), 1) for _ in dates],
+            'wind_speed_10m_max': [round(rng.uniform(5, 45), 1) for _ in dates],
+            'wind_speed_10m_mean': [round(rng.uniform(3, 25), 1) for _ in dates],
+            'shortwave_radiation_sum': [round(rng.uniform(5, 28), 2) for _ in dates],
+            'relative_humidity_2m_mean': [rng.randint(30, 90) for _ in dates],
+        },
+    }
+
+
+def hourly_block(latitude, longitude, start, days, unixtime=False):
+    rng = _rng(latitude, longitude, start.toordinal(), 1)
+    base = 25 - abs(latitude) / 3
+    first = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+    times = [first + timedelta(hours=i) for i in range(days * 24)]
+    # Daily cycle peaking mid-afternoon
+    temperatures = [round(base + 6 * math.sin((t.hour - 9) * math.pi / 12) + rng.uniform(-1.5, 1.5), 1) for t in times]
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'timezone': 'UTC',
+        'utc_offset_seconds': 0,
+        'elevation': round(rng.uniform(0, 1800), 1),
+        'hourly': {
+            'time': [int(t.timestamp()) if unixtime else t.strftime('%Y-%m-%dT%H:%M') for t in times],
+            'temperature_2m': temperatures,
+            'relative_humidity_2m': [rng.randint(20, 100) for _ in times],
+            'precipitation': [round(max(0.0, rng.gauss(-0.5, 1.5)), 1) for _ in times],
+            'precipitation_probability': [rng.randint(0, 100) for _ in times],
+            'wind_speed_10m': [round(rng.uniform(0, 40), 1) for _ in times],
+            'wind_gusts_10m': [round(rng.uniform(5, 70), 1) for _ in times],
+            'wind_direction_10m': [rng.randint(0, 359) for _ in times],
+            'soil_temperature_0cm': [round(t + rng.uniform(-2, 3), 1) for t in temperatures],
+            'soil_temperature_6cm': [round(t * 0.8 + 3, 1) for t in temperatures],
+        },
+    }
+
+
+def forecast_response(params):
+    """Payload for /forecast, honouring `current`/`daily`/`hourly` and multi-location requests"""
+    blocks = []
+    for latitude, longitude in _coordinates(params):
+        block = {}
+        if params.get('current'):
+            block.update(current_block(latitude, longitude))
+        if params.get('daily'):
+            days = int(params.get('forecast_days', 7))
+            block.update(daily_block(latitude, longitude, date.today(), days))
+        if params.get('hourly'):
+            days = int(params.get('forecast_days', 7))
+            unixtime = params.get('timeformat') == 'unixtime'
+            block.update(hourly_block(latitude, longitude, date.today(), days, unixtime))
+        blocks.append(block)
+    return blocks if len(blocks) > 1 else blocks[0]
+
+
+def archive_response(params):
+    """Payload for /archive between start_date and end_date inclusive"""
+    start = date.fromisoformat(params['start_date'])
+    end = date.fromisoformat(params['end_date'])
+    latitude, longitude = _coordinates(params)[0]
+    return daily_block(latitude, longitude, start, (end - start).days + 1)
+
+
+def monitor_response(params):
+    """Payload for the MapMyCrop /monitor endpoint"""
+    latitude, longitude = float(params['lat']), float(params['lon'])
+    rng = _rng(latitude, longitude, date.today().toordinal())
+    ndvi = round(rng.uniform(0.1, 0.9), 2)
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'ndvi': ndvi,
+        'crop_health': 'good' if ndvi >= 0.6 else 'moderate' if ndvi >= 0.3 else 'poor',
+        'timestamp': date.today().isoformat(),
+    }
+
+
+def response_for(url, params):
+    """Route a request URL to the matching synthetic payload"""
+    if url.rstrip('/').endswith('/archive'):
+        return archive_response(params)
+    if url.rstrip('/').endswith('/monitor'):
+        return monitor_response(params)
+    return forecast_response(params)
+
+
+class SyntheticResponse:
+    """Minimal stand-in for requests.Response"""
+
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+def synthetic_get(service, url, params, timeout):
+    """Drop-in replacement for OpenMeteoService._get"""
+    return SyntheticResponse(response_for(url, params))
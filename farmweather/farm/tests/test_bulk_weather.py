@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from farmweather.farm.models import Location
+from farmweather.farm.services import OpenMeteoService
+
+
+class BulkWeatherEndpointTests(TestCase):
+    url = '/locations/bulk_weather/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.client.force_login(self.user)
+        self.location = Location.objects.create(
+            user=self.user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+
+    def test_non_object_bodies_are_rejected(self):
+        for body in ([1, 2], 5, 'ids', {'ids': '12'}, {'ids': 3}):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+    @mock.patch.object(Location, 'get_bulk_weather')
+    def test_reports_found_and_missing_ids(self, bulk):
+        bulk.return_value = {self.location.pk: {'current_weather': {'temperature': 20}, 'forecast': None}}
+        response = self.client.post(
+            self.url, {'ids': [self.location.pk, 999, self.location.pk]}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['locations']], [self.location.pk])
+        self.assertEqual(response.json()['not_found'], [999])
+
+    def test_query_string_ids_must_be_integers(self):
+        self.assertEqual(self.client.get(self.url, {'ids': '1,x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+@override_settings(OPENMETEO_BATCH_SIZE=2)
+class FetchBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.service = OpenMeteoService()
+
+    def respond(self, *bodies):
+        responses = [mock.Mock(**{'json.return_value': body}) for body in bodies]
+        return mock.patch.object(OpenMeteoService, '_get', side_effect=responses)
+
+    def block(self, temperature):
+        return {'current': {'temperature_2m': temperature}}
+
+    def test_blocks_line_up_with_coordinates(self):
+        with self.respond([self.block(1), self.block(2)], self.block(3)) as get:
+            results = self.service.get_current_weather_batch([(1, 1), (2, 2), (3, 3)])
+        self.assertEqual([result['temperature'] for result in results], [1, 2, 3])
+        self.assertEqual(get.call_count, 2)
+
+    def test_short_response_fails_the_chunk(self):
+        self.service._remember('current', 2, 2, {'temperature': 20})
+        with self.respond([self.block(1)], self.block(3)):
+            with self.assertLogs('farmweather.farm.services', 'ERROR'):
+                results = self.service.get_current_weather_batch([(1, 1), (2, 2), (3, 3)])
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1]['temperature'], 20)
+        self.assertTrue(results[1]['stale'])
+        self.assertEqual(results[2]['temperature'], 3)
+        # Nothing from the short answer is remembered under the wrong coordinates
+        self.assertIsNone(cache.get(self.service._stale_key('current', 1, 1)))
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from farmweather.services.climate_classifier import (
+    DEFAULT_ZONE, MISSING_ZONE, classify_climate, classify_climate_batch, compile_rules,
+)
+
+
+class ClimateClassifierTests(SimpleTestCase):
+    def test_batch_matches_single_classification(self):
+        rows = [(33, 10, 10), (26, 50, 90), (20, 50, 50), (10, 1, 1), (35, 10, 90)]
+        result = classify_climate_batch(*zip(*rows))
+        expected = [
+            classify_climate({'temperature': t, 'rainfall': r, 'humidity': h}) for t, r, h in rows
+        ]
+        self.assertEqual(list(result.labels), expected)
+        # The first matching rule wins
+        self.assertEqual(expected[-1], 'High drought risk')
+
+    def test_missing_values_and_counts(self):
+        result = classify_climate_batch([None, 10.0], [1.0, float('nan')], [1.0, 1.0])
+        self.assertEqual(list(result.labels), [MISSING_ZONE, MISSING_ZONE])
+        self.assertEqual(result.counts[MISSING_ZONE], 2)
+        self.assertEqual(result.counts[DEFAULT_ZONE], 0)
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            classify_climate_batch([1.0], [1.0, 2.0], [1.0])
+
+    def test_compile_rejects_unknown_operator(self):
+        with self.assertRaises(ValueError):
+            compile_rules([('Zone', [('temperature', '!=', 1)])])
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from farmweather.farm.models import Location
+from farmweather.farm.services import OpenMeteoService
+
+CURRENT = {'temperature': 21.5, 'humidity': 60, 'weather_code': 1, 'time': '2026-06-01T12:00'}
+
+
+@mock.patch('time.time', return_value=1000.0)
+@mock.patch.object(OpenMeteoService, 'get_current_weather', return_value=CURRENT)
+class ConditionalWeatherTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('grower')
+        self.client.force_login(self.user)
+        self.location = Location.objects.create(
+            user=self.user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        self.url = f'/locations/{self.location.pk}/current_weather/'
+
+    def test_first_response_carries_etag_and_max_age(self, fetch, clock):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['temperature'], 21.5)
+        self.assertRegex(response['ETag'], r'^"[0-9a-f]{40}"$')
+        self.assertEqual(response['Cache-Control'], 'private, max-age=600')
+
+        # max-age counts down to the cache expiry
+        clock.return_value = 1450.0
+        self.assertEqual(self.client.get(self.url)['Cache-Control'], 'private, max-age=150')
+
+    def test_matching_validators_get_304_without_a_body(self, fetch, clock):
+        etag = self.client.get(self.url)['ETag']
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response['Cache-Control'], 'private, max-age=600')
+        fetch.assert_called_once()
+
+    def test_other_validators_get_the_body(self, fetch, clock):
+        self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"0000"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['temperature'], 21.5)
+
+    def test_star_without_cached_data_gets_the_body(self, fetch, clock):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        fetch.assert_called_once()
+
+    def test_changed_data_gets_a_fresh_etag(self, fetch, clock):
+        old = self.client.get(self.url)['ETag']
+        self.location._cache_weather(self.location.get_cache_key('current'), {**CURRENT, 'temperature': 25.0}, 600)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=old)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['temperature'], 25.0)
+        self.assertNotEqual(response['ETag'], old)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_stale_fallback_is_not_validated(self, fetch, clock):
+        fetch.return_value = {**CURRENT, 'stale': True, 'stale_since': '2026-06-01T10:00:00'}
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,135 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from farmweather.farm.crop_catalogue import load_crops, parse_rows
+from farmweather.farm.models import Crop
+
+
+def crop_row(name, **fields):
+    return {
+        'name': name, 'category': 'vegetable', 'optimal_temp_min': 10, 'optimal_temp_max': 30,
+        'optimal_rainfall_min': 20, 'optimal_rainfall_max': 100, 'soil_type': 'loam',
+        'planting_season': 'spring', 'days_to_maturity': 90, 'spacing_cm': 30, **fields,
+    }
+
+
+def companions_of(name):
+    return set(Crop.objects.get(name=name).companion_plants.values_list('name', flat=True))
+
+
+class ParseRowsTests(SimpleTestCase):
+    def test_csv_and_json(self):
+        self.assertEqual(parse_rows('name,soil_type\nKale,loam\n', 'csv'), [{'name': 'Kale', 'soil_type': 'loam'}])
+        self.assertEqual(parse_rows('{"crops": [{"name": "Kale"}]}', 'json'), [{'name': 'Kale'}])
+
+    def test_json_scalar_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_rows('"kale"', 'json')
+
+
+class LoadCropsTests(TestCase):
+    def test_loads_rows_and_parses_choice_labels(self):
+        result = load_crops([crop_row('Kale', soil_type='LOAM', planting_season='Year Round', drought_tolerance='High')])
+        self.assertEqual(result, {'crops': 1, 'companions': 0, 'errors': []})
+        kale = Crop.objects.get(name='Kale')
+        self.assertEqual((kale.soil_type, kale.planting_season, kale.drought_tolerance), ('loam', 'year_round', 'high'))
+        self.assertEqual(kale.water_frequency_days, 3)
+
+    def test_field_validation(self):
+        rows = [
+            crop_row('Kale', soil_type='lava'),
+            crop_row('Leek', optimal_temp_min=40),
+            {'name': 'Pea'},
+            crop_row('Kale'),
+            crop_row('Kale'),
+        ]
+        result = load_crops(rows)
+        self.assertEqual(result['crops'], 0)
+        errors = {error['row']: error['errors'] for error in result['errors']}
+        self.assertIn('soil_type', errors[1])
+        self.assertIn('optimal_temp_min', errors[2])
+        self.assertIn('days_to_maturity', errors[3])
+        self.assertEqual(errors[5], {'name': 'Duplicate of row 4.'})
+        self.assertFalse(Crop.objects.exists())
+
+    def test_non_object_rows_are_row_errors(self):
+        result = load_crops([[1, 'x'], crop_row('Kale')], partial=True)
+        self.assertEqual(result['crops'], 1)
+        self.assertEqual(result['errors'], [{'row': 1, 'errors': {'non_field_errors': 'Expected an object of crop fields.'}}])
+
+    def test_partial_loads_the_valid_rows(self):
+        result = load_crops([crop_row('Kale'), crop_row('Leek', spacing_cm='wide')], partial=True)
+        self.assertEqual(result['crops'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [2])
+        self.assertTrue(Crop.objects.filter(name='Kale').exists())
+
+    def test_rerun_is_idempotent(self):
+        rows = [crop_row('Kale', companion_plants='Leek'), crop_row('Leek', companion_plants=['Kale'])]
+        load_crops(rows)
+        ids = dict(Crop.objects.values_list('name', 'id'))
+        result = load_crops(rows)
+        self.assertEqual(result, {'crops': 2, 'companions': 2, 'errors': []})
+        self.assertEqual(dict(Crop.objects.values_list('name', 'id')), ids)
+        self.assertEqual(Crop.companion_plants.through.objects.count(), 2)
+
+    def test_reimport_keeps_columns_the_file_leaves_out(self):
+        load_crops([crop_row('Kale', water_frequency_days=7, growing_tips='Mulch well')])
+        row = crop_row('Kale', spacing_cm=45)
+        result = load_crops([row, crop_row('Leek', water_frequency_days=5)])
+        self.assertEqual(result['errors'], [])
+        kale = Crop.objects.get(name='Kale')
+        self.assertEqual((kale.spacing_cm, kale.water_frequency_days, kale.growing_tips), (45, 7, 'Mulch well'))
+        self.assertEqual(Crop.objects.get(name='Leek').water_frequency_days, 5)
+
+    def test_companions_sync_and_stale_edges_are_deleted(self):
+        load_crops([crop_row('Bean'), crop_row('Corn'), crop_row('Squash')])
+        load_crops([crop_row('Corn', companion_plants='Bean;Squash')])
+        self.assertEqual(companions_of('Corn'), {'Bean', 'Squash'})
+
+        result = load_crops([crop_row('Corn', companion_plants='Bean')])
+        self.assertEqual(result['companions'], 1)
+        self.assertEqual(companions_of('Corn'), {'Bean'})
+
+        # Rows without a companion_plants column leave links alone
+        load_crops([crop_row('Corn')])
+        self.assertEqual(companions_of('Corn'), {'Bean'})
+
+        load_crops([crop_row('Corn', companion_plants='')])
+        self.assertEqual(companions_of('Corn'), set())
+
+    def test_unknown_companion_is_an_error(self):
+        result = load_crops([crop_row('Corn', companion_plants='Triffid')])
+        self.assertEqual(result['errors'], [{'row': 1, 'errors': {'companion_plants': 'Unknown crops: Triffid'}}])
+
+
+class LoadCropsCommandTests(TestCase):
+    def write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / name
+        path.write_text(content, encoding='utf-8')
+        return str(path)
+
+    def test_loads_csv(self):
+        header = ','.join(crop_row('x'))
+        lines = [','.join(str(value) for value in crop_row(name).values()) for name in ('Kale', 'Leek')]
+        path = self.write('crops.csv', '\n'.join([header + ',companion_plants', lines[0] + ',Leek', lines[1] + ',']))
+        out = StringIO()
+        call_command('load_crops', path, stdout=out)
+        self.assertIn('Loaded 2 of 2 crops and 1 companion links', out.getvalue())
+        self.assertEqual(companions_of('Kale'), {'Leek'})
+
+    def test_invalid_json_rows_are_reported(self):
+        path = self.write('crops.json', json.dumps([[1, 'x'], crop_row('Kale')]))
+        err = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 invalid rows; nothing loaded'):
+            call_command('load_crops', path, stderr=err)
+        self.assertIn('Row 1: non_field_errors: Expected an object of crop fields.', err.getvalue())
+
+        call_command('load_crops', path, '--partial', stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(Crop.objects.filter(name='Kale').exists())
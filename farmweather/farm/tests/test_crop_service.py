@@ -0,0 +1,126 @@
+import threading
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from farmweather.farm import resilience
+from farmweather.farm.services import OpenMeteoService
+from farmweather.services import crop_service, mapmycrop_service
+from farmweather.services.climate_classifier import classify_climate
+from farmweather.services.mapmycrop_service import fetch_crop_monitoring_data
+
+HOT = {'temperature': 33, 'precipitation': 10, 'humidity': 10}
+WET = {'temperature': 26, 'precipitation': 50, 'humidity': 90}
+
+
+def satellite_response(health='good'):
+    return mock.Mock(status_code=200, **{'json.return_value': {'crop_health': health, 'ndvi': 0.7, 'timestamp': 't'}})
+
+
+class CacheTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+
+class CropRecommendationTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.threads = set()
+
+        def weather_batch(coordinates):
+            self.threads.add(threading.current_thread().name)
+            return [HOT if lat == 1 else WET for lat, _ in coordinates]
+
+        def satellite(session, name, url, params, timeout):
+            self.threads.add(threading.current_thread().name)
+            return satellite_response(f"health {params['lat']}")
+
+        for patcher in (
+            mock.patch.object(OpenMeteoService, 'get_current_weather_batch', side_effect=weather_batch),
+            mock.patch.object(mapmycrop_service, 'guarded_get', side_effect=satellite),
+        ):
+            setattr(self, patcher.attribute, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_batch_fans_out_once_per_distinct_coordinate(self):
+        locations = [
+            {'name': 'A', 'lat': 1, 'lon': 1},
+            {'name': 'B', 'lat': 2, 'lon': 2},
+            {'name': 'C', 'lat': 1, 'lon': 1},
+        ]
+        results = crop_service.get_crop_recommendations_batch(locations)
+
+        self.get_current_weather_batch.assert_called_once_with([(1, 1), (2, 2)])
+        self.assertEqual(self.guarded_get.call_count, 2)
+        self.assertEqual([result['location'] for result in results], ['A', 'B', 'C'])
+        self.assertEqual([result['crop_health'] for result in results], ['health 1', 'health 2', 'health 1'])
+        self.assertEqual(
+            [result['climate_zone'] for result in results],
+            [classify_climate({'temperature': w['temperature'], 'rainfall': w['precipitation'],
+                               'humidity': w['humidity']}) for w in (HOT, WET, HOT)],
+        )
+        self.assertTrue(all(name.startswith('crop-pipeline') for name in self.threads))
+
+    def test_batch_uses_cached_weather_and_satellite_data(self):
+        locations = [{'name': 'A', 'lat': 1, 'lon': 1}]
+        first = crop_service.get_crop_recommendations_batch(locations)
+        self.assertEqual(crop_service.get_crop_recommendations_batch(locations), first)
+        self.assertEqual(self.get_current_weather_batch.call_count, 1)
+        self.assertEqual(self.guarded_get.call_count, 1)
+
+    def test_empty_batch_makes_no_calls(self):
+        self.assertEqual(crop_service.get_crop_recommendations_batch([]), [])
+        self.get_current_weather_batch.assert_not_called()
+
+    def test_satellite_outage_still_recommends(self):
+        self.guarded_get.side_effect = resilience.UpstreamUnavailable('mapmycrop circuit breaker is open')
+        with self.assertLogs('farmweather.services.mapmycrop_service', 'ERROR'):
+            [result] = crop_service.get_crop_recommendations_batch([{'name': 'A', 'lat': 2, 'lon': 2}])
+        self.assertIsNone(result['crop_health'])
+        self.assertTrue(result['recommended_crops'])
+
+
+@override_settings(
+    UPSTREAM_RATE_LIMIT_PER_SECOND=1000, UPSTREAM_RATE_LIMIT_BURST=1000, UPSTREAM_RATE_LIMIT_WAIT=0,
+    UPSTREAM_BREAKER_FAILURES=2, UPSTREAM_BREAKER_RESET_SECONDS=60,
+)
+class MapMyCropTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        for patcher in (mock.patch.dict(resilience._guards, clear=True), mock.patch.object(resilience, 'logger')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(requests, 'get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answers_are_cached_per_coordinate(self):
+        self.get.return_value = satellite_response()
+        first = fetch_crop_monitoring_data(-29.8, 31.0)
+        self.assertEqual(first, {'crop_health': 'good', 'ndvi': 0.7, 'timestamp': 't'})
+        self.assertEqual(fetch_crop_monitoring_data('-29.80001', '31.0'), first)
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_down_upstream_opens_the_breaker_and_is_not_cached(self):
+        down = mock.Mock(status_code=503)
+        down.raise_for_status.side_effect = requests.HTTPError('503 Server Error')
+        self.get.return_value = down
+        with self.assertLogs('farmweather.services.mapmycrop_service', 'ERROR') as logs:
+            for _ in range(4):
+                self.assertIsNone(fetch_crop_monitoring_data(1, 1))
+        # After two failures the breaker refuses without calling upstream
+        self.assertEqual(self.get.call_count, 2)
+        self.assertIn('circuit breaker is open', logs.output[-1])
+
+        self.get.return_value = satellite_response()
+        with self.assertLogs('farmweather.services.mapmycrop_service', 'ERROR'):
+            self.assertIsNone(fetch_crop_monitoring_data(1, 1))
+        self.assertIsNone(cache.get(mapmycrop_service._cache_key(1, 1)))
+
+    def test_invalid_json_is_unavailable(self):
+        self.get.return_value = mock.Mock(status_code=200, **{'json.side_effect': ValueError('not json')})
+        with self.assertLogs('farmweather.services.mapmycrop_service', 'ERROR'):
+            self.assertIsNone(fetch_crop_monitoring_data(1, 1))
@@ -0,0 +1,99 @@
+import math
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from farmweather.farm.et0 import add_et0, et0_batch
+from farmweather.farm.models import Location
+from farmweather.farm.services import OpenMeteoService
+
+
+class Et0BatchTests(SimpleTestCase):
+    # FAO-56 example 18: Brussels, 6 July, 50°48'N, 100 m; 2.78 m/s wind at 10 m.
+    # The example's ea of 1.409 kPa (from RHmax 84%, RHmin 63%) is 70.52% of es.
+    EXAMPLE_18 = dict(
+        tmax=[21.5], tmin=[12.3], rh_mean=[70.52], wind_10m=[2.78 * 3.6],
+        radiation=[22.07], day_of_year=[187], latitude=50.8, elevation=100,
+    )
+
+    def test_fao56_example_18(self):
+        self.assertAlmostEqual(float(et0_batch(**self.EXAMPLE_18)[0]), 3.88, delta=0.02)
+
+    def test_missing_values(self):
+        result = et0_batch(
+            tmax=[25.0, None, 25.0], tmin=[15.0, 15.0, 15.0], rh_mean=[60.0, 60.0, 60.0],
+            wind_10m=[None, 10.0, 10.0], radiation=[None, 20.0, 20.0], day_of_year=[180, 180, 180],
+            latitude=[-30.0, -30.0, -30.0], elevation=None,
+        )
+        self.assertGreater(result[0], 0)
+        self.assertTrue(math.isnan(result[1]))
+        self.assertGreater(result[2], 0)
+
+    def test_columns_must_match(self):
+        with self.assertRaises(ValueError):
+            et0_batch([20.0], [10.0, 11.0], [50.0], [5.0], [20.0], [100], 0.0, 0.0)
+
+    def test_add_et0_sets_rounded_values_and_none(self):
+        days = [
+            {'date': '2026-01-15', 'temperature_max': 30.0, 'temperature_min': 18.0, 'humidity_mean': 55.0},
+            {'date': '2026-01-16', 'temperature_max': None, 'temperature_min': 18.0, 'humidity_mean': 55.0},
+        ]
+        add_et0(days, latitude=-29.8, elevation=10)
+        self.assertEqual(days[0]['et0_mm'], round(days[0]['et0_mm'], 2))
+        self.assertGreater(days[0]['et0_mm'], 0)
+        self.assertIsNone(days[1]['et0_mm'])
+
+    def test_add_et0_without_latitude(self):
+        days = add_et0([{'date': '2026-01-15', 'temperature_max': 30.0}], latitude=None, elevation=None)
+        self.assertIsNone(days[0]['et0_mm'])
+
+
+HISTORY = {'elevation': 100, 'days': [
+    {'date': '2026-05-01', 'et0_mm': 3.2},
+    {'date': '2026-05-02', 'et0_mm': 2.9},
+]}
+
+
+@override_settings(HISTORICAL_WEATHER_MAX_DAYS=31)
+@mock.patch.object(OpenMeteoService, 'get_historical_weather', return_value=HISTORY)
+class Et0HistoryEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user('grower')
+        self.client.force_login(user)
+        self.location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        self.url = f'/locations/{self.location.pk}/et0/'
+
+    def test_history_is_cached(self, history):
+        params = {'start_date': '2026-05-01', 'end_date': '2026-05-02'}
+        for _ in range(2):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['total_mm'], 6.1)
+        history.assert_called_once()
+        self.client.get(self.url, {'start_date': '2026-05-01', 'end_date': '2026-05-03'})
+        self.assertEqual(history.call_count, 2)
+
+    def test_long_spans_are_rejected(self, history):
+        response = self.client.get(self.url, {'start_date': '2026-01-01', 'end_date': '2026-02-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('31 days; 32 requested', response.json()['error'])
+        self.assertEqual(self.client.get(self.url, {'start_date': '2026-01-01', 'end_date': '2026-01-31'}).status_code, 200)
+        history.assert_called_once()
+
+    def test_bad_ranges_are_rejected(self, history):
+        for params in ({'start_date': '2026-05-02', 'end_date': '2026-05-01'}, {'start_date': '2026-05-01'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        history.assert_not_called()
+
+    def test_failed_history_is_not_cached(self, history):
+        history.return_value = None
+        params = {'start_date': '2026-05-01', 'end_date': '2026-05-02'}
+        self.assertEqual(self.client.get(self.url, params).status_code, 503)
+        self.client.get(self.url, params)
+        self.assertEqual(history.call_count, 2)
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+
+from farmweather.farm.forecast_changes import material_changes, normalize, record_forecasts
+from farmweather.farm.models import ForecastChange, ForecastVersion, Location, OutboxMessage, UserProfile
+
+
+def forecast(days, temperature=20.0, start=date(2026, 6, 1), overrides=None):
+    overrides = overrides or {}
+    return {'days': [
+        {
+            'date': (start + timedelta(days=offset)).isoformat(),
+            'temperature_max': overrides.get(offset, temperature),
+            'temperature_min': 10.0,
+            'precipitation_sum': 0.0,
+        }
+        for offset in range(days)
+    ]}
+
+
+@override_settings(FORECAST_CHANGE_DAYS=7)
+class ForecastChangeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower', email='grower@example.com')
+        self.location = Location.objects.create(
+            user=self.user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+
+    def test_normalize_rounds_and_cuts_to_horizon(self):
+        normalized = normalize(forecast(16, temperature=20.04))
+        self.assertEqual(len(normalized), 7)
+        self.assertEqual(normalized['2026-06-01']['temperature_max'], 20.0)
+        self.assertIsNone(normalized['2026-06-01']['wind_speed_max'])
+
+    def test_material_changes_respects_thresholds(self):
+        baseline = normalize(forecast(7))
+        self.assertEqual(material_changes(baseline, normalize(forecast(7, temperature=21.0))), {})
+        changes = material_changes(baseline, normalize(forecast(7, overrides={2: 22.0})))
+        self.assertEqual(changes, {'2026-06-03': {'temperature_max': [20.0, 22.0]}})
+
+    def test_first_fetch_creates_version_without_change(self):
+        self.assertEqual(record_forecasts([(self.location, forecast(7))]), [])
+        self.assertEqual(ForecastVersion.objects.get(location=self.location).version, 1)
+
+    def test_different_fetch_lengths_share_one_version(self):
+        record_forecasts([(self.location, forecast(7))])
+        version = ForecastVersion.objects.get(location=self.location)
+        # The locked read inside its savepoint, and no writes
+        with self.assertNumQueries(3):
+            record_forecasts([(self.location, forecast(16))])
+        record_forecasts([(self.location, forecast(5, temperature=30.0))])
+        version.refresh_from_db()
+        self.assertEqual(version.version, 1)
+        self.assertEqual(len(version.baseline), 7)
+
+    def test_stale_forecasts_are_ignored(self):
+        record_forecasts([(self.location, {**forecast(7), 'stale': True})])
+        self.assertFalse(ForecastVersion.objects.exists())
+
+    def test_slow_drift_triggers_once_it_adds_up(self):
+        record_forecasts([(self.location, forecast(7))])
+        self.assertEqual(record_forecasts([(self.location, forecast(7, temperature=21.0))]), [])
+        self.assertEqual(record_forecasts([(self.location, forecast(16, temperature=21.5))]), [self.location.pk])
+        change = ForecastChange.objects.get()
+        self.assertEqual(change.version, 2)
+        self.assertEqual(change.changes['2026-06-07']['temperature_max'], [20.0, 21.5])
+
+    def test_one_change_per_location_version(self):
+        ForecastChange.objects.create(location=self.location, version=2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ForecastChange.objects.create(location=self.location, version=2)
+
+    def test_change_queues_weather_alert(self):
+        profile, _ = UserProfile.objects.get_or_create(user=self.user)
+        profile.weather_alerts = True
+        profile.primary_location = self.location
+        profile.save()
+        record_forecasts([(self.location, forecast(7))])
+        record_forecasts([(self.location, forecast(7, temperature=25.0))])
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.kind, 'weather_alert')
+        self.assertEqual(message.dedupe_key, f'weather:{self.user.pk}:{self.location.pk}:2')
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from farmweather.farm import gdd
+from farmweather.farm.models import Crop, GDDAccumulator, Location
+
+
+def make_crop(name, base, **fields):
+    return Crop.objects.create(
+        name=name, category='vegetable', optimal_temp_min=10, optimal_temp_max=30,
+        optimal_rainfall_min=20, optimal_rainfall_max=100, soil_type='loam', planting_season='spring',
+        days_to_maturity=90, spacing_cm=30, gdd_base_temp=base, **fields,
+    )
+
+
+class GDDTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('grower')
+        self.location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        self.maize = make_crop('Maize', 10.0, gdd_to_maturity=100)
+        # Float noise in the stored base must not split accumulators
+        make_crop('Beans', 10.000000001)
+
+    def accumulator(self):
+        return GDDAccumulator.objects.get(location=self.location)
+
+    def test_base_temperatures_are_rounded_and_distinct(self):
+        self.assertEqual(gdd.base_temperatures(), [10.0])
+
+    def test_readings_widen_open_day_then_close_it(self):
+        day = date(2026, 3, 1)
+        gdd.accumulate(self.location.pk, day, 14, 18)
+        gdd.accumulate(self.location.pk, day, 12, 24)
+        accumulator = self.accumulator()
+        self.assertEqual((accumulator.gdd, accumulator.day_min, accumulator.day_max), (0, 12, 24))
+
+        gdd.accumulate(self.location.pk, day + timedelta(days=1), 15, 15)
+        accumulator = self.accumulator()
+        self.assertEqual((accumulator.gdd, accumulator.days, accumulator.day), (8, 1, day + timedelta(days=1)))
+
+    def test_late_readings_are_skipped(self):
+        gdd.accumulate(self.location.pk, date(2026, 3, 2), 10, 20)
+        gdd.accumulate(self.location.pk, date(2026, 3, 1), 30, 40)
+        accumulator = self.accumulator()
+        self.assertEqual((accumulator.gdd, accumulator.day_max), (0, 20))
+
+    def test_crop_progress_projects_maturity(self):
+        start = date(2026, 3, 1)
+        for offset in range(5):
+            gdd.accumulate(self.location.pk, start + timedelta(days=offset), 15, 25)
+        progress = gdd.crop_progress(self.accumulator(), self.maize)
+        self.assertEqual((progress['gdd'], progress['days']), (50, 5))
+        self.assertEqual(progress['projected_maturity'], start + timedelta(days=9))
+
+    def history(self, start, days, low=12, high=18):
+        return {'days': [
+            {'date': (start + timedelta(days=offset)).isoformat(), 'temperature_min': low, 'temperature_max': high}
+            for offset in range(days)
+        ]}
+
+    def test_backfill_extends_existing_accumulator_once(self):
+        first_live = date(2026, 3, 11)
+        gdd.accumulate(self.location.pk, first_live, 10, 20)
+        service = mock.Mock()
+        service.get_historical_weather.return_value = self.history(date(2026, 3, 1), 10)
+
+        self.assertEqual(gdd.backfill(self.location, date(2026, 3, 1), service=service), 1)
+        service.get_historical_weather.assert_called_once_with(
+            self.location.latitude, self.location.longitude, date(2026, 3, 1), date(2026, 3, 10),
+        )
+        accumulator = self.accumulator()
+        self.assertEqual((accumulator.gdd, accumulator.days, accumulator.started_on), (50, 10, date(2026, 3, 1)))
+        self.assertEqual(accumulator.day, first_live)
+
+        # Nothing left before started_on, so a re-run adds nothing
+        self.assertEqual(gdd.backfill(self.location, date(2026, 3, 1), service=service), 0)
+        self.assertEqual(self.accumulator().gdd, 50)
+
+    def test_backfill_creates_missing_accumulator(self):
+        yesterday = date.today() - timedelta(days=1)
+        start = yesterday - timedelta(days=3)
+        service = mock.Mock()
+        service.get_historical_weather.return_value = self.history(start, 4)
+        with mock.patch('farmweather.farm.gdd.timezone.localdate', return_value=yesterday + timedelta(days=1)):
+            gdd.backfill(self.location, start, service=service)
+        accumulator = self.accumulator()
+        self.assertEqual((accumulator.gdd, accumulator.days, accumulator.day), (15, 3, yesterday))
+        self.assertEqual(accumulator.started_on, start)
+
+    def test_backfill_without_upstream_changes_nothing(self):
+        gdd.accumulate(self.location.pk, date(2026, 3, 11), 10, 20)
+        service = mock.Mock()
+        service.get_historical_weather.return_value = None
+        self.assertEqual(gdd.backfill(self.location, date(2026, 3, 1), service=service), 0)
+        self.assertEqual(self.accumulator().started_on, date(2026, 3, 11))
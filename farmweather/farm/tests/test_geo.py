@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from farmweather.farm import geo
+from farmweather.farm.models import Location
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode_known_value(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_decode_round_trip(self):
+        latitude, longitude = geo.decode(geo.encode(-33.9249, 18.4241, 9))
+        self.assertAlmostEqual(latitude, -33.9249, places=3)
+        self.assertAlmostEqual(longitude, 18.4241, places=3)
+
+    def test_neighbourhood_has_nine_cells(self):
+        cells = geo.neighbourhood(geo.encode(51.5, -0.12, 5))
+        self.assertEqual(len(cells), 9)
+        self.assertIn(geo.encode(51.5, -0.12, 5), cells)
+
+    def test_neighbourhood_wraps_antimeridian(self):
+        cells = geo.neighbourhood(geo.encode(0.0, 179.99, 4))
+        self.assertTrue(any(geo.decode(cell)[1] < 0 for cell in cells))
+
+    def test_covering_precision_cells_cover_radius(self):
+        precision = geo.covering_precision(45.0, 10)
+        self.assertGreater(precision, 0)
+        self.assertGreaterEqual(geo.min_cell_km(precision, 45.0 + 10 / geo.KM_PER_DEGREE), 10)
+
+    def test_haversine(self):
+        # London to Paris
+        self.assertAlmostEqual(geo.haversine_km(51.5074, -0.1278, 48.8566, 2.3522), 343.5, delta=1)
+
+
+class LocationSpatialQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('grower')
+        points = {
+            'centre': (51.5000, -0.1200),
+            'close': (51.5100, -0.1300),
+            'mid': (51.6000, -0.1200),
+            'far': (48.8566, 2.3522),
+        }
+        for name, (latitude, longitude) in points.items():
+            Location.objects.create(
+                user=user, name=name, latitude=latitude, longitude=longitude, city=name, country='GB',
+            )
+
+    def test_within_radius_sorted_and_filtered(self):
+        names = [location.name for location in Location.objects.within_radius(51.5, -0.12, 5)]
+        self.assertEqual(names, ['centre', 'close'])
+
+    def test_nearest_returns_k_closest(self):
+        locations = Location.objects.nearest(51.5, -0.12, k=3)
+        self.assertEqual([location.name for location in locations], ['centre', 'close', 'mid'])
+        self.assertEqual(locations[0].distance_km, 0)
+
+    def test_nearest_falls_back_to_whole_table(self):
+        self.assertEqual(len(Location.objects.nearest(0.0, 0.0, k=10)), 4)
+
+    def test_candidates_use_geohash_index(self):
+        candidates = Location.objects.all()._candidates(51.5, -0.12, 5)
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('SCAN farm_location', candidates.explain())
+
+
+class NearbyEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.client.force_login(self.user)
+
+    def test_rejects_non_positive_k_and_radius(self):
+        for params in ({'k': 0}, {'k': -3}, {'radius_km': 0}, {'radius_km': -1}):
+            response = self.client.get('/locations/nearby/', {'lat': 51.5, 'lon': -0.12, **params})
+            self.assertEqual(response.status_code, 400, params)
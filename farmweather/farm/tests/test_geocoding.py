@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from farmweather.farm import geocoding
+from farmweather.farm.models import GeocodedPlace, GeocodingQuery
+
+
+def place(external_id, name, population=None):
+    return {
+        'id': external_id, 'name': name, 'latitude': 1.0, 'longitude': 2.0, 'elevation': None,
+        'timezone': 'UTC', 'country': 'South Africa', 'country_code': 'ZA', 'admin1': '',
+        'population': population,
+    }
+
+
+class NormalizeQueryTests(SimpleTestCase):
+    def test_folds_case_accents_and_whitespace(self):
+        self.assertEqual(geocoding.normalize_query('  São   PAULO! '), 'sao paulo')
+
+    def test_empty(self):
+        self.assertEqual(geocoding.normalize_query(None), '')
+
+    def test_keys_are_cut_to_the_maximum_length(self):
+        self.assertEqual(geocoding.normalize_query('a' * 500), 'a' * geocoding.MAX_QUERY_LENGTH)
+        # U+FDFA decomposes into 18 characters
+        self.assertLessEqual(len(geocoding.normalize_query('\ufdfa' * 20)), geocoding.MAX_QUERY_LENGTH)
+
+
+class GeocodeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('farmweather.farm.geocoding.OpenMeteoService.geocode')
+    def test_upstream_answer_is_stored_and_reused(self, upstream):
+        upstream.return_value = [place(1, 'Durban', 600000)]
+        self.assertEqual(geocoding.geocode('Durban'), upstream.return_value)
+        cache.clear()
+        self.assertEqual(geocoding.geocode('durban '), upstream.return_value)
+        upstream.assert_called_once()
+        self.assertTrue(GeocodingQuery.objects.filter(query='10:durban').exists())
+        self.assertTrue(GeocodedPlace.objects.filter(external_id=1, search_name='durban').exists())
+
+    @mock.patch('farmweather.farm.geocoding.OpenMeteoService.geocode', return_value=None)
+    def test_upstream_failure_returns_none(self, upstream):
+        self.assertIsNone(geocoding.geocode('Nowhere'))
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for external_id, name, population in [(1, 'Durban', 600000), (2, 'Durbanville', 50000), (3, 'Dundee', 30000)]:
+            GeocodedPlace.objects.create(
+                external_id=external_id, name=name, search_name=name.lower(), latitude=0, longitude=0,
+                population=population,
+            )
+
+    @mock.patch('farmweather.farm.geocoding.OpenMeteoService.geocode')
+    def test_prefix_matches_most_populous_first(self, upstream):
+        names = [result['name'] for result in geocoding.autocomplete('DURB')]
+        self.assertEqual(names, ['Durban', 'Durbanville'])
+        self.assertEqual(len(geocoding.autocomplete('du', limit=1)), 1)
+        upstream.assert_not_called()
+
+    @mock.patch('farmweather.farm.geocoding.OpenMeteoService.geocode')
+    def test_prefix_matches_names_continuing_outside_the_bmp(self, upstream):
+        GeocodedPlace.objects.create(
+            external_id=4, name='Dur\U0001f33e', search_name='dur\U0001f33e', latitude=0, longitude=0,
+        )
+        names = [result['name'] for result in geocoding.autocomplete('dur', limit=10)]
+        self.assertIn('Dur\U0001f33e', names)
+
+    def test_prefix_query_uses_search_name_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('query plan check is SQLite specific')
+        with CaptureQueriesContext(connection) as queries:
+            geocoding.autocomplete('dur')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('farm_geocodedplace_search_name', plan)
+        self.assertNotIn('SCAN farm_geocodedplace', plan)
+
+
+class SearchEndpointTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('grower'))
+
+    @mock.patch('farmweather.farm.api_views.autocomplete', return_value=[])
+    def test_limit_is_clamped(self, complete):
+        self.client.get('/locations/search/', {'q': 'dur', 'autocomplete': 1, 'limit': 0})
+        self.client.get('/locations/search/', {'q': 'dur', 'autocomplete': 1, 'limit': 500})
+        self.assertEqual([call.kwargs['limit'] for call in complete.call_args_list], [1, 100])
+
+    @mock.patch('farmweather.farm.geocoding.OpenMeteoService.geocode', return_value=[])
+    def test_long_queries_are_clamped(self, upstream):
+        response = self.client.get('/locations/search/', {'q': 'x' * 5000, 'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        upstream.assert_called_once_with('x' * geocoding.MAX_QUERY_LENGTH, count=100)
+        [stored] = GeocodingQuery.objects.values_list('query', flat=True)
+        self.assertLessEqual(len(stored), GeocodingQuery._meta.get_field('query').max_length)
@@ -0,0 +1,74 @@
+import pickle
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from farmweather.farm.hourly import HourlyForecast
+from farmweather.farm.models import Location
+
+START = 1_780_000_000 // 3600 * 3600
+
+
+def response(hours=6):
+    return {
+        'timezone': 'Africa/Johannesburg',
+        'utc_offset_seconds': 7200,
+        'elevation': 10.0,
+        'hourly': {
+            'time': [START + hour * 3600 for hour in range(hours)],
+            'temperature_2m': [20.0 + hour for hour in range(hours - 1)] + [None],
+        },
+    }
+
+
+class HourlyForecastTests(SimpleTestCase):
+    def test_missing_series_and_values_become_none(self):
+        window = HourlyForecast.from_response(response()).window()
+        self.assertEqual(window['temperature'][-1], None)
+        self.assertEqual(window['wind_speed'], [None] * 6)
+
+    def test_window_is_half_open(self):
+        window = HourlyForecast.from_response(response()).window(START + 3600, START + 3 * 3600, ['temperature'])
+        self.assertEqual(window['time'], [START + 3600, START + 7200])
+        self.assertEqual(window['temperature'], [21.0, 22.0])
+        self.assertNotIn('humidity', window)
+
+    def test_pickles_round_trip_and_stale_flag(self):
+        forecast = pickle.loads(pickle.dumps(HourlyForecast.from_response(response()).as_stale(123)))
+        self.assertEqual(len(forecast), 6)
+        window = forecast.window()
+        self.assertTrue(window['stale'])
+        self.assertEqual(window['stale_since'], 123)
+
+
+class HourlyEndpointTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        self.client.force_login(user)
+        self.location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        self.url = f'/locations/{self.location.pk}/hourly/'
+
+    def test_hours_is_clamped(self):
+        forecast = HourlyForecast.from_response(response(400))
+        with mock.patch.object(Location, 'get_hourly_forecast', return_value=forecast):
+            for hours, expected in (('-5', 1), ('0', 1), ('3', 3), ('100000', 384)):
+                data = self.client.get(self.url, {'start': START, 'hours': hours}).json()
+                self.assertEqual(len(data['time']), expected, hours)
+
+    def test_unknown_variables_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'variables': 'snow'}).status_code, 400)
+
+    def test_naive_times_use_the_location_timezone(self):
+        forecast = HourlyForecast.from_response(response())
+        self.location.timezone = 'Africa/Johannesburg'
+        self.location.save()
+        with mock.patch.object(Location, 'get_hourly_forecast', return_value=forecast):
+            data = self.client.get(self.url, {'start': '2026-05-28T22:00', 'hours': 1}).json()
+            # A stored timezone that is not a known zone falls back to UTC instead of failing
+            Location.objects.filter(pk=self.location.pk).update(timezone='Mars/Olympus_Mons')
+            fallback = self.client.get(self.url, {'start': '2026-05-28T20:00', 'hours': 1})
+        self.assertEqual(fallback.status_code, 200)
+        self.assertEqual(fallback.json()['time'], data['time'])
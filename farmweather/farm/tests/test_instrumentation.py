@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from farmweather.farm import instrumentation
+from farmweather.farm.instrumentation import ServerTimingMiddleware, submit, timed
+
+
+def upstream_call():
+    with timed('upstream'):
+        pass
+
+
+def untracked_call():
+    with timed('untracked'):
+        pass
+
+
+class ServerTimingTests(SimpleTestCase):
+    def serve(self, view):
+        return ServerTimingMiddleware(view)(RequestFactory().get('/'))
+
+    def test_phases_reach_the_header(self):
+        def view(request):
+            with timed('cache') as phase:
+                phase.name = 'cache_miss'
+            upstream_call()
+            return HttpResponse()
+
+        header = self.serve(view)['Server-Timing']
+        self.assertIn('cache_miss;dur=', header)
+        self.assertIn('upstream;dur=', header)
+        self.assertIn('total;dur=', header)
+
+    def test_submit_carries_timings_into_pool_threads(self):
+        def view(request):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for future in [submit(pool, upstream_call) for _ in range(3)]:
+                    future.result()
+                # A plain submit runs outside the request's context
+                pool.submit(untracked_call).result()
+            return HttpResponse()
+
+        header = self.serve(view)['Server-Timing']
+        self.assertIn('upstream;dur=', header)
+        self.assertIn('desc="3x"', header)
+        self.assertNotIn('untracked', header)
+
+    def test_histograms_render_in_prometheus_format(self):
+        registry = instrumentation.MetricsRegistry()
+        registry.observe('phase_seconds', 0.02, phase='db')
+        text = registry.render()
+        self.assertIn('# TYPE phase_seconds histogram', text)
+        self.assertIn('phase_seconds_bucket{phase="db",le="0.01"} 0', text)
+        self.assertIn('phase_seconds_bucket{phase="db",le="0.025"} 1', text)
+        self.assertIn('phase_seconds_count{phase="db"} 1', text)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from farmweather.farm import ip_location
+from farmweather.farm.ip_location import IPRangeTable, create_detected_location, detect_location, get_client_ip
+from farmweather.farm.models import Location, UserProfile
+
+TABLE = """start_ip,end_ip,latitude,longitude,city,country,country_code,timezone
+41.0.0.0,41.0.255.255,-29.85,31.02,Durban,South Africa,ZA,Africa/Johannesburg
+8.8.8.0,134744319,37.4,-122.1,Mountain View,United States,US,
+2001:db8::,2001:db8::ffff,52.37,4.89,Amsterdam,Netherlands,NL,Europe/Amsterdam
+"""
+
+
+def load_table():
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as fh:
+        fh.write(TABLE)
+    try:
+        return IPRangeTable.from_csv(fh.name)
+    finally:
+        os.unlink(fh.name)
+
+
+class IPRangeTableTests(SimpleTestCase):
+    def test_lookup_inside_between_and_outside_ranges(self):
+        table = load_table()
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.lookup('41.0.12.7')['city'], 'Durban')
+        self.assertEqual(table.lookup('8.8.8.255')['timezone'], 'UTC')
+        self.assertIsNone(table.lookup('41.1.0.0'))
+        self.assertIsNone(table.lookup('1.1.1.1'))
+
+    def test_ipv6_ranges_are_separate(self):
+        table = load_table()
+        self.assertEqual(table.lookup('2001:db8::10')['city'], 'Amsterdam')
+        self.assertIsNone(table.lookup('2001:db8::1:0'))
+
+
+class ClientIPTests(SimpleTestCase):
+    def request(self, remote, forwarded=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded else {}
+        return RequestFactory().get('/', REMOTE_ADDR=remote, **extra)
+
+    @override_settings(IP_LOCATION_TRUST_FORWARDED=False)
+    def test_forwarded_header_ignored_by_default(self):
+        self.assertEqual(get_client_ip(self.request('41.0.0.1', '8.8.8.8')), '41.0.0.1')
+
+    @override_settings(IP_LOCATION_TRUST_FORWARDED=True)
+    def test_forwarded_header_when_trusted(self):
+        self.assertEqual(get_client_ip(self.request('10.0.0.1', '8.8.8.8, 10.0.0.2')), '8.8.8.8')
+
+    def test_private_and_invalid_addresses(self):
+        self.assertIsNone(get_client_ip(self.request('192.168.1.5')))
+        self.assertIsNone(get_client_ip(self.request('not-an-ip')))
+
+
+class DetectLocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(ip_location, 'get_table', side_effect=load_table)
+        self.get_table = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_subnet_answers_are_cached(self):
+        self.assertEqual(detect_location('41.0.3.1')['city'], 'Durban')
+        self.assertEqual(detect_location('41.0.3.200')['city'], 'Durban')
+        self.assertIsNone(detect_location('1.1.1.1'))
+        self.assertIsNone(detect_location('1.1.1.2'))
+        self.assertEqual(self.get_table.call_count, 2)
+
+    def test_detected_location_becomes_primary_only_without_one(self):
+        user = User.objects.create_user('grower')
+        UserProfile.objects.create(user=user)
+        location = create_detected_location(user, '41.0.3.1')
+        self.assertTrue(location.is_primary)
+        self.assertEqual(UserProfile.objects.get(user=user).primary_location, location)
+
+        other = User.objects.create_user('other')
+        Location.objects.create(user=other, name='Home', latitude=0, longitude=0, city='x', country='y', is_primary=True)
+        self.assertFalse(create_detected_location(other, '41.0.3.1').is_primary)
+        self.assertIsNone(create_detected_location(other, '1.1.1.1'))
+
+    def test_refresh_updates_only_the_detected_location(self):
+        user = User.objects.create_user('grower')
+        manual = Location.objects.create(
+            user=user, name='Detected location', latitude=1, longitude=2, city='Mine', country='ZA', is_primary=True,
+        )
+        detected = create_detected_location(user, '41.0.3.1')
+        self.assertEqual(detected.name, 'Detected location (2)')
+        self.assertNotEqual(detected.pk, manual.pk)
+
+        detected.name = 'Renamed'
+        detected.save()
+        self.assertEqual(create_detected_location(user, '41.0.3.9').pk, detected.pk)
+        manual.refresh_from_db()
+        self.assertEqual((manual.city, manual.latitude, manual.detected_automatically), ('Mine', 1, False))
+        self.assertEqual(Location.objects.get(pk=detected.pk).name, 'Renamed')
+        self.assertEqual(Location.objects.filter(user=user).count(), 2)
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from farmweather.farm import irrigation
+from farmweather.farm.models import Crop, IrrigationSchedule, Location, UserProfile
+
+
+class SimulationTests(SimpleTestCase):
+    def test_expected_rain_weights_by_probability(self):
+        self.assertEqual(irrigation.expected_rain({'precipitation_sum': 10, 'precipitation_probability': 50}), 5)
+        self.assertEqual(irrigation.expected_rain({'precipitation_sum': 10}), 10)
+        # Too little to reach the roots
+        self.assertEqual(irrigation.expected_rain({'precipitation_sum': 1.5, 'precipitation_probability': 50}), 0)
+
+    def test_dry_week_waters_every_interval(self):
+        start = date(2026, 6, 1)
+        self.assertEqual(irrigation.next_watering(start, 3, 4.0, [0] * 7), (start + timedelta(days=3), 12.0, 0.0))
+
+    def test_rain_pushes_next_watering_back(self):
+        start = date(2026, 6, 1)
+        watering, need, credited = irrigation.next_watering(start, 3, 4.0, [0, 8, 0, 0, 0, 0, 0])
+        # Only the 4 mm already used can soak in; the rest runs off
+        self.assertEqual((watering, need, credited), (start + timedelta(days=4), 12.0, 4.0))
+
+    def test_past_forecast_end_is_assumed_dry(self):
+        start = date(2026, 6, 1)
+        self.assertEqual(irrigation.next_watering(start, 10, 2.0, [0, 0])[0], start + timedelta(days=10))
+
+
+class ScheduleAllTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.crop = Crop.objects.create(
+            name='Maize', category='grain', optimal_temp_min=10, optimal_temp_max=30,
+            optimal_rainfall_min=20, optimal_rainfall_max=100, soil_type='loam', planting_season='spring',
+            days_to_maturity=90, spacing_cm=30, water_frequency_days=3, drought_tolerance='medium',
+        )
+        self.locations = []
+        for index in range(2):
+            user = User.objects.create_user(f'grower{index}')
+            location = Location.objects.create(
+                user=user, name='Farm', latitude=-29.8 + index, longitude=31.0, city='Durban', country='ZA',
+            )
+            profile, _ = UserProfile.objects.get_or_create(user=user)
+            profile.primary_location = location
+            profile.save()
+            profile.preferred_crops.add(self.crop)
+            self.locations.append(location)
+
+    def test_reads_cache_only_and_counts_misses(self):
+        today = timezone.localdate()
+        wet = {'days': [
+            {'date': (today + timedelta(days=offset)).isoformat(), 'precipitation_sum': 8 if offset == 1 else 0}
+            for offset in range(7)
+        ]}
+        cached = self.locations[0]
+        cached._cache_weather(cached.get_cache_key('forecast_7'), wet, 1800)
+
+        with mock.patch('farmweather.farm.services.OpenMeteoService') as service:
+            totals = irrigation.schedule_all()
+        service.assert_not_called()
+
+        self.assertEqual((totals['schedules'], totals['without_forecast']), (2, 1))
+        schedules = {schedule.location_id: schedule for schedule in IrrigationSchedule.objects.all()}
+        self.assertTrue(schedules[cached.pk].used_forecast)
+        self.assertEqual(schedules[cached.pk].next_watering, today + timedelta(days=4))
+        dry = schedules[self.locations[1].pk]
+        self.assertEqual((dry.used_forecast, dry.next_watering), (False, today + timedelta(days=3)))
+
+    def test_removed_crops_lose_their_schedule(self):
+        irrigation.schedule_all()
+        UserProfile.objects.get(primary_location=self.locations[0]).preferred_crops.clear()
+        self.assertEqual(irrigation.schedule_all()['removed'], 1)
+        self.assertEqual(IrrigationSchedule.objects.count(), 1)
@@ -0,0 +1,103 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from farmweather.farm import layout
+from farmweather.farm.models import Crop, UserProfile
+from farmweather.farm.layout import LayoutError, build_score_matrix, grid_score, plan_layout
+
+
+def crop(pk, name, spacing_cm=30):
+    return SimpleNamespace(pk=pk, name=name, spacing_cm=spacing_cm)
+
+
+TOMATO, BASIL, POTATO = crop(1, 'Tomatoes'), crop(2, 'Basil'), crop(3, 'Potato')
+COMPANIONS = {1: {2}}
+
+
+@override_settings(LAYOUT_TIME_BUDGET=0.2, LAYOUT_MAX_CELLS=10000)
+class LayoutTests(SimpleTestCase):
+    def test_crop_key_singularizes(self):
+        self.assertEqual(layout._crop_key(' Tomatoes '), 'tomato')
+        self.assertEqual(layout._crop_key('Beans'), 'bean')
+        self.assertEqual(layout._crop_key('Grass'), 'grass')
+
+    def test_score_matrix_is_symmetric(self):
+        matrix = build_score_matrix([TOMATO, BASIL, POTATO], COMPANIONS)
+        self.assertEqual(matrix[0][1], layout.COMPANION_SCORE)
+        self.assertEqual(matrix[1][0], layout.COMPANION_SCORE)
+        self.assertEqual(matrix[0][2], layout.INCOMPATIBLE_PENALTY)
+        self.assertEqual(matrix[1][2], 0)
+
+    def test_grid_score_counts_each_edge_once(self):
+        matrix = build_score_matrix([TOMATO, BASIL, POTATO], COMPANIONS)
+        # 0 1
+        # 2 1
+        self.assertEqual(grid_score([0, 1, 2, 1], 2, 2, matrix), (1 - 4, 1, 1))
+
+    def test_plan_keeps_quotas_and_never_loses_to_greedy(self):
+        plan = plan_layout([TOMATO, BASIL, POTATO], 3, 3, companion_ids=COMPANIONS, seed=7)
+        self.assertEqual((plan['rows'], plan['cols'], plan['cell_cm']), (10, 10, 30))
+        counts = Counter(cell for row in plan['grid'] for cell in row)
+        self.assertEqual([counts[i] for i in range(3)], [entry['cells'] for entry in plan['crops']])
+        self.assertEqual(sorted(counts.values()), [33, 33, 34])
+        self.assertGreaterEqual(plan['score'], plan['greedy_score'])
+
+    def test_seeded_search_repeats(self):
+        matrix = build_score_matrix([TOMATO, BASIL, POTATO], COMPANIONS)
+        grids = []
+        for _ in range(2):
+            grid = layout.greedy_fill(6, 6, matrix, layout._quotas(36, 3))
+            # No deadline, so the search stops only when it stalls
+            layout.improve(grid, 6, 6, matrix, deadline=float('inf'), seed=3)
+            grids.append(grid)
+        self.assertEqual(grids[0], grids[1])
+
+    def test_plants_per_cell_follow_spacing(self):
+        plan = plan_layout([crop(1, 'Lettuce', 20), crop(2, 'Carrot', 5)], 1, 1, companion_ids={}, cell_cm=20)
+        self.assertEqual([entry['plants'] // entry['cells'] for entry in plan['crops']], [1, 16])
+
+    def test_invalid_beds(self):
+        for kwargs in ({'crops': []}, {'width_m': 0}, {'cell_cm': 10}, {'width_m': 0.1},
+                       {'width_m': float('inf')}, {'length_m': float('nan')}, {'time_budget': float('nan')},
+                       {'crops': [crop(1, 'Cress', 0)], 'cell_cm': 0}):
+            arguments = {'crops': [TOMATO], 'width_m': 1, 'length_m': 1, 'companion_ids': {}, **kwargs}
+            with self.assertRaises(LayoutError, msg=kwargs):
+                plan_layout(**arguments)
+
+    @override_settings(LAYOUT_MAX_CELLS=50)
+    def test_cell_size_grows_to_respect_cell_limit(self):
+        plan = plan_layout([TOMATO], 10, 10, companion_ids={})
+        self.assertLessEqual(plan['rows'] * plan['cols'], 50)
+
+
+@override_settings(LAYOUT_TIME_BUDGET=0.1)
+class LayoutEndpointTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        self.client.force_login(user)
+        self.profile = UserProfile.objects.create(user=user)
+        self.profile.preferred_crops.add(Crop.objects.create(
+            name='Tomatoes', category='vegetable', optimal_temp_min=10, optimal_temp_max=30,
+            optimal_rainfall_min=20, optimal_rainfall_max=100, soil_type='loam',
+            planting_season='spring', days_to_maturity=90, spacing_cm=30,
+        ))
+        self.url = f'/profiles/{self.profile.pk}/layout/'
+
+    def test_plans_the_preferred_crops(self):
+        response = self.client.get(self.url, {'width_m': 2, 'length_m': 1, 'seed': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['rows'], response.json()['cols']), (3, 6))
+
+    def test_non_finite_or_non_positive_values_are_rejected(self):
+        for params in (
+            {'width_m': 'inf', 'length_m': 1}, {'width_m': 'nan', 'length_m': 1}, {'width_m': 1, 'length_m': '-inf'},
+            {'width_m': 1, 'length_m': 1, 'cell_cm': 0}, {'width_m': 1, 'length_m': 1, 'budget': 'nan'},
+            {'width_m': -1, 'length_m': 1},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
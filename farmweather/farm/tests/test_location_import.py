@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from farmweather.farm.location_import import import_locations, parse_rows
+from farmweather.farm.models import Location
+
+
+class ParseRowsTests(SimpleTestCase):
+    def test_csv(self):
+        rows = parse_rows('name,city\nNorth,Durban\n', 'csv')
+        self.assertEqual(rows, [{'name': 'North', 'city': 'Durban'}])
+
+    def test_json_list_or_wrapped(self):
+        self.assertEqual(parse_rows('[{"name": "a"}]', 'json'), [{'name': 'a'}])
+        self.assertEqual(parse_rows({'locations': [{'name': 'a'}]}, 'json'), [{'name': 'a'}])
+
+    def test_json_scalar_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_rows('5', 'json')
+
+
+class ImportLocationsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+
+    def row(self, name, **fields):
+        return {'name': name, 'city': 'Durban', 'country': 'ZA', 'latitude': -29.8, 'longitude': 31.0, **fields}
+
+    def test_imports_valid_rows_with_one_primary(self):
+        Location.objects.create(
+            user=self.user, name='Old', latitude=0, longitude=0, city='x', country='y', is_primary=True,
+        )
+        result = import_locations(
+            [self.row('A', is_primary='yes'), self.row('B', is_primary=True)], user=self.user,
+        )
+        self.assertEqual(result, {'created': 2, 'errors': []})
+        self.assertEqual(list(Location.objects.filter(is_primary=True).values_list('name', flat=True)), ['B'])
+        self.assertTrue(Location.objects.get(name='A').geohash)
+
+    def test_invalid_row_aborts_unless_partial(self):
+        rows = [self.row('A'), self.row('B', latitude=120)]
+        result = import_locations(rows, user=self.user)
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['errors'][0]['row'], 2)
+        self.assertEqual(import_locations(rows, user=self.user, partial=True)['created'], 1)
+
+    def test_non_object_rows_are_row_errors(self):
+        result = import_locations([1, 'x', self.row('A')], user=self.user, partial=True)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [1, 2])
+
+    def test_duplicate_names_are_rejected(self):
+        result = import_locations([self.row('A'), self.row('A')], user=self.user, partial=True)
+        self.assertEqual(result['created'], 1)
+        self.assertIn('name', result['errors'][0]['errors'])
+
+    def test_rows_without_coordinates_are_geocoded_in_one_batch(self):
+        answer = [{'latitude': 1.5, 'longitude': 2.5, 'timezone': 'Africa/Johannesburg'}]
+        with mock.patch('farmweather.farm.location_import.geocode_many', return_value={'Durban': answer}) as many:
+            result = import_locations(
+                [{'name': 'A', 'city': 'Durban', 'country': 'ZA'}, {'name': 'B', 'city': 'Durban', 'country': 'ZA'}],
+                user=self.user,
+            )
+        many.assert_called_once()
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(Location.objects.get(name='A').timezone, 'Africa/Johannesburg')
+
+
+class BulkImportEndpointTests(TestCase):
+    def test_non_object_rows_are_reported(self):
+        self.client.force_login(User.objects.create_user('grower'))
+        response = self.client.post('/locations/bulk_import/', [1, 'x'], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [1, 2])
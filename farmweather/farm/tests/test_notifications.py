@@ -0,0 +1,129 @@
+import smtplib
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from farmweather.farm import notifications
+from farmweather.farm.models import OutboxMessage
+
+
+class RejectingConnection:
+    """SMTP connection that refuses one recipient"""
+
+    def __init__(self, refused):
+        self.refused = refused
+        self.sent = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, emails):
+        for email in emails:
+            if email.to[0] == self.refused:
+                raise smtplib.SMTPRecipientsRefused({self.refused: (451, b'try later')})
+            self.sent.append(email)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_BACKOFF_SECONDS=60, OUTBOX_BACKOFF_MAX_SECONDS=600)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower', email='grower@example.com')
+
+    def message(self, key, recipient='grower@example.com', **fields):
+        return OutboxMessage(
+            user=self.user, recipient=recipient, kind='weather_alert',
+            subject=f'Subject {key}', body='Body', dedupe_key=key, **fields,
+        )
+
+    def test_enqueue_skips_duplicate_keys(self):
+        notifications.enqueue([self.message('a'), self.message('b')])
+        notifications.enqueue([self.message('a')])
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+    def test_claim_leases_due_messages_once(self):
+        notifications.enqueue([
+            self.message('due'),
+            self.message('later', available_at=timezone.now() + timedelta(hours=1)),
+        ])
+        token, claimed = notifications.claim(10, 300)
+        self.assertEqual([message.dedupe_key for message in claimed], ['due'])
+        self.assertEqual(claimed[0].lease_token, token)
+        self.assertEqual(notifications.claim(10, 300)[1], [])
+
+    def test_expired_lease_can_be_reclaimed(self):
+        notifications.enqueue([self.message('a')])
+        notifications.claim(10, 300)
+        OutboxMessage.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(notifications.claim(10, 300)[1]), 1)
+
+    def test_finish_marks_sent_and_reschedules_failures(self):
+        notifications.enqueue([self.message('ok'), self.message('bad')])
+        token, claimed = notifications.claim(10, 300)
+        ok, bad = sorted(claimed, key=lambda message: message.dedupe_key != 'ok')
+        notifications.finish(token, [ok], {bad: '451 try later'})
+
+        ok.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((ok.status, ok.attempts, ok.lease_token), ('sent', 1, ''))
+        self.assertEqual((bad.status, bad.attempts, bad.last_error), ('pending', 1, '451 try later'))
+        self.assertGreater(bad.available_at, timezone.now() + timedelta(seconds=40))
+        self.assertIsNone(bad.leased_until)
+
+    def test_finish_gives_up_after_max_attempts(self):
+        notifications.enqueue([self.message('a', attempts=2)])
+        token, claimed = notifications.claim(10, 300)
+        notifications.finish(token, [], {claimed[0]: 'rejected'})
+        self.assertEqual(OutboxMessage.objects.get().status, 'failed')
+        self.assertEqual(claimed[0].status, 'failed')
+
+    def test_stale_worker_cannot_overwrite_reclaimed_rows(self):
+        notifications.enqueue([self.message('a')])
+        stale_token, stale = notifications.claim(10, 300)
+        OutboxMessage.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        token, claimed = notifications.claim(10, 300)
+
+        notifications.finish(stale_token, [], {stale[0]: 'timed out'})
+        row = OutboxMessage.objects.get()
+        self.assertEqual((row.lease_token, row.attempts, row.last_error), (token, 0, ''))
+
+        notifications.finish(token, claimed, {})
+        notifications.finish(stale_token, [], {stale[0]: 'timed out'})
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('sent', 1))
+
+    def test_deliver_folds_recipients_and_isolates_rejections(self):
+        notifications.enqueue([
+            self.message('a'), self.message('b'), self.message('c', recipient='refused@example.com'),
+        ])
+        _, claimed = notifications.claim(10, 300)
+        smtp = RejectingConnection('refused@example.com')
+        sent, failed = notifications.deliver(smtp, claimed)
+        self.assertEqual(sorted(message.dedupe_key for message in sent), ['a', 'b'])
+        self.assertEqual([message.dedupe_key for message in failed], ['c'])
+        self.assertEqual(len(smtp.sent), 1)
+        self.assertEqual(smtp.sent[0].subject, '2 updates for your farm')
+
+
+class DispatchTests(TransactionTestCase):
+    """Worker threads use their own connections, so no wrapping test transaction"""
+
+    def test_dispatch_sends_everything_due(self):
+        user = User.objects.create_user('grower', email='grower@example.com')
+        notifications.enqueue([
+            OutboxMessage(
+                user=user, recipient=f'user{i % 3}@example.com', kind='weather_alert',
+                subject=f'Subject {i}', body='Body', dedupe_key=str(i),
+            )
+            for i in range(7)
+        ])
+        stats = notifications.dispatch(workers=1, batch_size=10)
+        self.assertEqual(stats.sent, 7)
+        self.assertFalse(OutboxMessage.objects.exclude(status='sent').exists())
+        self.assertEqual(len(mail.outbox), stats.emails)
+        self.assertEqual(stats.emails, 3)
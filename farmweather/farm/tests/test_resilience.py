@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from requests.exceptions import ConnectionError
+
+from farmweather.farm import resilience
+from farmweather.farm.resilience import CircuitBreaker, TokenBucket, UpstreamUnavailable, guarded_get
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_refuse(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
+
+    def test_waits_for_refill(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.acquire()
+        self.assertTrue(bucket.acquire(timeout=0.1))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = mock.patch('farmweather.farm.resilience.time.monotonic', return_value=1000.0)
+        self.now = self.clock.start()
+        self.addCleanup(self.clock.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        quiet = mock.patch.object(resilience, 'logger')
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+    def open_breaker(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_allows_a_single_trial(self):
+        self.open_breaker()
+        self.now.return_value += 31
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        self.now.return_value += 31
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+
+@override_settings(
+    UPSTREAM_RATE_LIMIT_PER_SECOND=1000, UPSTREAM_RATE_LIMIT_BURST=1000, UPSTREAM_RATE_LIMIT_WAIT=0,
+    UPSTREAM_BREAKER_FAILURES=1, UPSTREAM_BREAKER_RESET_SECONDS=0,
+)
+class GuardedGetTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in (mock.patch.dict(resilience._guards, clear=True), mock.patch.object(resilience, 'logger')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.session = mock.Mock()
+
+    def test_server_errors_open_the_breaker(self):
+        self.session.get.return_value = mock.Mock(status_code=503)
+        guarded_get(self.session, 'test', 'http://upstream')
+        self.assertEqual(resilience.upstream_guards('test')[1].state, CircuitBreaker.OPEN)
+
+    def test_transport_errors_are_recorded_and_reraised(self):
+        self.session.get.side_effect = ConnectionError('down')
+        with self.assertRaises(ConnectionError):
+            guarded_get(self.session, 'test', 'http://upstream')
+        self.assertEqual(resilience.upstream_guards('test')[1].state, CircuitBreaker.OPEN)
+
+    def test_unexpected_error_during_trial_frees_the_slot(self):
+        breaker = resilience.upstream_guards('test')[1]
+        breaker.record_failure()
+        self.session.get.side_effect = ValueError('bad url')
+        with self.assertRaises(ValueError):
+            guarded_get(self.session, 'test', 'http://upstream')
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+        self.session.get.side_effect = None
+        self.session.get.return_value = mock.Mock(status_code=200)
+        guarded_get(self.session, 'test', 'http://upstream')
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @override_settings(UPSTREAM_BREAKER_RESET_SECONDS=60)
+    def test_open_breaker_refuses_without_calling(self):
+        resilience.upstream_guards('test')[1].record_failure()
+        with self.assertRaises(UpstreamUnavailable):
+            guarded_get(self.session, 'test', 'http://upstream')
+        self.session.get.assert_not_called()
@@ -0,0 +1,64 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from farmweather.farm.models import Location, WeatherData
+from farmweather.farm.serializers import WeatherDataSerializer
+
+
+class GenericWeatherDataSerializer(WeatherDataSerializer):
+    """The same fields rendered instance by instance"""
+
+    class Meta(WeatherDataSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+
+
+class ValuesListSerializerTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        WeatherData.objects.create(
+            location=location, temperature_current=0.1 + 0.2, humidity=55, weather_code=12345,
+            weather_description='Unknown', precipitation=0,
+            recorded_at=datetime(2026, 3, 8, 6, 30, 15, 123456, tzinfo=ZoneInfo('America/New_York')),
+        )
+        WeatherData.objects.create(
+            location=location, temperature_current=-3.5, temperature_min=-7, temperature_max=1.25,
+            humidity=80.5, pressure=1013.2, wind_speed=12, wind_direction=270, wind_gusts=30,
+            precipitation=2.4, precipitation_probability=60, weather_code=61, weather_description='Slight rain',
+            cloud_cover=100, visibility=8000, uv_index=0,
+            recorded_at=datetime(2026, 11, 1, 1, 30, tzinfo=ZoneInfo('America/New_York')),
+        )
+
+    def assertRendersLikeGeneric(self, context=None):
+        queryset = WeatherData.objects.all()
+        fast = WeatherDataSerializer(queryset, many=True, context=context or {})
+        self.assertIsNotNone(fast.child.compile_values_plan())
+        generic = GenericWeatherDataSerializer(queryset, many=True, context=context or {})
+        self.assertEqual(JSONRenderer().render(fast.data), JSONRenderer().render(generic.data))
+
+    def test_matches_generic_output(self):
+        self.assertRendersLikeGeneric()
+
+    def test_null_fields_and_unknown_weather_codes(self):
+        [unknown, _] = WeatherDataSerializer(WeatherData.objects.order_by('recorded_at'), many=True).data
+        self.assertIsNone(unknown['temperature_min'])
+        self.assertEqual(unknown['weather_emoji'], GenericWeatherDataSerializer(
+            WeatherData.objects.get(weather_code=12345)).data['weather_emoji'])
+        self.assertRendersLikeGeneric()
+
+    def test_non_utc_time_zones(self):
+        for zone, offset in (('Africa/Johannesburg', '+02:00'), ('America/New_York', '-04:00'), ('Asia/Kathmandu', '+05:45')):
+            with self.subTest(zone=zone), override_settings(TIME_ZONE=zone):
+                data = WeatherDataSerializer(WeatherData.objects.all(), many=True).data
+                self.assertTrue(data[0]['recorded_at'].endswith(offset))
+                self.assertRendersLikeGeneric()
+
+    def test_sparse_fields(self):
+        self.assertRendersLikeGeneric({'sparse_fields': {'recorded_at', 'weather_emoji', 'pressure'}})
@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from farmweather.farm.models import Crop, UserProfile
+from farmweather.farm.serializers import CropSerializer, UserProfileSerializer
+
+
+def make_crop(name, **fields):
+    return Crop.objects.create(
+        name=name, category='vegetable', optimal_temp_min=10, optimal_temp_max=30,
+        optimal_rainfall_min=20, optimal_rainfall_max=100, soil_type='loam',
+        planting_season='spring', days_to_maturity=90, spacing_cm=30, **fields,
+    )
+
+
+def selects_from(queries, table):
+    return [query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']]
+
+
+class ProjectQuerysetTests(TestCase):
+    def test_only_loads_the_rendered_columns(self):
+        serializer = CropSerializer(context={'sparse_fields': {'name', 'category'}})
+        queryset = serializer.project_queryset(Crop.objects.all())
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'name', 'category'}, False))
+        self.assertFalse(queryset._prefetch_related_lookups)
+
+    def test_unnarrowed_queryset_loads_every_column(self):
+        queryset = CropSerializer(context={}).project_queryset(Crop.objects.all(), narrow=False)
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+
+    def test_many_to_many_fields_are_prefetched_as_primary_keys(self):
+        serializer = CropSerializer(context={'sparse_fields': {'name', 'companion_plants'}})
+        [lookup] = serializer.project_queryset(Crop.objects.all())._prefetch_related_lookups
+        self.assertIsInstance(lookup, Prefetch)
+        self.assertEqual(lookup.prefetch_through, 'companion_plants')
+        self.assertEqual(lookup.queryset.query.deferred_loading, ({'id'}, False))
+
+    def test_nested_serializers_are_joined(self):
+        queryset = UserProfileSerializer(context={'sparse_fields': {'user'}}).project_queryset(UserProfile.objects.all())
+        self.assertEqual(queryset.query.select_related, {'user': {}})
+        queryset = UserProfileSerializer(context={'sparse_fields': {'phone'}}).project_queryset(UserProfile.objects.all())
+        self.assertFalse(queryset.query.select_related)
+
+
+class SparseFieldsetApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.client.force_login(self.user)
+        self.bean = make_crop('Bean')
+        self.corn = make_crop('Corn', growing_tips='Plant in blocks')
+        self.corn.companion_plants.add(self.bean)
+
+    def test_fields_narrow_the_response_and_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/crops/', {'fields': 'name, category'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {'name': 'Bean', 'category': 'vegetable'},
+            {'name': 'Corn', 'category': 'vegetable'},
+        ])
+        [select] = selects_from(queries, 'farm_crop')
+        self.assertNotIn('growing_tips', select)
+
+    def test_exclude_drops_fields(self):
+        response = self.client.get(f'/crops/{self.corn.pk}/', {'exclude': 'growing_tips,companion_plants'})
+        body = response.json()
+        self.assertNotIn('growing_tips', body)
+        self.assertNotIn('companion_plants', body)
+        self.assertEqual(body['name'], 'Corn')
+
+    def test_fields_and_exclude_combine(self):
+        response = self.client.get('/crops/', {'fields': 'id,name,category', 'exclude': 'category'})
+        self.assertEqual(response.json()[0].keys(), {'id', 'name'})
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({'fields': 'name,colour'}, {'exclude': 'colour'}):
+            response = self.client.get('/crops/', params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'detail': 'Unknown fields: colour'})
+
+    def test_related_fields_are_prefetched_in_one_query(self):
+        for name in ('Pea', 'Squash', 'Leek'):
+            make_crop(name).companion_plants.add(self.bean)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/crops/', {'fields': 'name,companion_plants'})
+        self.assertEqual(response.json()[1], {'name': 'Corn', 'companion_plants': [self.bean.pk]})
+        self.assertEqual(len(selects_from(queries, 'farm_crop')), 2)
+
+    def test_writes_ignore_sparse_parameters(self):
+        response = self.client.patch(
+            f'/crops/{self.corn.pk}/?fields=name', {'growing_tips': 'Hill up'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['growing_tips'], 'Hill up')
@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from farmweather.farm.models import Location, WeatherData
+from farmweather.farm.services import OpenMeteoService
+from farmweather.farm.weather_refresh import refresh_weather
+
+
+def reading(temperature, time='2026-06-01T12:00'):
+    return {'temperature': temperature, 'humidity': 60, 'weather_code': 1, 'time': time, 'timezone': 'UTC'}
+
+
+def fake_batch(weather):
+    """get_current_weather_batch answering from {(lat, lon): current}"""
+    return lambda coordinates: [weather.get(coordinate) for coordinate in coordinates]
+
+
+@override_settings(OPENMETEO_BATCH_SIZE=2)
+class RefreshWeatherTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('grower')
+        self.locations = [
+            Location.objects.create(
+                user=self.user, name=f'Farm {i}', latitude=i, longitude=i, city='Durban', country='ZA',
+            )
+            for i in range(3)
+        ]
+
+    def refresh(self, weather):
+        with mock.patch.object(OpenMeteoService, 'get_current_weather_batch', side_effect=fake_batch(weather)):
+            return refresh_weather(self.locations)
+
+    def test_statuses_follow_the_locations(self):
+        results = self.refresh({
+            (0, 0): reading(20),
+            (1, 1): {**reading(18), 'stale': True, 'stale_since': '2026-06-01T10:00:00'},
+        })
+        self.assertEqual([result.location for result in results], self.locations)
+        self.assertEqual([result.status for result in results], ['updated', 'stale', 'failed'])
+        self.assertEqual(list(WeatherData.objects.values_list('location', 'temperature_current')), [
+            (self.locations[0].pk, 20),
+        ])
+        self.assertIsNotNone(self.locations[0].get_cache_meta('current'))
+        self.assertIsNone(self.locations[1].get_cache_meta('current'))
+
+    def test_repeated_readings_are_upserted(self):
+        self.refresh({(0, 0): reading(20), (2, 2): reading(25)})
+        results = self.refresh({(0, 0): reading(21), (2, 2): reading(25, time='2026-06-01T12:15')})
+        self.assertEqual([result.status for result in results], ['updated', 'failed', 'updated'])
+        self.assertEqual(WeatherData.objects.filter(location=self.locations[0]).get().temperature_current, 21)
+        self.assertEqual(WeatherData.objects.filter(location=self.locations[2]).count(), 2)
+
+    def test_incomplete_reading_fails(self):
+        [result, *_] = self.refresh({(0, 0): {**reading(20), 'humidity': None}})
+        self.assertEqual((result.status, result.error), ('failed', 'Incomplete reading'))
+        self.assertFalse(WeatherData.objects.exists())
+
+
+class WeatherAdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.admin)
+        self.location = Location.objects.create(
+            user=self.admin, name='Farm', latitude=1, longitude=1, city='Durban', country='ZA',
+        )
+        patcher = mock.patch.object(
+            OpenMeteoService, 'get_current_weather_batch', side_effect=fake_batch({(1, 1): reading(20)}),
+        )
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_location_action_renders_results(self):
+        response = self.client.post(reverse('admin:farm_location_changelist'), {
+            'action': 'fetch_latest_weather', '_selected_action': [self.location.pk],
+        })
+        self.assertContains(response, '1 updated, 0 not updated')
+        self.assertEqual(WeatherData.objects.get().temperature_current, 20)
+
+    def test_weatherdata_action_refreshes_row_locations(self):
+        row = WeatherData.objects.create(
+            location=self.location, temperature_current=10, humidity=50, weather_code=0,
+            weather_description='Clear sky', recorded_at='2026-05-01T00:00Z',
+        )
+        response = self.client.post(reverse('admin:farm_weatherdata_changelist'), {
+            'action': 'fetch_latest_weather', '_selected_action': [row.pk],
+        })
+        self.assertContains(response, '1 updated')
+        self.assertEqual(WeatherData.objects.count(), 2)
+        self.fetch.assert_called_once_with([(1, 1)])
+
+    def test_fetch_view_requires_post(self):
+        row = WeatherData.objects.create(
+            location=self.location, temperature_current=10, humidity=50, weather_code=0,
+            weather_description='Clear sky', recorded_at='2026-05-01T00:00Z',
+        )
+        url = reverse('admin:farm_weatherdata_fetch', args=[row.pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.fetch.assert_not_called()
+
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(self.admin)
+        self.assertEqual(csrf_client.post(url).status_code, 403)
+        self.fetch.assert_not_called()
+
+        response = self.client.post(url)
+        self.assertRedirects(response, reverse('admin:farm_weatherdata_changelist'))
+        self.assertEqual(WeatherData.objects.count(), 2)
+
+    def test_changelist_button_posts_the_form(self):
+        WeatherData.objects.create(
+            location=self.location, temperature_current=10, humidity=50, weather_code=0,
+            weather_description='Clear sky', recorded_at='2026-05-01T00:00Z',
+        )
+        response = self.client.get(reverse('admin:farm_weatherdata_changelist'))
+        self.assertContains(response, 'formmethod="post"')
+        self.assertContains(response, 'csrfmiddlewaretoken')
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from farmweather.farm.models import Location, WeatherData
+from farmweather.farm.write_queue import Write, WriteQueue
+
+START = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+
+
+def snapshot(location, hour, temperature=20.0):
+    return WeatherData(
+        location=location, temperature_current=temperature, humidity=50, weather_code=0,
+        weather_description='Clear sky', recorded_at=START + timedelta(hours=hour),
+    )
+
+
+def upsert(obj):
+    return Write(obj, unique_fields=['location', 'recorded_at'], update_fields=['temperature_current'])
+
+
+class ApplyTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        self.location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        self.queue = WriteQueue()
+
+    def test_model_writes_are_batched_per_group(self):
+        batch = [upsert(snapshot(self.location, hour)) for hour in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            self.queue._commit(batch)
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(WeatherData.objects.count(), 5)
+
+    def test_upserts_keep_the_last_write_per_key(self):
+        WeatherData.objects.bulk_create([snapshot(self.location, 0)])
+        self.queue._commit([
+            upsert(snapshot(self.location, 0, temperature=21)),
+            upsert(snapshot(self.location, 0, temperature=22)),
+        ])
+        self.assertEqual(list(WeatherData.objects.values_list('temperature_current', flat=True)), [22])
+
+    def test_callables_see_earlier_writes(self):
+        seen = []
+        self.queue._commit([
+            upsert(snapshot(self.location, 0)),
+            Write(lambda: seen.append(WeatherData.objects.count())),
+            upsert(snapshot(self.location, 1)),
+            Write(lambda: seen.append(WeatherData.objects.count())),
+        ])
+        self.assertEqual(seen, [1, 2])
+
+    def test_failed_batch_is_retried_one_by_one(self):
+        WeatherData.objects.bulk_create([snapshot(self.location, 0)])
+
+        def explode():
+            raise RuntimeError('boom')
+
+        with self.assertLogs('farmweather.farm.write_queue', 'ERROR') as logs:
+            self.queue._commit([
+                upsert(snapshot(self.location, 1)),
+                Write(snapshot(self.location, 0)),  # plain insert of an existing key
+                Write(explode),
+                upsert(snapshot(self.location, 2)),
+            ])
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(WeatherData.objects.count(), 3)
+
+
+class WriterThreadTests(TransactionTestCase):
+    """The writer thread uses its own connection, so no wrapping test transaction"""
+
+    def test_flush_waits_for_submitted_writes_and_stop_ends_the_thread(self):
+        user = User.objects.create_user('grower')
+        location = Location.objects.create(
+            user=user, name='Farm', latitude=-29.8, longitude=31.0, city='Durban', country='ZA',
+        )
+        queue = WriteQueue(batch_size=3, flush_interval=0.05)
+        for hour in range(7):
+            queue.submit(snapshot(location, hour), unique_fields=['location', 'recorded_at'])
+        queue.flush()
+        self.assertEqual(WeatherData.objects.count(), 7)
+
+        thread = queue._thread
+        queue.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(queue._thread)
+        queue.stop()  # stopping twice is harmless
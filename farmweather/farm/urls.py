@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import CropViewSet, LocationViewSet, WeatherDataViewSet, UserProfileViewSet
+from .instrumentation import metrics_view
 
 router = DefaultRouter()
 router.register(r'crops', CropViewSet)
@@ -10,4 +11,5 @@ router.register(r'profiles', UserProfileViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),   # API endpoints
+    path('metrics/', metrics_view, name='metrics'),   # Prometheus scrape target
 ]
@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.contrib import messages
 from .services import OpenMeteoService
 from .crops import suggest_crops
+from .geocoding import geocode
 import requests
 import datetime
 
@@ -28,11 +29,20 @@ def home(request):
 
     context = {"weather": None, "summary": None, "crops": [], "daily": []}
 
-    # Hardcoded test location (Kimberley) until frontend sends location input
+    # Default to Kimberley unless the frontend asks for a city (?city=<name>)
     lat, lon = -28.741943, 24.771944
     loc = "Kimberley"
 
     try:
+        city = request.GET.get("city", "").strip()
+        if city:
+            places = geocode(city, count=1)
+            if places:
+                lat, lon = places[0]["latitude"], places[0]["longitude"]
+                loc = places[0]["name"]
+            else:
+                messages.error(request, f"Location '{city}' not found. Showing {loc} instead.")
+
         current = weather_service.get_current_weather(lat, lon)
         forecast = weather_service.get_weather_forecast(lat, lon, days=7)
         summary = summarize_forecast(forecast)
@@ -48,6 +58,7 @@ def home(request):
             "crops": crops,
             "daily": forecast.get("days", []) if forecast else [],
             "location_label": loc,
+            "stale_since": forecast.get("stale_since") if forecast else None,
         })
 
     except requests.HTTPError as e:
@@ -0,0 +1,87 @@
+"""
+On-demand refresh of current weather for many locations.
+
+Used by the admin "fetch latest weather" action. Locations are split into
+multi-location chunks of OPENMETEO_BATCH_SIZE that are fetched concurrently,
+so a few hundred stations cost a handful of parallel upstream calls. Fresh
+readings are upserted into WeatherData in one bulk statement, written
+through to the location weather cache and folded into the GDD accumulators.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .gdd import accumulate_readings
+from .instrumentation import submit
+from .models import WeatherData
+from .services import OpenMeteoService
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshResult:
+    """Outcome for one location; `seconds` is the time of its chunk's upstream call"""
+
+    def __init__(self, location, status, seconds, weather=None, error=''):
+        self.location = location
+        self.status = status
+        self.seconds = seconds
+        self.weather = weather
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == 'updated'
+
+
+def refresh_weather(locations):
+    """
+    Fetch current weather for `locations` and upsert a WeatherData row per
+    location. Returns RefreshResults in the order of `locations`.
+    """
+    locations = list(locations)
+    chunk_size = settings.OPENMETEO_BATCH_SIZE
+    chunks = [locations[start:start + chunk_size] for start in range(0, len(locations), chunk_size)]
+    service = OpenMeteoService()
+
+    def fetch(chunk):
+        start = time.perf_counter()
+        weather = service.get_current_weather_batch([(loc.latitude, loc.longitude) for loc in chunk])
+        return chunk, weather, time.perf_counter() - start
+
+    results = {}
+    rows = []
+    with ThreadPoolExecutor(max_workers=settings.WEATHER_REFRESH_MAX_WORKERS) as pool:
+        futures = [submit(pool, fetch, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            chunk, weather, seconds = future.result()
+            logger.info(f"Weather refresh: chunk {done}/{len(chunks)} ({len(chunk)} locations) in {seconds:.2f}s")
+            for location, current in zip(chunk, weather):
+                if not current:
+                    results[location.pk] = RefreshResult(location, 'failed', seconds, error='No data from upstream')
+                elif current.get('stale'):
+                    results[location.pk] = RefreshResult(
+                        location, 'stale', seconds, current, error=f"Upstream unavailable; data from {current['stale_since']}"
+                    )
+                else:
+                    row = WeatherData.from_current_weather(location, current)
+                    if row is None:
+                        results[location.pk] = RefreshResult(location, 'failed', seconds, current, error='Incomplete reading')
+                        continue
+                    rows.append(row)
+                    location._cache_weather(location.get_cache_key('current'), current, 600)
+                    results[location.pk] = RefreshResult(location, 'updated', seconds, current)
+
+    if rows:
+        WeatherData.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['location', 'recorded_at'],
+            update_fields=WeatherData.SNAPSHOT_FIELDS,
+        )
+        # bulk_create sends no post_save, so feed the GDD accumulators directly
+        accumulate_readings(rows)
+    return [results[location.pk] for location in locations]
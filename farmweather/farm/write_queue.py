@@ -0,0 +1,164 @@
+"""
+Single-writer queue for background database writes.
+
+SQLite allows one writer at a time, so many threads each committing small
+writes mostly wait on (or fail with) "database is locked". Background
+producers (weather snapshots, alerts, rollups) instead `submit()` their
+writes here; one writer thread drains the queue and commits each batch in
+a single transaction, using bulk_create per model.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class Write:
+    """A model instance to insert (or upsert), or a callable to run in the batch transaction"""
+
+    def __init__(self, target, unique_fields=None, update_fields=None):
+        self.target = target
+        self.unique_fields = tuple(unique_fields or ())
+        self.update_fields = tuple(update_fields or ())
+
+    def group_key(self):
+        return (type(self.target), self.unique_fields, self.update_fields)
+
+
+class WriteQueue:
+    def __init__(self, batch_size=500, flush_interval=0.5, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Bounded so producers slow down instead of exhausting memory
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, target, unique_fields=None, update_fields=None):
+        """
+        Queue a write. `target` is an unsaved model instance, or a callable
+        taking no arguments for writes that are not plain inserts.
+        With `unique_fields`, conflicting rows are updated with
+        `update_fields` (or left alone when that is empty).
+        """
+        self._ensure_started()
+        self._queue.put(Write(target, unique_fields, update_fields))
+
+    def flush(self):
+        """Block until everything submitted so far has been committed"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.flush()
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        self._stopping.clear()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stopping.is_set():
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                # Collect more writes until the batch is full or the interval is up
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                try:
+                    close_old_connections()
+                    self._commit(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            connection.close()
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                self._apply(batch)
+        except Exception:
+            logger.exception(f"Write batch of {len(batch)} failed; retrying writes one by one")
+            for write in batch:
+                try:
+                    with transaction.atomic():
+                        self._apply([write])
+                except Exception:
+                    logger.exception(f"Dropping failed write {write.target!r}")
+            return
+        logger.debug(f"Committed {len(batch)} writes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def _apply(self, batch):
+        """Apply writes in submission order, bulk-inserting runs of model writes between callables"""
+        groups = defaultdict(list)
+        for write in batch:
+            if callable(write.target):
+                self._insert(groups)
+                groups.clear()
+                write.target()
+            else:
+                groups[write.group_key()].append(write.target)
+        self._insert(groups)
+
+    def _insert(self, groups):
+        for (model, unique_fields, update_fields), objs in groups.items():
+            if unique_fields:
+                # One row per key, last write wins
+                attnames = [model._meta.get_field(field).attname for field in unique_fields]
+                objs = list({
+                    tuple(getattr(obj, attname) for attname in attnames): obj for obj in objs
+                }.values())
+            if not unique_fields:
+                model.objects.bulk_create(objs)
+            elif update_fields:
+                model.objects.bulk_create(
+                    objs, update_conflicts=True,
+                    unique_fields=unique_fields, update_fields=update_fields,
+                )
+            else:
+                model.objects.bulk_create(objs, ignore_conflicts=True)
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    """The process-wide writer, flushed on interpreter exit"""
+    global _write_queue
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(
+                    batch_size=settings.WRITE_QUEUE_BATCH_SIZE,
+                    flush_interval=settings.WRITE_QUEUE_FLUSH_INTERVAL,
+                    max_pending=settings.WRITE_QUEUE_MAX_PENDING,
+                )
+                atexit.register(_write_queue.stop)
+    return _write_queue
@@ -1,3 +1,142 @@
+"""
+Rule-based climate zone classification.
+
+Zones are declared as data in CLIMATE_RULES: each rule is a label and a
+list of (field, operator, threshold) conditions, checked in order with the
+first full match winning. The rules are compiled once into predicates that
+work on whole columns, so a decade of daily observations for many sites is
+classified in one vectorized numpy pass. Single observations skip numpy and
+go through a plain-Python loop over the same rules.
+"""
+import math
+import operator
+from collections import namedtuple
+
+import numpy as np
+
+FIELDS = ('temperature', 'rainfall', 'humidity')
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# Checked in order; the first rule whose conditions all hold wins
+CLIMATE_RULES = [
+    ("High drought risk", [('rainfall', '<', 20), ('temperature', '>', 32)]),
+    ("Disease-prone conditions", [('humidity', '>', 80), ('temperature', '>', 25)]),
+    ("Optimal for maize", [('temperature', '>=', 18), ('temperature', '<=', 28), ('rainfall', '>', 40)]),
+]
+DEFAULT_ZONE = "Unfavorable"
+MISSING_ZONE = "Missing climate data"
+
+ZONE_CROPS = {
+    "High drought risk": ["Sorghum", "Millet", "Cowpea", "Cassava"],
+    "Disease-prone conditions": ["Rice", "Taro", "Sweet Potato"],
+    "Optimal for maize": ["Maize", "Beans", "Soybean", "Groundnut"],
+    DEFAULT_ZONE: ["Sorghum", "Sunflower"],
+}
+
+ClimateClassification = namedtuple('ClimateClassification', ['labels', 'counts'])
+
+
+def compile_rules(rules):
+    """[(label, [(field, op, threshold), ...])] -> [(label, [(field, fn, threshold), ...])]"""
+    compiled = []
+    for label, conditions in rules:
+        checks = []
+        for field, op, threshold in conditions:
+            if field not in FIELDS:
+                raise ValueError(f"Unknown climate field: {field}")
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator: {op}")
+            checks.append((field, OPERATORS[op], threshold))
+        compiled.append((label, checks))
+    return compiled
+
+
+_COMPILED_RULES = compile_rules(CLIMATE_RULES)
+ZONES = [label for label, _ in CLIMATE_RULES] + [DEFAULT_ZONE, MISSING_ZONE]
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _classify_columns_numpy(columns, rules):
+    # np.array maps None to NaN, so missing values survive the conversion
+    arrays = {field: np.array(values, dtype=float) for field, values in columns.items()}
+    size = len(next(iter(arrays.values())))
+    default_code, missing_code = len(rules), len(rules) + 1
+
+    codes = np.full(size, default_code, dtype=np.intp)
+    # Later rules are written first so earlier ones overwrite them
+    for code in range(len(rules) - 1, -1, -1):
+        _, checks = rules[code]
+        mask = np.ones(size, dtype=bool)
+        for field, fn, threshold in checks:
+            mask &= fn(arrays[field], threshold)
+        codes[mask] = code
+
+    missing = np.zeros(size, dtype=bool)
+    for values in arrays.values():
+        missing |= np.isnan(values)
+    codes[missing] = missing_code
+
+    labels = np.array(ZONES, dtype=object)[codes]
+    counts = np.bincount(codes, minlength=len(ZONES))
+    return labels, counts.tolist()
+
+
+def _classify_columns_python(columns, rules):
+    default_code, missing_code = len(rules), len(rules) + 1
+    # Address fields by position so no per-row dict is built
+    position = {field: index for index, field in enumerate(columns)}
+    indexed = [
+        [(position[field], fn, threshold) for field, fn, threshold in checks]
+        for _, checks in rules
+    ]
+    labels = []
+    counts = [0] * len(ZONES)
+    for values in zip(*columns.values()):
+        if any(_is_missing(value) for value in values):
+            code = missing_code
+        else:
+            code = default_code
+            for index, checks in enumerate(indexed):
+                if all(fn(values[i], threshold) for i, fn, threshold in checks):
+                    code = index
+                    break
+        labels.append(ZONES[code])
+        counts[code] += 1
+    return labels, counts
+
+
+def classify_climate_batch(temperature, rainfall, humidity):
+    """
+    Classify many observations at once.
+
+    Args:
+        temperature, rainfall, humidity: Equal-length sequences (lists or
+            numpy arrays), one entry per observation. None/NaN marks a
+            missing value.
+
+    Returns:
+        ClimateClassification: `labels`, a numpy array with one zone per
+        observation, and `counts` mapping every zone to its number of
+        observations.
+    """
+    columns = {'temperature': temperature, 'rainfall': rainfall, 'humidity': humidity}
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("temperature, rainfall and humidity must have the same length")
+
+    labels, counts = _classify_columns_numpy(columns, _COMPILED_RULES)
+    return ClimateClassification(labels, dict(zip(ZONES, counts)))
+
+
 def classify_climate(climate_data):
     """
     Classifies climate conditions based on temperature, rainfall, and humidity.
@@ -9,17 +148,13 @@ def classify_climate(climate_data):
         str: Climate classification label
     """
     try:
-        temp = climate_data['temperature']
-        rain = climate_data['rainfall']
-        humidity = climate_data['humidity']
-
-        if rain < 20 and temp > 32:
-            return "High drought risk"
-        elif humidity > 80 and temp > 25:
-            return "Disease-prone conditions"
-        elif 18 <= temp <= 28 and rain > 40:
-            return "Optimal for maize"
-        else:
-            return "Unfavorable"
+        columns = {field: [climate_data[field]] for field in FIELDS}
     except KeyError as e:
-        return f"Missing climate field: {e}"
\ No newline at end of file
+        return f"Missing climate field: {e}"
+    labels, _ = _classify_columns_python(columns, _COMPILED_RULES)
+    return labels[0]
+
+
+def generate_crops(zone):
+    """Crops suited to a climate zone (empty for unknown or missing data)"""
+    return list(ZONE_CROPS.get(zone, []))
@@ -1,26 +1,75 @@
+"""
+Crop recommendation pipeline.
+
+Weather and satellite crop-health do not depend on each other, so both are
+fetched concurrently on a shared pool and a recommendation takes as long as
+the slower of the two. Climate classification then runs on the result.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from farmweather.farm.instrumentation import submit
 from .mapmycrop_service import fetch_crop_monitoring_data
-from .weather_service import fetch_weather_data
-from .climate_classifier import classify_climate, generate_crops
+from .weather_service import fetch_weather_data, fetch_weather_data_batch
+from .climate_classifier import classify_climate, classify_climate_batch, generate_crops
 
-def get_crop_recommendations(location):
-    lat = location.get("lat")
-    lon = location.get("lon")
-    name = location.get("name", "Unknown")
+_executor = ThreadPoolExecutor(
+    max_workers=settings.CROP_PIPELINE_MAX_WORKERS, thread_name_prefix="crop-pipeline"
+)
 
-    weather = fetch_weather_data(location)
-    temp = weather.get("temperature")
-    rainfall = weather.get("rainfall")
 
-    zone = classify_climate(temp, rainfall)
-    rule_based_crops = generate_crops(zone)
+def _climate_inputs(weather):
+    return {
+        "temperature": weather.get("temperature"),
+        "rainfall": weather.get("precipitation"),
+        "humidity": weather.get("humidity"),
+    }
 
-    satellite_data = fetch_crop_monitoring_data(lat, lon)
-    crop_health = satellite_data.get("crop_health")
 
+def _recommendation(location, zone, satellite_data):
+    satellite_data = satellite_data or {}
     return {
-        "location": name,
+        "location": location.get("name", "Unknown"),
         "climate_zone": zone,
-        "recommended_crops": rule_based_crops,
-        "crop_health": crop_health,
+        "recommended_crops": generate_crops(zone),
+        "crop_health": satellite_data.get("crop_health"),
         "satellite_timestamp": satellite_data.get("timestamp")
-    }
\ No newline at end of file
+    }
+
+
+def get_crop_recommendations(location):
+    weather_future = submit(_executor, fetch_weather_data, location)
+    satellite_future = submit(_executor, fetch_crop_monitoring_data, location.get("lat"), location.get("lon"))
+
+    weather = weather_future.result() or {}
+    zone = classify_climate(_climate_inputs(weather))
+    return _recommendation(location, zone, satellite_future.result())
+
+
+def get_crop_recommendations_batch(locations):
+    """
+    Recommendations for many locations: weather comes from one batched
+    fetch, crop health from one call per distinct coordinate, all running
+    concurrently, and the climate zones are classified in a single pass.
+    """
+    if not locations:
+        return []
+
+    weather_future = submit(_executor, fetch_weather_data_batch, locations)
+    coordinates = dict.fromkeys((location.get("lat"), location.get("lon")) for location in locations)
+    satellite_futures = {
+        coordinate: submit(_executor, fetch_crop_monitoring_data, *coordinate)
+        for coordinate in coordinates
+    }
+
+    inputs = [_climate_inputs(weather or {}) for weather in weather_future.result()]
+    zones, _ = classify_climate_batch(
+        [row["temperature"] for row in inputs],
+        [row["rainfall"] for row in inputs],
+        [row["humidity"] for row in inputs],
+    )
+    return [
+        _recommendation(location, str(zone), satellite_futures[(location.get("lat"), location.get("lon"))].result())
+        for location, zone in zip(locations, zones)
+    ]
@@ -0,0 +1,53 @@
+# mapmycrop_service.py
+"""
+MapMyCrop satellite crop-monitoring client.
+
+Satellite passes are days apart, so answers are cached per coordinate for
+MAPMYCROP_CACHE_TTL. Calls go through the shared upstream guards, so a
+failing MapMyCrop trips its own circuit breaker without slowing down the
+weather stage.
+"""
+import logging
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from farmweather.farm.resilience import guarded_get
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(lat, lon):
+    return f"mapmycrop:{float(lat):.4f}:{float(lon):.4f}"
+
+
+def fetch_crop_monitoring_data(lat, lon):
+    """Crop health for a coordinate, or None when MapMyCrop is unavailable"""
+    cache_key = _cache_key(lat, lon)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = guarded_get(
+            requests, 'mapmycrop', settings.MAPMYCROP_BASE_URL,
+            params={'lat': lat, 'lon': lon},
+            timeout=(settings.UPSTREAM_CONNECT_TIMEOUT, settings.MAPMYCROP_TIMEOUT),
+        )
+        response.raise_for_status()
+        data = response.json()
+    except requests.RequestException as e:
+        logger.error(f"Error fetching crop monitoring data: {e}")
+        return None
+    except ValueError as e:
+        logger.error(f"Invalid crop monitoring response: {e}")
+        return None
+
+    result = {
+        'crop_health': data.get('crop_health'),
+        'ndvi': data.get('ndvi'),
+        'timestamp': data.get('timestamp'),
+    }
+    cache.set(cache_key, result, settings.MAPMYCROP_CACHE_TTL)
+    return result
@@ -1,9 +1,45 @@
 # weather_service.py
-from farmweather.services import OpenMeteoService
+from django.conf import settings
+from django.core.cache import cache
+
+from farmweather.farm.services import OpenMeteoService
 
 weather_service = OpenMeteoService()
 
+
+def _cache_key(lat, lon):
+    return f"crop_weather:{float(lat):.4f}:{float(lon):.4f}"
+
+
 def fetch_weather_data(location):
     lat = location.get("lat")
     lon = location.get("lon")
-    return weather_service.get_current_weather(lat, lon)
+    cache_key = _cache_key(lat, lon)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    weather = weather_service.get_current_weather(lat, lon)
+    # Stale fallbacks are served but never cached
+    if weather and not weather.get("stale"):
+        cache.set(cache_key, weather, settings.CROP_WEATHER_CACHE_TTL)
+    return weather
+
+
+def fetch_weather_data_batch(locations):
+    """Current weather for many locations: one cache multi-get, then one batched upstream call"""
+    coordinates = [(location.get("lat"), location.get("lon")) for location in locations]
+    keys = {coordinate: _cache_key(*coordinate) for coordinate in coordinates}
+    cached = cache.get_many(list(keys.values()))
+    found = {coordinate: cached[key] for coordinate, key in keys.items() if key in cached}
+
+    missing = [coordinate for coordinate in keys if coordinate not in found]
+    if missing:
+        fetched = weather_service.get_current_weather_batch(missing)
+        found.update(zip(missing, fetched))
+        cache.set_many(
+            {keys[coordinate]: weather for coordinate, weather in zip(missing, fetched)
+             if weather and not weather.get("stale")},
+            settings.CROP_WEATHER_CACHE_TTL,
+        )
+    return [found.get(coordinate) for coordinate in coordinates]
@@ -23,6 +23,70 @@ OPENMETEO_BASE_URL = os.getenv("OPEN_METEO_BASE_URL", "https://api.open-meteo.co
 GEOCODING_API_URL = os.getenv("GEOCODING_API_URL", "https://geocoding-api.open-meteo.com/v1/search")
 MAPMYCROP_BASE_URL = os.getenv("MAPMYCROP_BASE_URL", "https://mapmycrop.com/api/v1/monitor")
 
+# Crop recommendation pipeline: satellite crop health changes between passes
+# days apart, weather much faster
+MAPMYCROP_TIMEOUT = float(os.getenv("MAPMYCROP_TIMEOUT", "10"))
+MAPMYCROP_CACHE_TTL = int(os.getenv("MAPMYCROP_CACHE_TTL", str(6 * 3600)))
+CROP_WEATHER_CACHE_TTL = int(os.getenv("CROP_WEATHER_CACHE_TTL", "600"))
+CROP_PIPELINE_MAX_WORKERS = int(os.getenv("CROP_PIPELINE_MAX_WORKERS", "8"))
+
+# Multi-location weather requests
+OPENMETEO_BATCH_SIZE = int(os.getenv("OPENMETEO_BATCH_SIZE", "50"))
+BULK_WEATHER_MAX_LOCATIONS = int(os.getenv("BULK_WEATHER_MAX_LOCATIONS", "200"))
+LOCATION_IMPORT_MAX_ROWS = int(os.getenv("LOCATION_IMPORT_MAX_ROWS", "5000"))
+WEATHER_REFRESH_MAX_WORKERS = int(os.getenv("WEATHER_REFRESH_MAX_WORKERS", "4"))
+
+# Upstream protection: per-upstream rate limit and circuit breaker, plus how
+# long the last good payload is kept for degraded (stale) responses
+UPSTREAM_RATE_LIMIT_PER_SECOND = float(os.getenv("UPSTREAM_RATE_LIMIT_PER_SECOND", "10"))
+UPSTREAM_RATE_LIMIT_BURST = int(os.getenv("UPSTREAM_RATE_LIMIT_BURST", "20"))
+UPSTREAM_RATE_LIMIT_WAIT = float(os.getenv("UPSTREAM_RATE_LIMIT_WAIT", "0.5"))
+UPSTREAM_BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))
+UPSTREAM_STALE_TTL = int(os.getenv("UPSTREAM_STALE_TTL", str(7 * 24 * 3600)))
+
+# Historical (archive) weather: longest date range one request may ask for, and
+# how long an answer is cached
+HISTORICAL_WEATHER_MAX_DAYS = int(os.getenv("HISTORICAL_WEATHER_MAX_DAYS", "366"))
+HISTORICAL_WEATHER_CACHE_TTL = int(os.getenv("HISTORICAL_WEATHER_CACHE_TTL", str(24 * 3600)))
+
+# Geocoding cache: answers persist in the database for GEOCODING_CACHE_DAYS and
+# in the Django cache for GEOCODING_MEMORY_TTL seconds
+GEOCODING_CACHE_DAYS = int(os.getenv("GEOCODING_CACHE_DAYS", "90"))
+GEOCODING_MEMORY_TTL = int(os.getenv("GEOCODING_MEMORY_TTL", "86400"))
+GEOCODING_MAX_WORKERS = int(os.getenv("GEOCODING_MAX_WORKERS", "4"))
+
+# Geohash length of a shared weather grid cell (5 characters is roughly 5 km)
+WEATHER_CELL_PRECISION = int(os.getenv("WEATHER_CELL_PRECISION", "5"))
+
+# Local IP range table used for automatic location detection (see farm/ip_location.py)
+IP_LOCATION_TABLE = os.getenv("IP_LOCATION_TABLE", str(BASE_DIR / "data" / "ip_locations.csv"))
+IP_LOCATION_CACHE_TTL = int(os.getenv("IP_LOCATION_CACHE_TTL", "86400"))
+IP_LOCATION_TRUST_FORWARDED = os.getenv("IP_LOCATION_TRUST_FORWARDED", "False").lower() == "true"
+
+# Bed/field layout planner (farm/layout.py): search time per request and grid size cap
+LAYOUT_TIME_BUDGET = float(os.getenv("LAYOUT_TIME_BUDGET", "2"))
+LAYOUT_MAX_CELLS = int(os.getenv("LAYOUT_MAX_CELLS", "100000"))
+
+# Irrigation scheduler (farm/irrigation.py): profiles handled per bulk forecast read and upsert
+IRRIGATION_CHUNK_SIZE = int(os.getenv("IRRIGATION_CHUNK_SIZE", "2000"))
+
+# Forecast change detection tracks this many leading days of each forecast; shorter
+# fetches are ignored so every version compares the same window
+FORECAST_CHANGE_DAYS = int(os.getenv("FORECAST_CHANGE_DAYS", "7"))
+
+# A refreshed forecast counts as changed (new ForecastVersion, feed entry) when any
+# day moves by at least this much in one of these fields
+FORECAST_CHANGE_THRESHOLDS = {
+    'temperature_max': float(os.getenv("FORECAST_CHANGE_TEMPERATURE", "1.5")),
+    'temperature_min': float(os.getenv("FORECAST_CHANGE_TEMPERATURE", "1.5")),
+    'precipitation_sum': float(os.getenv("FORECAST_CHANGE_PRECIPITATION", "2")),
+    'precipitation_probability': float(os.getenv("FORECAST_CHANGE_PROBABILITY", "20")),
+    'wind_speed_max': float(os.getenv("FORECAST_CHANGE_WIND", "10")),
+    'et0_mm': float(os.getenv("FORECAST_CHANGE_ET0", "0.5")),
+}
+
 # Fail fast if missing
 if not OPENMETEO_BASE_URL or not GEOCODING_API_URL:
     raise ValueError("Missing Open-Meteo config in .env")
@@ -55,6 +119,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'farmweather.farm.instrumentation.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,9 +156,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Wait for the write lock instead of failing with "database is locked"
+            'timeout': 20,
+            # Take the write lock when a transaction starts, not on its first write,
+            # so a read-then-write transaction cannot deadlock against another writer
+            'transaction_mode': 'IMMEDIATE',
+            # WAL lets readers run alongside the writer; NORMAL sync is safe in WAL mode
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'
+            ),
+        },
     }
 }
 
+# Background writes go through one batching writer thread (farm/write_queue.py)
+WRITE_QUEUE_BATCH_SIZE = int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "500"))
+WRITE_QUEUE_FLUSH_INTERVAL = float(os.getenv("WRITE_QUEUE_FLUSH_INTERVAL", "0.5"))
+WRITE_QUEUE_MAX_PENDING = int(os.getenv("WRITE_QUEUE_MAX_PENDING", "10000"))
+# Store a WeatherData row for every fresh current-weather fetch
+RECORD_WEATHER_SNAPSHOTS = os.getenv("RECORD_WEATHER_SNAPSHOTS", "False").lower() == "true"
+
+
+# Outgoing mail (notifications are delivered by the dispatch_notifications worker)
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False").lower() == "true"
+EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", "10"))
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "FarmWeather <noreply@farmweather.local>")
+
+# Notification outbox (farm/notifications.py): messages claimed per batch, how long a
+# claim is held, parallel SMTP connections, and retry backoff
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+OUTBOX_DISPATCH_WORKERS = int(os.getenv("OUTBOX_DISPATCH_WORKERS", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "60"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -103,8 +208,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "farmweather.farm.instrumentation.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
+# Prometheus scrape endpoint (/metrics/) is open to these addresses and staff users
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1").split(",") if ip.strip()]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
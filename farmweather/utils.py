@@ -1,63 +1,67 @@
 from datetime import datetime, timedelta
 import pytz
 
+# OpenMeteo weather code lookup tables, built once at import
+WEATHER_DESCRIPTIONS = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    56: "Light freezing drizzle",
+    57: "Dense freezing drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    66: "Light freezing rain",
+    67: "Heavy freezing rain",
+    71: "Slight snow fall",
+    73: "Moderate snow fall",
+    75: "Heavy snow fall",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Violent rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail"
+}
+
+WEATHER_EMOJIS = {
+    0: '☀️',
+    1: '🌤️',
+    2: '⛅',
+    3: '☁️',
+    45: '🌫️',
+    48: '🌫️',
+    51: '🌦️',
+    53: '🌦️',
+    55: '🌦️',
+    61: '🌧️',
+    63: '🌧️',
+    65: '🌧️',
+    80: '🌦️',
+    81: '🌧️',
+    82: '⛈️',
+    95: '⛈️',
+    96: '⛈️',
+    99: '⛈️',
+}
+DEFAULT_WEATHER_EMOJI = '🌤️'
+
 def get_weather_description(weather_code):
     """Convert OpenMeteo weather code to description"""
-    descriptions = {
-        0: "Clear sky",
-        1: "Mainly clear",
-        2: "Partly cloudy",
-        3: "Overcast",
-        45: "Fog",
-        48: "Depositing rime fog",
-        51: "Light drizzle",
-        53: "Moderate drizzle",
-        55: "Dense drizzle",
-        56: "Light freezing drizzle",
-        57: "Dense freezing drizzle",
-        61: "Slight rain",
-        63: "Moderate rain",
-        65: "Heavy rain",
-        66: "Light freezing rain",
-        67: "Heavy freezing rain",
-        71: "Slight snow fall",
-        73: "Moderate snow fall",
-        75: "Heavy snow fall",
-        77: "Snow grains",
-        80: "Slight rain showers",
-        81: "Moderate rain showers",
-        82: "Violent rain showers",
-        85: "Slight snow showers",
-        86: "Heavy snow showers",
-        95: "Thunderstorm",
-        96: "Thunderstorm with slight hail",
-        99: "Thunderstorm with heavy hail"
-    }
-    return descriptions.get(weather_code, "Unknown")
+    return WEATHER_DESCRIPTIONS.get(weather_code, "Unknown")
 
 def get_weather_emoji(weather_code):
     """Convert OpenMeteo weather code to emoji"""
-    emojis = {
-        0: '☀️',      
-        1: '🌤️',      
-        2: '⛅',      
-        3: '☁️',      
-        45: '🌫️',     
-        48: '🌫️',     
-        51: '🌦️',     
-        53: '🌦️',     
-        55: '🌦️',     
-        61: '🌧️',     
-        63: '🌧️',     
-        65: '🌧️',     
-        80: '🌦️',     
-        81: '🌧️',     
-        82: '⛈️',     
-        95: '⛈️',     
-        96: '⛈️',     
-        99: '⛈️',     
-    }
-    return emojis.get(weather_code, '🌤️')
+    return WEATHER_EMOJIS.get(weather_code, DEFAULT_WEATHER_EMOJI)
 
 def celsius_to_fahrenheit(celsius):
     """Convert Celsius to Fahrenheit"""